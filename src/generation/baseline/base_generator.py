@@ -1,5 +1,6 @@
 import os
 
+from generation.baseline.context_packer import pack_context
 from util.llm_client import LLMClient
 
 system_prompt = """
@@ -23,7 +24,19 @@ class BaseGenerator:
         """
         Render retrieved data into a bounded string so LLM calls stay fast and
         avoid gateway/proxy timeouts on hosted environments (e.g. Render).
+
+        Chunk lists are packed into a token budget (RAG_MAX_CONTEXT_TOKENS) by relevance,
+        whole chunks only; other retrieval results are cut at RAG_MAX_CONTEXT_CHARS.
         """
+        max_tokens = int(os.getenv("RAG_MAX_CONTEXT_TOKENS", "3000"))
+        if max_tokens > 0 and isinstance(getattr(retrieved_data, "chunks", None), list) and retrieved_data.source_files is not None:
+            return pack_context(
+                retrieved_data,
+                max_tokens=max_tokens,
+                mmr_lambda=float(os.getenv("RAG_MMR_LAMBDA", "0.7")),
+                duplicate_similarity=float(os.getenv("RAG_DUPLICATE_SIMILARITY", "0.9")),
+            )
+
         max_chars = int(os.getenv("RAG_MAX_CONTEXT_CHARS", "12000"))
         s = str(retrieved_data)
         if max_chars > 0 and len(s) > max_chars:
@@ -31,6 +44,20 @@ class BaseGenerator:
             s = s[:head] + "\n\n[...context truncated...]\n"
         return s
 
+    def build_user_prompt(self, retrieved_data, query) -> str:
+        context = self.render_context(retrieved_data)
+        return f"Question: {query}\n\nRetrieved Data:\n{context}"
+
+    def generate_stream(self, retrieved_data, query):
+        """
+        Streams the answer for the retrieved data and query.
+
+        Yields:
+            Text deltas of the answer as the LLM produces them.
+        """
+        user_prompt = self.build_user_prompt(retrieved_data, query)
+        yield from self.llm_client.generate_stream(system_prompt=self.system_prompt, user_prompt=user_prompt)
+
     def generate(self, retrieved_data, query):
         """
         Generates a response based on the retrieved data and query.
@@ -44,6 +71,22 @@ class BaseGenerator:
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    async def agenerate(self, retrieved_data, query):
+        """
+        Async variant of generate for the async chat path.
+        """
+        user_prompt = self.build_user_prompt(retrieved_data, query)
+        llm_response = await self.llm_client.agenerate(system_prompt=self.system_prompt, user_prompt=user_prompt)
+        return Response(answer=llm_response)
+
+    async def agenerate_stream(self, retrieved_data, query):
+        """
+        Async variant of generate_stream for the streaming chat endpoint.
+        """
+        user_prompt = self.build_user_prompt(retrieved_data, query)
+        async for token in self.llm_client.agenerate_stream(system_prompt=self.system_prompt, user_prompt=user_prompt):
+            yield token
+
 class Response:
     def __init__(self, answer):
         self.answer = answer
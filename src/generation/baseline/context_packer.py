@@ -0,0 +1,71 @@
+import re
+
+from util.token_counter import count_tokens
+
+_WORD = re.compile(r"\w+")
+
+
+def _relevance(scores, n):
+    """
+    Retrieval scores scaled to [0, 1]; falls back to retrieval rank when scores are missing.
+    """
+    if not scores or len(scores) != n or any(score is None for score in scores):
+        return [1.0 - i / n for i in range(n)]
+    low, high = min(scores), max(scores)
+    if high - low <= 1e-12:
+        return [1.0] * n
+    return [(score - low) / (high - low) for score in scores]
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack_context(retrieved_data, max_tokens, mmr_lambda=0.7, duplicate_similarity=0.9):
+    """
+    Render the chunks of `retrieved_data` into at most `max_tokens` tokens.
+
+    Chunks are picked greedily by maximal marginal relevance: retrieval score traded off
+    against word overlap with the chunks already picked. Chunks that overlap a picked one by
+    `duplicate_similarity` or more are dropped as near-duplicates (only within the same
+    version: the same paragraph in two versions of a document is evidence, not noise), and
+    chunks that no longer fit the remaining budget are skipped whole instead of being cut.
+    """
+    n = len(retrieved_data.chunks)
+    if n == 0:
+        return ""
+
+    relevance = _relevance(retrieved_data.scores, n)
+    entries = [retrieved_data.entry_to_string(i) for i in range(n)]
+    costs = [count_tokens(entry) + 1 for entry in entries]  # +1 for the separating newline
+    words = [frozenset(_WORD.findall(str(chunk).lower())) for chunk in retrieved_data.chunks]
+    versions = retrieved_data.versions or [None] * n
+
+    selected = []
+    redundancy = [0.0] * n
+    duplicate = [False] * n
+    remaining = set(range(n))
+    budget = max_tokens
+    while remaining:
+        # The budget only shrinks and duplicates stay duplicates, so dropped candidates never come back.
+        remaining = {i for i in remaining if costs[i] <= budget and not duplicate[i]}
+        if not remaining:
+            break
+        best = max(remaining, key=lambda i: (mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy[i], -i))
+        remaining.discard(best)
+        selected.append(best)
+        budget -= costs[best]
+        for i in remaining:
+            similarity = _jaccard(words[i], words[best])
+            redundancy[i] = max(redundancy[i], similarity)
+            duplicate[i] = duplicate[i] or (similarity >= duplicate_similarity and versions[i] == versions[best])
+
+    if not selected:
+        # Even the best chunk is over budget: keep its head rather than sending no evidence.
+        best = max(range(n), key=lambda i: (relevance[i], -i))
+        head = entries[best][:max(0, max_tokens * 4 - 40)]
+        return head + "\n[...chunk truncated...]\n"
+
+    return "\n".join(entries[i] for i in selected)
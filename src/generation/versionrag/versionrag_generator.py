@@ -23,7 +23,6 @@ class VersionRAGGenerator(BaseGenerator):
             """
     
     def generate(self, retrieved_data, query):        
-        context = self.render_context(retrieved_data)
-        user_prompt = f"Question: {query}\n\nRetrieved Data:\n{context}"
+        user_prompt = self.build_user_prompt(retrieved_data, query)
         llm_response = self.llm_client.generate(system_prompt=self.system_prompt, user_prompt=user_prompt)
         return Response(answer=llm_response)
\ No newline at end of file
@@ -1,24 +1,75 @@
+import hashlib
 import os
-import time
+from threading import Lock
 from dotenv import load_dotenv
 # from pymilvus import MilvusClient
 # from util.constants import MILVUS_URI, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE, EMBEDDING_DIMENSIONS
-from util.constants import MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE, EMBEDDING_DIMENSIONS
+from util.constants import MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_SIMHASH, MILVUS_META_ATTRIBUTE_VERSIONS, MILVUS_META_ATTRIBUTE_FILES, EMBEDDING_DIMENSIONS
 from util.chunker import Chunker, Chunk
 from util.embedding_client import get_embedding_client
+from util.index_epoch import bump_index_epoch
 from util.milvus_client_factory import get_milvus_client
+from util.progress import emit
+from util.simhash import simhash_hex
 
 load_dotenv()
 
+# Everything needed to upsert a stored row unchanged apart from its version/file membership
+_ROW_FIELDS = ["vector",
+               MILVUS_META_ATTRIBUTE_TEXT,
+               MILVUS_META_ATTRIBUTE_PAGE,
+               MILVUS_META_ATTRIBUTE_FILE,
+               MILVUS_META_ATTRIBUTE_CATEGORY,
+               MILVUS_META_ATTRIBUTE_DOCUMENTATION,
+               MILVUS_META_ATTRIBUTE_VERSION,
+               MILVUS_META_ATTRIBUTE_TYPE,
+               MILVUS_META_ATTRIBUTE_SIMHASH,
+               MILVUS_META_ATTRIBUTE_VERSIONS,
+               MILVUS_META_ATTRIBUTE_FILES]
+
+def _split_members(value):
+    # "|a||b|" -> ["a", "", "b"]
+    return value[1:-1].split("|") if value and len(value) >= 2 else []
+
+def _join_members(values):
+    return "|" + "|".join(values) + "|"
+
+def _embed_batch_size():
+    return int(os.getenv("INDEX_EMBED_BATCH_SIZE", "256"))
+
+def _batches(items, batch_size):
+    # lists of up to batch_size items, taken lazily from any iterable
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 class BaseIndexer:
     def __init__(self):
         self.embedding_fn = get_embedding_client()
         self.client = None
         self.chunker = Chunker()
+        # Store identical file chunks once per (category, documentation) with every version/file
+        # they occur in, instead of one row (and embedding) per version. See _build_deduplicated_rows.
+        self.deduplicate_chunks = False
+        # Deduplication bookkeeping for one indexing run (see reset_write_state)
+        self._write_lock = Lock()
+        self._claimed = set()  # ids some file of this run embeds and inserts
+        self._written = {}  # id -> latest row written in this run (reads may lag behind writes)
+        self._pending_members = {}  # id -> memberships waiting for the claiming file's insert
+        # Receives a util.progress.ProgressEvent per file / embedded batch (e.g. the web app's job tracker)
+        self.progress_listener = None
         
     def index_data(self, data_files):
         raise NotImplementedError("Subclasses must implement this method.")
     
+    def emit_progress(self, type, **fields):
+        emit(self.progress_listener, type, **fields)
+    
     def createCollectionIfRequired(self, collection_name):
         if self.client is None:
             # self.client = MilvusClient(MILVUS_URI)
@@ -42,6 +93,14 @@ class BaseIndexer:
         # Double quote needs to be escaped: " -> \"
         escaped = value.replace('\\', '\\\\').replace('"', '\\"')
         return escaped
+
+    def _escape_milvus_like_string(self, value):
+        """
+        Escape a string for use inside a Milvus `like` pattern: on top of the filter string
+        escaping, the wildcards % and _ (common in file names) must match literally.
+        """
+        escaped = self._escape_milvus_filter_string(value)
+        return escaped.replace('%', '\\\\%').replace('_', '\\\\_')
     
     def is_file_indexed(self, data_file, collection_name):
         """
@@ -60,9 +119,13 @@ class BaseIndexer:
             abs_file_path = os.path.abspath(data_file)
             # Escape path for Milvus filter (handle Windows backslashes)
             escaped_path = self._escape_milvus_filter_string(abs_file_path)
+            file_filter = f'{MILVUS_META_ATTRIBUTE_FILE} == "{escaped_path}"'
+            if self.deduplicate_chunks:
+                # chunks shared with an earlier version are stored under that version's file
+                file_filter += f' or {MILVUS_META_ATTRIBUTE_FILES} like "%|{self._escape_milvus_like_string(abs_file_path)}|%"'
             result = self.client.query(
                 collection_name=collection_name,
-                filter=f'{MILVUS_META_ATTRIBUTE_FILE} == "{escaped_path}"',
+                filter=file_filter,
                 output_fields=[MILVUS_META_ATTRIBUTE_FILE],
                 limit=1
             )
@@ -72,6 +135,40 @@ class BaseIndexer:
             print(f"Warning: Could not check if file is indexed: {e}")
             return False
     
+    def get_indexed_files(self, collection_name):
+        """
+        Absolute paths of all files with chunks in the collection, fetched in one paginated
+        pass so per-file "already indexed?" checks become set lookups.
+        Returns None if the paths could not be fetched (callers then check per file).
+        """
+        if self.client is None:
+            self.client = get_milvus_client()
+
+        if not self.client.has_collection(collection_name=collection_name):
+            return set()
+
+        output_fields = [MILVUS_META_ATTRIBUTE_FILE]
+        if self.deduplicate_chunks:
+            output_fields.append(MILVUS_META_ATTRIBUTE_FILES)
+        indexed_files = set()
+        try:
+            for row in self.query_all(collection_name, filter=f'{MILVUS_META_ATTRIBUTE_FILE} != ""', output_fields=output_fields):
+                indexed_files.add(row[MILVUS_META_ATTRIBUTE_FILE])
+                # chunks shared with an earlier version are stored under that version's file
+                indexed_files.update(_split_members(row.get(MILVUS_META_ATTRIBUTE_FILES)))
+        except Exception as e:
+            print(f"Warning: Could not fetch indexed files: {e}")
+            return None
+        return indexed_files
+
+    def was_file_indexed(self, data_file, collection_name, indexed_files):
+        """
+        Set lookup in the result of get_indexed_files, or a per-file query if that failed.
+        """
+        if indexed_files is None:
+            return self.is_file_indexed(data_file, collection_name)
+        return os.path.abspath(data_file) in indexed_files
+    
     def delete_file_from_collection(self, data_file, collection_name):
         """
         Delete all chunks from a specific file from the collection.
@@ -88,78 +185,313 @@ class BaseIndexer:
             abs_file_path = os.path.abspath(data_file)
             # Escape path for Milvus filter (handle Windows backslashes)
             escaped_path = self._escape_milvus_filter_string(abs_file_path)
+            if self.deduplicate_chunks:
+                self._remove_file_membership(abs_file_path, collection_name)
             self.client.delete(
                 collection_name=collection_name,
                 filter=f'{MILVUS_META_ATTRIBUTE_FILE} == "{escaped_path}"'
             )
+            bump_index_epoch()
             print(f"Deleted existing chunks for: {os.path.basename(data_file)}")
         except Exception as e:
             print(f"Warning: Could not delete file from collection: {e}")
     
-    def index_file(self, data_file, collection_name, category="", documentation="", version="", skip_existing=True, re_index=False):
+    def prepare_file(self, data_file, collection_name, skip_existing=True, re_index=False, indexed=None):
         """
-        Index a file to the collection.
-        
-        Args:
-            data_file: Path to the file to index
-            collection_name: Name of the Milvus collection
-            category: Category metadata
-            documentation: Documentation metadata
-            version: Version metadata
-            skip_existing: If True, skip indexing if file already exists (default: True)
-            re_index: If True, delete existing chunks before indexing (default: False)
+        Apply the skip/re-index policy for a file that may already be indexed.
+        Returns False if the file should be skipped.
         """
         data_file_name = os.path.basename(data_file)
         
         # Check if file already indexed
-        if self.is_file_indexed(data_file, collection_name):
+        if indexed is None:
+            indexed = self.is_file_indexed(data_file, collection_name)
+        if indexed:
             if re_index:
                 print(f"Re-indexing: {data_file_name} (deleting existing chunks)")
                 self.delete_file_from_collection(data_file, collection_name)
             elif skip_existing:
                 print(f"Skipping: {data_file_name} (already indexed)")
-                return
+                self.emit_progress("file_skipped", file=data_file)
+                return False
             else:
                 print(f"Warning: {data_file_name} already indexed, but skip_existing=False. This may cause duplicates!")
+        return True
         
-        print(f"Indexing: {data_file_name}")
+    def query_all(self, collection_name, filter, output_fields, batch_size=1000):
+        """
+        Yield every row matching `filter`, paging with a query iterator so results are
+        not capped by Milvus' per-query limit.
+        """
+        iterator = self.client.query_iterator(collection_name=collection_name, batch_size=batch_size, filter=filter, output_fields=output_fields)
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            iterator.close()
+
+    def index_records(self, records, collection_name, batch_size=None):
+        """
+        Embed and insert many single-chunk records in bulk (large embedding batches, one insert
+        per batch, no pauses). Each record is a row without id/vector: the text plus its own
+        page/file/category/documentation/version/type metadata.
+        """
+        batch_size = batch_size or _embed_batch_size()
+        # identical records (same change listed twice) are stored once
+        unique = {}
+        for record in records:
+            key = "\x1f".join(str(record.get(field, "")) for field in (MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_TEXT))
+            unique.setdefault(int(hashlib.md5(key.encode()).hexdigest()[:15], 16), record)
+        ids = list(unique)
+
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            batch_vectors = self.embedding_fn.encode_documents([unique[id][MILVUS_META_ATTRIBUTE_TEXT] for id in batch])
+            data = [
+                {"id": id,
+                "vector": vector,
+                **unique[id],
+                MILVUS_META_ATTRIBUTE_SIMHASH: simhash_hex(unique[id][MILVUS_META_ATTRIBUTE_TEXT])}
+                for id, vector in zip(batch, batch_vectors)
+            ]
+            self.client.insert(collection_name=collection_name, data=data)
+            self.emit_progress("chunks_embedded", count=len(data))
+
+        if ids:
+            bump_index_epoch()
+        return len(ids)
 
-        chunks = self.chunker.chunk_document(data_file=data_file)
-        self.index(chunks=chunks, collection_name=collection_name, data_file=data_file, category=category, documentation=documentation, version=version, type="file")
-        print(f"Indexed: {data_file_name} ({len(chunks)} chunks)")
-        
     def index_chunk(self, chunk:Chunk, collection_name, category, documentation, version, type, file):
         self.index(chunks=[chunk], collection_name=collection_name, category=category, documentation=documentation, version=version, type=type, data_file=file)
         
     def index(self, chunks, collection_name, data_file="", category="", documentation="", version="", type=""):
-        chunk_texts = [chunk.chunk for chunk in chunks]
-        batch_size = 100
-        
+        """
+        Embed and write chunks. `chunks` may be any iterable (e.g. Chunker.iter_chunks): rows are
+        embedded and written batch by batch as chunks arrive. Returns the number of chunks indexed.
+        """
         # Use absolute path for consistent file identification
         abs_file_path = os.path.abspath(data_file) if data_file else ""
 
-        for i in range(0, len(chunk_texts), batch_size):
-            batch = chunk_texts[i:i + batch_size]
-            batch_vectors = self.embedding_fn.encode_documents(batch)
-            
-            # Generate unique IDs to avoid conflicts
-            # Use hash of file path + chunk index + metadata for uniqueness
-            import hashlib
-            base_id = int(hashlib.md5(f"{abs_file_path}_{category}_{documentation}_{version}_{type}".encode()).hexdigest()[:15], 16)
+        count = 0
+        def counted():
+            nonlocal count
+            for chunk in chunks:
+                count += 1
+                yield chunk
+
+        for operation, rows in self.build_rows(counted(), collection_name, abs_file_path, category, documentation, version, type):
+            self.write_rows(collection_name, operation, rows)
+
+        if count:
+            bump_index_epoch()
+        return count
+
+    def build_rows(self, chunks, collection_name, abs_file_path, category="", documentation="", version="", type=""):
+        """
+        Embed a file's chunks and yield the resulting write operations for write_rows:
+        ("insert", rows) for new rows and, with deduplication, ("members", [(id, version, file)])
+        for chunks already stored (or being stored) for another version.
+        Chunks are consumed one embedding batch at a time.
+        """
+        if self.deduplicate_chunks and type == "file":
+            yield from self._build_deduplicated_rows(chunks, collection_name, abs_file_path, category, documentation, version, type)
+            return
+
+        # Generate unique IDs to avoid conflicts
+        # Use hash of file path + chunk index + metadata for uniqueness
+        base_id = int(hashlib.md5(f"{abs_file_path}_{category}_{documentation}_{version}_{type}".encode()).hexdigest()[:15], 16)
+
+        i = 0
+        for batch in _batches(chunks, _embed_batch_size()):
+            batch_vectors = self.embedding_fn.encode_documents([chunk.chunk for chunk in batch])
             
             data = [
                 {"id": base_id + i + j, 
                 "vector": batch_vectors[j],
-                MILVUS_META_ATTRIBUTE_TEXT: chunks[i + j].chunk, 
-                MILVUS_META_ATTRIBUTE_PAGE: chunks[i + j].page, 
+                MILVUS_META_ATTRIBUTE_TEXT: batch[j].chunk, 
+                MILVUS_META_ATTRIBUTE_PAGE: batch[j].page, 
                 MILVUS_META_ATTRIBUTE_FILE: abs_file_path,
                 MILVUS_META_ATTRIBUTE_CATEGORY: category,
                 MILVUS_META_ATTRIBUTE_DOCUMENTATION: documentation,
                 MILVUS_META_ATTRIBUTE_VERSION: version,
-                MILVUS_META_ATTRIBUTE_TYPE: type}
+                MILVUS_META_ATTRIBUTE_TYPE: type,
+                MILVUS_META_ATTRIBUTE_SIMHASH: simhash_hex(batch[j].chunk)}
                 for j in range(len(batch_vectors))
             ]
-            self.client.insert(collection_name=collection_name, data=data)
-            time.sleep(1)
+            i += len(batch)
+            self.emit_progress("chunks_embedded", file=abs_file_path, count=len(data))
+            yield "insert", data
+
+    def write_rows(self, collection_name, operation, rows):
+        """
+        Apply one operation from build_rows. Not thread-safe: call from a single writer.
+        """
+        if operation == "members":
+            self._add_members(collection_name, rows)
+            return
+
+        self.client.insert(collection_name=collection_name, data=rows)
+        if self.deduplicate_chunks:
+            with self._write_lock:
+                pending = []
+                for row in rows:
+                    if MILVUS_META_ATTRIBUTE_VERSIONS in row:
+                        self._written[row["id"]] = row
+                        pending.extend(self._pending_members.pop(row["id"], []))
+            if pending:
+                self._add_members(collection_name, pending)
+
+    def reset_write_state(self):
+        """
+        Forget the deduplication bookkeeping of the previous run.
+        """
+        with self._write_lock:
+            if self._pending_members:
+                print(f"Warning: {len(self._pending_members)} shared chunks were never written (their first file failed to index)")
+            self._claimed.clear()
+            self._written.clear()
+            self._pending_members.clear()
+
+    @staticmethod
+    def _content_id(category, documentation, type, text):
+        return int(hashlib.sha1(f"{category}\x1f{documentation}\x1f{type}\x1f{text}".encode()).hexdigest()[:15], 16)
+
+    @staticmethod
+    def _members(row):
+        """
+        (version, file) pairs a stored chunk belongs to.
+        """
+        versions = _split_members(row.get(MILVUS_META_ATTRIBUTE_VERSIONS))
+        if not versions:  # row stored without deduplication
+            return [(row.get(MILVUS_META_ATTRIBUTE_VERSION, ""), row.get(MILVUS_META_ATTRIBUTE_FILE, ""))]
+        return list(zip(versions, _split_members(row.get(MILVUS_META_ATTRIBUTE_FILES))))
+
+    @staticmethod
+    def _with_members(row, members):
+        row = dict(row)
+        row[MILVUS_META_ATTRIBUTE_VERSION], row[MILVUS_META_ATTRIBUTE_FILE] = members[0]
+        row[MILVUS_META_ATTRIBUTE_VERSIONS] = _join_members(version for version, _ in members)
+        row[MILVUS_META_ATTRIBUTE_FILES] = _join_members(file for _, file in members)
+        return row
 
-    
\ No newline at end of file
+    def _build_deduplicated_rows(self, chunks, collection_name, abs_file_path, category, documentation, version, type):
+        """
+        Store each distinct chunk text of a (category, documentation) once. The row id is derived
+        from the text, so a chunk that already exists for another version is found by id and only
+        gets this version/file added to its membership; just the new texts are embedded.
+        Safe to run for several files at once: each new id is claimed by exactly one file.
+        """
+        seen = set()
+        new_count = 0
+        shared_count = 0
+        for batch in _batches(chunks, _embed_batch_size()):
+            unique = {}
+            for chunk in batch:
+                id = self._content_id(category, documentation, type, chunk.chunk)
+                if id not in seen:
+                    seen.add(id)
+                    unique[id] = chunk
+            if not unique:
+                continue
+            ids = list(unique)
+
+            stored = {row["id"] for row in self.client.get(collection_name=collection_name, ids=ids, output_fields=["id"])}
+            with self._write_lock:
+                new_ids = [id for id in ids if id not in stored and id not in self._claimed]
+                self._claimed.update(new_ids)
+            claimed = set(new_ids)
+            shared = [id for id in ids if id not in claimed]
+            if shared:
+                yield "members", [(id, version, abs_file_path) for id in shared]
+            new_count += len(new_ids)
+            shared_count += len(shared)
+            if not new_ids:
+                continue
+
+            batch_vectors = self.embedding_fn.encode_documents([unique[id].chunk for id in new_ids])
+            data = [
+                {"id": id,
+                "vector": vector,
+                MILVUS_META_ATTRIBUTE_TEXT: unique[id].chunk,
+                MILVUS_META_ATTRIBUTE_PAGE: unique[id].page,
+                MILVUS_META_ATTRIBUTE_FILE: abs_file_path,
+                MILVUS_META_ATTRIBUTE_CATEGORY: category,
+                MILVUS_META_ATTRIBUTE_DOCUMENTATION: documentation,
+                MILVUS_META_ATTRIBUTE_VERSION: version,
+                MILVUS_META_ATTRIBUTE_TYPE: type,
+                MILVUS_META_ATTRIBUTE_SIMHASH: simhash_hex(unique[id].chunk),
+                MILVUS_META_ATTRIBUTE_VERSIONS: _join_members([version]),
+                MILVUS_META_ATTRIBUTE_FILES: _join_members([abs_file_path])}
+                for id, vector in zip(new_ids, batch_vectors)
+            ]
+            self.emit_progress("chunks_embedded", file=abs_file_path, count=len(data))
+            yield "insert", data
+
+        print(f"{new_count} new chunks embedded, {shared_count} shared with other versions")
+
+    def _add_members(self, collection_name, members):
+        """
+        Add (version, file) memberships to stored rows. Rows written in this run come from
+        the local cache; rows whose claiming file has not been written yet are deferred.
+        """
+        additions = {}
+        for id, version, file in members:
+            additions.setdefault(id, []).append((version, file))
+
+        with self._write_lock:
+            rows = {id: self._written[id] for id in additions if id in self._written}
+        missing = [id for id in additions if id not in rows]
+        for i in range(0, len(missing), 500):
+            for row in self.client.get(collection_name=collection_name, ids=missing[i:i + 500], output_fields=_ROW_FIELDS):
+                rows[row["id"]] = row
+
+        updated = []
+        with self._write_lock:
+            for id, added in additions.items():
+                row = rows.get(id)
+                if row is None:
+                    self._pending_members.setdefault(id, []).extend((id, version, file) for version, file in added)
+                    continue
+                members = self._members(row)
+                added = [member for member in added if member not in members]
+                if added:
+                    row = self._with_members(row, members + added)
+                    self._written[id] = row
+                    updated.append(row)
+        if updated:
+            self.client.upsert(collection_name=collection_name, data=updated)
+
+    def _remove_file_membership(self, abs_file_path, collection_name):
+        """
+        Take a file out of deduplicated rows: rows only this file used are deleted,
+        shared rows keep their other versions.
+        """
+        # collect every row before changing any, so the paging is not affected by the updates
+        rows = list(self.query_all(collection_name=collection_name,
+                                   filter=f'{MILVUS_META_ATTRIBUTE_FILES} like "%|{self._escape_milvus_like_string(abs_file_path)}|%"',
+                                   output_fields=_ROW_FIELDS))
+        updated = []
+        deleted = []
+        for row in rows:
+            row_members = self._members(row)
+            members = [member for member in row_members if member[1] != abs_file_path]
+            if len(members) == len(row_members):
+                continue
+            if members:
+                updated.append(self._with_members(row, members))
+            else:
+                deleted.append(row["id"])
+        if updated:
+            self.client.upsert(collection_name=collection_name, data=updated)
+        if deleted:
+            self.client.delete(collection_name=collection_name, ids=deleted)
+        with self._write_lock:
+            for row in updated:
+                if row["id"] in self._written:
+                    self._written[row["id"]] = row
+            for id in deleted:
+                self._written.pop(id, None)
+                self._claimed.discard(id)
@@ -1,4 +1,5 @@
 from indexing.baseline.base_indexer import BaseIndexer
+from indexing.baseline.index_pipeline import IndexPipeline
 from util.constants import MILVUS_COLLECTION_NAME_BASELINE
 
 class BaselineIndexer(BaseIndexer):
@@ -15,16 +16,19 @@ class BaselineIndexer(BaseIndexer):
         
         self.createCollectionIfRequired(MILVUS_COLLECTION_NAME_BASELINE)
         
-        indexed_count = 0
         skipped_count = 0
         
+        indexed_files = self.get_indexed_files(MILVUS_COLLECTION_NAME_BASELINE)
+        
+        files = []
         for data_file in data_files:
-            was_indexed = self.is_file_indexed(data_file, MILVUS_COLLECTION_NAME_BASELINE)
-            self.index_file(data_file, MILVUS_COLLECTION_NAME_BASELINE, skip_existing=skip_existing, re_index=re_index)
-            
-            if was_indexed and skip_existing and not re_index:
-                skipped_count += 1
+            was_indexed = self.was_file_indexed(data_file, MILVUS_COLLECTION_NAME_BASELINE, indexed_files)
+            if self.prepare_file(data_file, MILVUS_COLLECTION_NAME_BASELINE, skip_existing=skip_existing, re_index=re_index, indexed=was_indexed):
+                files.append({"file": data_file})
             else:
-                indexed_count += 1
+                skipped_count += 1
+        
+        # parsing, embedding and writing overlap across files
+        indexed_count = IndexPipeline(self, MILVUS_COLLECTION_NAME_BASELINE).run(files)
         
         print(f"\n✅ Indexing complete: {indexed_count} files indexed, {skipped_count} files skipped")
\ No newline at end of file
@@ -0,0 +1,226 @@
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from threading import Event, Lock, Thread
+
+from util.chunker import Chunker
+from util.index_epoch import bump_index_epoch
+
+_DONE = object()  # end-of-stream marker passed down the queues
+_STREAM_BATCH = 32  # chunks per message from a parser to the embedding stage
+
+_chunker = None
+
+def _put(batches, item, cancelled):
+    # Give up once the pipeline failed, so a parser never blocks on a stream nobody reads.
+    while not cancelled.is_set():
+        try:
+            batches.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _stream_chunks(chunker, data_file, batches, cancelled):
+    """
+    Send a file's chunks to `batches` while the file is converted (Chunker.iter_chunks),
+    as ("chunks", [...]) messages followed by ("done", None), or ("error", exception).
+    """
+    try:
+        batch = []
+        for chunk in chunker.iter_chunks(data_file=data_file):
+            batch.append(chunk)
+            if len(batch) == _STREAM_BATCH:
+                if not _put(batches, ("chunks", batch), cancelled):
+                    return
+                batch = []
+        if batch and not _put(batches, ("chunks", batch), cancelled):
+            return
+        _put(batches, ("done", None), cancelled)
+    except Exception as e:
+        _put(batches, ("error", e), cancelled)
+
+def _chunk_file(data_file, convert_workers, batches, cancelled):
+    # One Chunker per worker process: PyMuPDF is not thread-safe, so parsing runs in processes.
+    global _chunker
+    if _chunker is None:
+        _chunker = Chunker(convert_workers=convert_workers)
+    _stream_chunks(_chunker, data_file, batches, cancelled)
+
+class IndexPipeline:
+    """
+    Index files through three overlapping stages connected by bounded queues:
+    parse workers (processes) -> embedding workers (threads) -> a single Milvus writer (thread).
+    Chunks stream from the parser to the embedding stage while a file is still being converted
+    (at most INDEX_QUEUE_SIZE batches of a file are buffered), and while one file is written
+    the next ones are already being embedded and parsed.
+
+    Workers and queue depth come from INDEX_PARSE_WORKERS (default 2, 0 parses in the calling
+    thread), INDEX_EMBED_WORKERS (default 2) and INDEX_QUEUE_SIZE (default 4).
+    """
+    def __init__(self, indexer, collection_name):
+        self.indexer = indexer
+        self.collection_name = collection_name
+        self.parse_workers = max(0, int(os.getenv("INDEX_PARSE_WORKERS", "2")))
+        self.embed_workers = max(1, int(os.getenv("INDEX_EMBED_WORKERS", "2")))
+        self.queue_size = max(1, int(os.getenv("INDEX_QUEUE_SIZE", "4")))
+        self._lock = Lock()
+
+    def run(self, files):
+        """
+        Index files that already passed BaseIndexer.prepare_file.
+
+        Args:
+            files: List of dicts with "file" and optionally "category", "documentation", "version"
+
+        Returns the number of files indexed. The first error of any stage stops the
+        remaining work and is re-raised once all stages have shut down.
+        """
+        if not files:
+            return 0
+
+        self._total = len(files)
+        self._counts = {"parsed": 0, "embedded": 0, "written": 0}
+        self._error = None
+        self.indexer.reset_write_state()
+        # worker processes get their chunk streams and the stop signal through a manager
+        self._manager = Manager() if self.parse_workers else None
+        self._cancelled = self._manager.Event() if self._manager else Event()
+
+        parsed = queue.Queue(maxsize=self.queue_size)
+        rows = queue.Queue(maxsize=self.queue_size)
+        embedders = [Thread(target=self._embed_stage, args=(parsed, rows), daemon=True) for _ in range(self.embed_workers)]
+        writer = Thread(target=self._write_stage, args=(rows,), daemon=True)
+        for thread in embedders + [writer]:
+            thread.start()
+
+        try:
+            self._parse_stage(files, parsed)
+        finally:
+            # Downstream stages keep draining after an error, so these puts cannot block forever.
+            for _ in embedders:
+                parsed.put(_DONE)
+            for thread in embedders:
+                thread.join()
+            rows.put(_DONE)
+            writer.join()
+            if self._manager is not None:
+                self._manager.shutdown()
+
+        if self._counts["written"]:
+            bump_index_epoch()
+        if self._error is not None:
+            raise self._error
+        return self._counts["written"]
+
+    def _fail(self, error):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._cancelled.set()
+
+    def _advance(self, stage):
+        with self._lock:
+            self._counts[stage] += 1
+            counts = dict(self._counts)
+            print(f"Pipeline: parsed {counts['parsed']}/{self._total}, "
+                  f"embedded {counts['embedded']}/{self._total}, "
+                  f"written {counts['written']}/{self._total}")
+        self.indexer.emit_progress("pipeline", counts=counts)
+
+    def _parse_stage(self, files, parsed):
+        # A file goes to the embedding stage as soon as parsing starts; its chunks follow as a stream.
+        if self.parse_workers == 0:
+            for job in files:
+                if self._error is not None:
+                    return
+                batches = queue.Queue(maxsize=self.queue_size)
+                self._start_file(job, parsed, self._read_stream(batches))
+                _stream_chunks(self.indexer.chunker, job["file"], batches, self._cancelled)
+            return
+
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        # cores left for converting the page ranges of one large PDF in parallel
+        convert_workers = max(1, (os.cpu_count() or 1) // self.parse_workers)
+        try:
+            # Files are taken in order; the bounded `parsed` queue limits how far parsing runs ahead.
+            for job in files:
+                if self._error is not None:
+                    return
+                batches = self._manager.Queue(maxsize=self.queue_size)
+                future = pool.submit(_chunk_file, job["file"], convert_workers, batches, self._cancelled)
+                self._start_file(job, parsed, self._read_stream(batches, future))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _start_file(self, job, parsed, chunks):
+        print(f"Indexing: {os.path.basename(job['file'])}")
+        self.indexer.emit_progress("file_started", file=job["file"])
+        parsed.put((job, chunks))
+
+    def _read_stream(self, batches, future=None):
+        # Chunks of one file as they arrive from its parser.
+        while True:
+            try:
+                kind, data = batches.get(timeout=0.5)
+            except queue.Empty:
+                if self._cancelled.is_set():
+                    raise RuntimeError("indexing stopped after an earlier error")
+                if future is not None and future.done():
+                    future.result()  # raises the worker's error
+                    raise RuntimeError("parse worker stopped before the end of the file")
+                continue
+            if kind == "error":
+                raise data
+            if kind == "done":
+                self._advance("parsed")
+                return
+            yield from data
+
+    def _embed_stage(self, parsed, rows):
+        while True:
+            item = parsed.get()
+            if item is _DONE:
+                return
+            if self._error is not None:
+                continue
+            job, chunks = item
+            count = 0
+            def counted():
+                nonlocal count
+                for chunk in chunks:
+                    count += 1
+                    yield chunk
+            try:
+                for operation, data in self.indexer.build_rows(counted(), self.collection_name,
+                                                               os.path.abspath(job["file"]),
+                                                               category=job.get("category", ""),
+                                                               documentation=job.get("documentation", ""),
+                                                               version=job.get("version", ""),
+                                                               type="file"):
+                    rows.put((job, operation, data))
+            except Exception as e:
+                self._fail(e)
+                continue
+            self._advance("embedded")
+            # all of the file's rows are queued; the writer reports it once they are written
+            rows.put((job, None, count))
+
+    def _write_stage(self, rows):
+        while True:
+            item = rows.get()
+            if item is _DONE:
+                return
+            if self._error is not None:
+                continue
+            job, operation, data = item
+            try:
+                if operation is None:
+                    print(f"Indexed: {os.path.basename(job['file'])} ({data} chunks)")
+                    self.indexer.emit_progress("file_done", file=job["file"], count=data)
+                    self._advance("written")
+                else:
+                    self.indexer.write_rows(self.collection_name, operation, data)
+            except Exception as e:
+                self._fail(e)
@@ -1,35 +1,46 @@
+import os
 from indexing.baseline.base_indexer import BaseIndexer
+from indexing.baseline.index_pipeline import IndexPipeline
 from indexing.versionrag.versionrag_indexer_graph import VersionRAGIndexerGraph
 from indexing.versionrag.versionrag_indexer_extract_attributes import extract_attributes_from_file
-from indexing.versionrag.versionrag_indexer_clustering import cluster_documentation
-from util.chunker import Chunk
+from indexing.versionrag.versionrag_indexer_clustering import cluster_documentation, DOCUMENTATION_SIMILARITY
+from util.checkpoint_store import CheckpointStore, file_digest, hash_inputs
 # from util.constants import MILVUS_COLLECTION_NAME_VERSIONRAG, MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_URI
 # from pymilvus import MilvusClient
-from util.constants import MILVUS_COLLECTION_NAME_VERSIONRAG, MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION
-from util.milvus_client_factory import get_milvus_client
+from util.constants import MILVUS_COLLECTION_NAME_VERSIONRAG, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION
 
 class VersionRAGIndexer(BaseIndexer):
     def __init__(self):
-        self.graph = VersionRAGIndexerGraph()
+        # LLM-heavy stage outputs are checkpointed, so a rerun after a crash resumes instead of starting over
+        self.checkpoints = CheckpointStore()
+        self.graph = VersionRAGIndexerGraph(checkpoints=self.checkpoints)
         super().__init__()
+        self.graph.emit_progress = self.emit_progress
+        # consecutive versions share most of their text; embed and store it once
+        self.deduplicate_chunks = os.getenv("VERSIONRAG_DEDUP_CHUNKS", "1").strip().lower() not in ("0", "false", "no")
          
     def index_data(self, data_files):
+        self.emit_progress("stage", stage="attributes")
         files_with_extracted_attributes = self.extract_attributes(data_files)
         print(f"extracted attributes from {len(files_with_extracted_attributes)} files")
                 
         # cluster documentations
-        cluster_documentation(files_with_extracted_attributes)
+        self.emit_progress("stage", stage="clustering")
+        self.cluster_documentation(files_with_extracted_attributes)
         print("clustered documentations")
             
         # basic graph structure
+        self.emit_progress("stage", stage="graph")
         self.graph.generate_basic_graph(files_with_extracted_attributes)
         print("basic graph generated")
             
         # change level construction
+        self.emit_progress("stage", stage="changes")
         self.graph.generate_change_level()
         print("change level constructed")
         
         # content indexing
+        self.emit_progress("stage", stage="content")
         content_nodes = self.graph.get_all_content_nodes_with_context()
         change_nodes = self.graph.get_all_change_nodes_with_context()
         self.index_content(content_nodes=content_nodes, change_nodes=change_nodes)
@@ -47,72 +58,93 @@ class VersionRAGIndexer(BaseIndexer):
         """
         self.createCollectionIfRequired(MILVUS_COLLECTION_NAME_VERSIONRAG)
         
-        indexed_count = 0
         skipped_count = 0
         
+        indexed_files = self.get_indexed_files(MILVUS_COLLECTION_NAME_VERSIONRAG)
+        
+        files = []
         for content_node in content_nodes:
-            was_indexed = self.is_file_indexed(content_node["file"], MILVUS_COLLECTION_NAME_VERSIONRAG)
-            self.index_file(data_file=content_node["file"], 
-                            collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG, 
-                            category=content_node["category"],
-                            documentation=content_node["documentation"],
-                            version=content_node["version"],
-                            skip_existing=skip_existing,
-                            re_index=re_index)
-            
-            if was_indexed and skip_existing and not re_index:
-                skipped_count += 1
+            was_indexed = self.was_file_indexed(content_node["file"], MILVUS_COLLECTION_NAME_VERSIONRAG, indexed_files)
+            if self.prepare_file(content_node["file"], MILVUS_COLLECTION_NAME_VERSIONRAG, skip_existing=skip_existing, re_index=re_index, indexed=was_indexed):
+                files.append({"file": content_node["file"],
+                              "category": content_node["category"],
+                              "documentation": content_node["documentation"],
+                              "version": content_node["version"]})
             else:
-                indexed_count += 1
+                skipped_count += 1
+        
+        # parsing, embedding and writing overlap across files
+        indexed_count = IndexPipeline(self, MILVUS_COLLECTION_NAME_VERSIONRAG).run(files)
+        print(f"Indexed {indexed_count} files, skipped {skipped_count}")
         
-        # For change nodes, we need to check if changes for this version already exist
-        # Note: Changes are tied to version, so we check by version + documentation + category
+        # Changes are tied to a version, so "already indexed" is decided per (documentation, version),
+        # from one bulk query instead of one query per change.
+        existing_change_versions = set()
+        if skip_existing and not re_index:
+            existing_change_versions = self.get_indexed_change_versions()
+
+        records = []
+        skipped_versions = set()
         for change_node in change_nodes:
-            # Check if changes for this version already exist
-            if skip_existing and not re_index:
-                # Query to check if changes exist for this version
-                try:
-                    if self.client is None:
-                        # self.client = MilvusClient(MILVUS_URI)
-                        self.client = get_milvus_client()
-                    # Escape strings for Milvus filter
-                    escaped_doc = change_node["documentation"].replace('\\', '\\\\').replace('"', '\\"')
-                    escaped_version = change_node["version"].replace('\\', '\\\\').replace('"', '\\"')
-                    existing_changes = self.client.query(
-                        collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG,
-                        filter=f'{MILVUS_META_ATTRIBUTE_TYPE} == "change" and {MILVUS_META_ATTRIBUTE_DOCUMENTATION} == "{escaped_doc}" and {MILVUS_META_ATTRIBUTE_VERSION} == "{escaped_version}"',
-                        output_fields=[MILVUS_META_ATTRIBUTE_VERSION],
-                        limit=1
-                    )
-                    if len(existing_changes) > 0:
-                        print(f"Skipping changes for version {change_node['version']} (already indexed)")
-                        continue
-                except Exception as e:
-                    print(f"Warning: Could not check existing changes: {e}")
+            if (change_node["documentation"], change_node["version"]) in existing_change_versions:
+                skipped_versions.add(change_node["version"])
+                continue
             
             chunk_text = change_node["name"]
             description = change_node.get("description")
             if description:
                 chunk_text += "\n" + description
-            self.index_chunk(chunk=Chunk(chunk=chunk_text, page=-1),
-                             collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG, 
-                             category=change_node["category"],
-                             documentation=change_node["documentation"],
-                             version=change_node["version"],
-                             file=change_node["file"],
-                             type="change")
+            records.append({MILVUS_META_ATTRIBUTE_TEXT: chunk_text,
+                            MILVUS_META_ATTRIBUTE_PAGE: -1,
+                            MILVUS_META_ATTRIBUTE_FILE: os.path.abspath(change_node["file"]) if change_node["file"] else "",
+                            MILVUS_META_ATTRIBUTE_CATEGORY: change_node["category"],
+                            MILVUS_META_ATTRIBUTE_DOCUMENTATION: change_node["documentation"],
+                            MILVUS_META_ATTRIBUTE_VERSION: change_node["version"],
+                            MILVUS_META_ATTRIBUTE_TYPE: "change"})
+
+        for version in sorted(skipped_versions):
+            print(f"Skipping changes for version {version} (already indexed)")
+        indexed_changes = self.index_records(records, MILVUS_COLLECTION_NAME_VERSIONRAG)
+        print(f"Indexed {indexed_changes} changes")
+
+    def get_indexed_change_versions(self):
+        """
+        (documentation, version) pairs that already have change chunks in the collection.
+        """
+        try:
+            rows = self.query_all(MILVUS_COLLECTION_NAME_VERSIONRAG,
+                                  filter=f'{MILVUS_META_ATTRIBUTE_TYPE} == "change"',
+                                  output_fields=[MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION])
+            return {(row[MILVUS_META_ATTRIBUTE_DOCUMENTATION], row[MILVUS_META_ATTRIBUTE_VERSION]) for row in rows}
+        except Exception as e:
+            print(f"Warning: Could not check existing changes: {e}")
+            return set()
             
     def extract_attributes(self, data_files):
         """Extract metadata (version, documentation, type, etc.) from each file via LLM."""
         files_with_extracted_attributes = []
         for data_file in data_files:
             try:
+                key = hash_inputs(os.path.abspath(data_file), file_digest(data_file))
+                if self.checkpoints.has("attributes", key):
+                    print(f"Resuming: attributes of {os.path.basename(data_file)} from checkpoint")
                 # Let the extractor infer category from the file path when not provided.
-                attributes = extract_attributes_from_file(data_file=data_file)
+                attributes = self.checkpoints.cached("attributes", key, lambda: extract_attributes_from_file(data_file=data_file))
                 print(attributes)
                 files_with_extracted_attributes.append(attributes)
             except Exception as e:
                 raise ValueError(f"attribute extraction of file {data_file} failed: {e}")
         return files_with_extracted_attributes
-        
-            
\ No newline at end of file
+
+    def cluster_documentation(self, files_with_attributes):
+        """Cluster documentations, or re-apply the checkpointed clusters of identical attributes."""
+        key = hash_inputs([(f.data_file, f.documentation, f.description) for f in files_with_attributes], DOCUMENTATION_SIMILARITY)
+        clustered = self.checkpoints.load("clustering", key)
+        if clustered is not None:
+            print("Resuming: documentation clusters from checkpoint")
+            for file_with_attributes, (documentation, description) in zip(files_with_attributes, clustered):
+                file_with_attributes.documentation = documentation
+                file_with_attributes.description = description
+            return
+        cluster_documentation(files_with_attributes)
+        self.checkpoints.save("clustering", key, [(f.documentation, f.description) for f in files_with_attributes])
@@ -1,91 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
 from indexing.versionrag.versionrag_indexer_extract_attributes import FileAttributes
+from util.clustering import cluster_vectors
+from util.embedding_client import get_embedding_client
 from util.llm_client import LLMClient
 import json
 import os
+import re
 
 llm_client = LLMClient(json_format=True, temp=0.5)
 
+# Clusters are formed locally from description embeddings; the LLM only names each cluster.
+# Versions of one documentation describe the same subject, so documentation clusters are tight;
+# categories group related subjects and are looser.
+DOCUMENTATION_SIMILARITY = float(os.getenv("VERSIONRAG_DOCUMENTATION_SIMILARITY", "0.85"))
+CATEGORY_SIMILARITY = float(os.getenv("VERSIONRAG_CATEGORY_SIMILARITY", "0.6"))
+NAMING_WORKERS = int(os.getenv("VERSIONRAG_CLUSTER_NAMING_WORKERS", "8"))
+
+# explicit version tokens ("v2.1", "versi 3", "1.4.2") and academic-year ranges ("2024-2025", "2024/25")
+# must not pull versions apart; other numbers ("ISO 27001") identify the document and are kept
+_VERSION_TEXT = re.compile(
+    r"\b(?:v|ver|versi|version)\.?\s*\d+(?:[.\-_]\d+)*\b"
+    r"|\b\d+(?:\.\d+)+\b"
+    r"|\b(?:19|20)\d{2}\s*[-/–]\s*(?:(?:19|20)\d{2}|\d{2})\b",
+    re.IGNORECASE,
+)
+
+def _strip_versions(text):
+    return re.sub(r"\s+", " ", _VERSION_TEXT.sub(" ", text or "")).strip()
+
+_embedding_client = None
+
+def _embed(texts):
+    global _embedding_client
+    if _embedding_client is None:
+        _embedding_client = get_embedding_client()
+    return _embedding_client.encode_documents([_strip_versions(text) for text in texts])
+
+def _generate_json(system_prompt, user_prompt, max_attempts=3):
+    for attempt in range(max_attempts):
+        response = llm_client.generate(system_prompt=system_prompt, user_prompt=user_prompt)
+        response = response.replace("```json", "").replace("```", "").strip()
+        try:
+            return json.loads(response)
+        except json.JSONDecodeError:
+            if attempt == max_attempts - 1:
+                raise ValueError(f"error during cluster naming result parsing after {max_attempts} attempts: {response}")
+
+def _name_clusters(name_cluster, clusters):
+    # one small LLM call per cluster, in parallel; results keep the cluster order
+    with ThreadPoolExecutor(max_workers=max(1, NAMING_WORKERS)) as executor:
+        return list(executor.map(name_cluster, clusters))
+
 def cluster_documentation(data_files: list[FileAttributes]):
     # cluster similar documentations based on their description
     system_prompt = """
-                    You are an intelligent assistant specialized in clustering categories based on their name, description and filename.
-                    You will be provided with a list of categories, each containing a name and a description. Your task is to group these categories based on their content similarity, considering the topic and the general description. 
-                    **Ignore any versioning information in the descriptions, as it should not contribute to the clustering.**  
+                    You are an intelligent assistant specialized in naming clusters of documentations.
+                    You will be provided with a list of documentations that belong together, each containing a name, a description and a filename. Typically they are different versions of the same document.
+                    **Ignore any versioning information in the descriptions, as it should not be part of the name.**
 
-                    1. Each category has a "name" and a "description". You should focus on the main topic and theme of the description to group similar categories.
-                    2. For each resulting cluster, generate a:
+                    Generate a:
                     - **"cluster_name"**: a short, representative title of the cluster.
-                    - **"cluster_description"**: a summary of what the grouped categories have in common.
-                    - **"category_indices"**: an array of integers representing the indices of the grouped categories.
-                    3. The output must be a **JSON array**, where each item represents a cluster with a name, a description, and a list of indices.
-                    4. Do not include any additional explanation or text outside the JSON.
-                    5. Ignore any versioning or version-related text in the descriptions.
-                    6. Treat categories that focus on the same core subject as belonging to the same cluster, even if their descriptions vary slightly in wording or emphasis.
-                    7. Use semantic similarity between both the name and the description to identify near-duplicates or closely related entries.
+                    - **"cluster_description"**: a summary of what the grouped documentations have in common.
+                    Do not include any additional explanation or text outside the JSON.
 
                     **Output format (example):**
                     ```json
                     {
-                        "clusters": [
-                            {
-                            "cluster_name": "Authentication Services",
-                            "cluster_description": "Categories related to user authentication, login systems, and identity verification.",
-                            "category_indices": [0, 2, 5]
-                            },
-                            {
-                            "cluster_name": "Authentication Errors",
-                            "cluster_description": "Categories covering payment gateways, transaction APIs, and financial services.",
-                            "category_indices": [1, 3]
-                            }
-                        ]
+                        "cluster_name": "Authentication Services",
+                        "cluster_description": "Documentation of user authentication, login systems, and identity verification."
                     }"""
+    # sorted input makes the clustering identical across runs
     sorted_data_files = sorted(data_files, key=lambda x: os.path.basename(x.data_file).lower())
-    all_categories_with_description = "\n".join(
-        f"{i} documentation name: {data_file.documentation}\n {i} description: {data_file.description}\n {i} filename: {os.path.basename(data_file.data_file)}"
-        for i, data_file in enumerate(sorted_data_files)
-    )
-    all_categories_with_description = "\n".join(f"{i} documentation name: {data_file.documentation}\n {i} description: {data_file.description}\n {i} filename: {os.path.basename(data_file.data_file)}" for i, data_file in enumerate(data_files))
-    response = llm_client.generate(system_prompt=system_prompt, user_prompt=all_categories_with_description)
-    response = response.replace("```json", "").replace("```", "").strip()
-    try:
-        data = json.loads(response)
-        parsed_result = data.get("clusters", [])
-    except:
-        raise ValueError(f"error during clustering result parsing {response}")
-    
-    for cluster in parsed_result:
-        cluster_name = cluster["cluster_name"]
-        cluster_description = cluster["cluster_description"]
-        indices = cluster["category_indices"]
-        for i, sub_data_file_index in enumerate(indices):
+    if not sorted_data_files:
+        return
+    vectors = _embed(f"{data_file.documentation}\n{data_file.description}\n{os.path.splitext(os.path.basename(data_file.data_file))[0]}"
+                     for data_file in sorted_data_files)
+    clusters = cluster_vectors(vectors, DOCUMENTATION_SIMILARITY)
+
+    def name_cluster(indices):
+        members = [sorted_data_files[i] for i in indices]
+        if len(members) == 1:
+            # nothing to merge: the file keeps its own documentation
+            return members[0].documentation, members[0].description
+        user_prompt = "\n".join(f"{i} documentation name: {data_file.documentation}\n {i} description: {data_file.description}\n {i} filename: {os.path.basename(data_file.data_file)}"
+                                for i, data_file in enumerate(members))
+        try:
+            data = _generate_json(system_prompt, user_prompt)
+            return data["cluster_name"], data["cluster_description"]
+        except Exception as e:
+            print(f"Warning: could not name documentation cluster, keeping '{members[0].documentation}': {e}")
+            return members[0].documentation, members[0].description
+
+    names = _name_clusters(name_cluster, clusters)
+    for indices, (cluster_name, cluster_description) in zip(clusters, names):
+        for i in indices:
             # set same documentation to sub data files in same cluster
-            data_files[sub_data_file_index].documentation = cluster_name
-            data_files[sub_data_file_index].description = cluster_description
-            print("updated documentation for file in cluster")
-                
+            sorted_data_files[i].documentation = cluster_name
+            sorted_data_files[i].description = cluster_description
+        print(f"updated documentation for {len(indices)} files in cluster '{cluster_name}'")
+
 def cluster_categories(documentations: list):
     # group similar documentations based on their names and description into categories
     system_prompt = """
-            You are an AI assistant specialized in categorizing and clustering documentation files based on their names and descriptions.
+            You are an AI assistant specialized in naming categories of documentation files.
 
             ## Task
-            You will receive a list of documentation entries, each containing:
+            You will receive a list of documentation entries that were grouped into one category, each containing:
             - "name": The title of the document.
             - "description": A brief summary of the document’s content.
 
             ## Your Goal
-            1. Identify meaningful categories by grouping similar documentation entries based on their names and descriptions.
-            2. Assign each documentation entry to exactly one category that best represents its topic.
-            3. Generate a clear and concise category title in the same language as the majority of the document names in that category.
+            Generate a clear and concise category title in the same language as the majority of the document names.
 
             ## Important Guidelines
-            - Categories should be broad but specific enough to group related documents meaningfully.
-            - Release Notes should be categorized into separate categories **if they relate to different technologies**.
-            - Ignore minor variations in phrasing—focus on the core subject.
-            - The category title must be in the same language as the documentation names in that category.
+            - The category should be broad but specific enough to describe all documents.
+            - Release Notes of a technology should name that technology.
             - The category title must be descriptive yet concise (maximum 5 words).
-            - Ensure every document is assigned to exactly one category.
-            - Merge very similar categories into one.
             - Output must be valid JSON and ready for parsing.
 
             ## Output Format
@@ -93,34 +123,26 @@ def cluster_categories(documentations: list):
 
             ```json
             {
-            "categories": [
-                {
-                "name": "Release Notes Apache",
-                "documents": [
-                    "Meldeverfahren zur Sozialversicherung",
-                    "Sozialversicherungsanmeldung"
-                ]
-                },
-                {
-                "name": "Release Notes DEÜV",
-                "documents": [
-                    "IT-Sicherheitsrichtlinie",
-                    "Datenschutzbestimmungen"
-                ]
-                }
-            ]
+            "name": "Release Notes Apache"
             }
    """
-    all_documentations_with_description = "\n".join(f"{i} documentation name: {documentation['name']}\n{i} description: {documentation['description']}\n" for i, documentation in enumerate(documentations))
-    print(all_documentations_with_description)
-    max_attempts = 3
-    for attempt in range(max_attempts):
-        response = llm_client.generate(system_prompt=system_prompt, user_prompt=all_documentations_with_description)
-        response = response.replace("```json", "").replace("```", "").strip()
+    sorted_documentations = sorted(documentations, key=lambda documentation: documentation["name"] or "")
+    if not sorted_documentations:
+        return []
+    vectors = _embed(f"{documentation['name']}\n{documentation['description'] or ''}" for documentation in sorted_documentations)
+    clusters = cluster_vectors(vectors, CATEGORY_SIMILARITY)
+
+    def name_cluster(indices):
+        members = [sorted_documentations[i] for i in indices]
+        user_prompt = "\n".join(f"{i} documentation name: {documentation['name']}\n{i} description: {documentation['description']}\n" for i, documentation in enumerate(members))
         try:
-            data = json.loads(response)
-            return data.get("categories", [])
-        except json.JSONDecodeError:
-            if attempt >= max_attempts:
-                raise ValueError(f"Error during clustering result parsing after {max_attempts} attempts: {response}")
-    
\ No newline at end of file
+            return _generate_json(system_prompt, user_prompt)["name"]
+        except Exception as e:
+            print(f"Warning: could not name category, using '{members[0]['name']}': {e}")
+            return members[0]["name"]
+
+    names = _name_clusters(name_cluster, clusters)
+    categories = [{"name": name, "documents": [sorted_documentations[i]["name"] for i in indices]}
+                  for indices, name in zip(clusters, names)]
+    print(categories)
+    return categories
@@ -1,11 +1,17 @@
 from indexing.versionrag.versionrag_indexer_extract_attributes import FileAttributes, FileType
 from indexing.versionrag.versionrag_indexer_extract_changes import Change, extract_changes_from_changelog, generate_changes_from_diff
-from indexing.versionrag.versionrag_indexer_clustering import cluster_categories
+from indexing.versionrag.versionrag_indexer_clustering import cluster_categories, CATEGORY_SIMILARITY
+from util.checkpoint_store import CheckpointStore, file_digest, hash_inputs
 from util.graph_client import GraphClient
+from util.index_epoch import bump_index_epoch
 
 class VersionRAGIndexerGraph():      
-    def __init__(self):
+    def __init__(self, checkpoints: CheckpointStore = None):
         self.graph = GraphClient()
+        # graph writes are idempotent MERGEs and simply re-run; the LLM results feeding them are checkpointed
+        self.checkpoints = checkpoints or CheckpointStore()
+        # progress callback (type, **fields); VersionRAGIndexer wires in its emit_progress
+        self.emit_progress = lambda type, **fields: None
         
     def generate_basic_graph(self, files_with_attributes: list[FileAttributes]):
         use_manifest_categories = any(getattr(f, "category", None) for f in files_with_attributes)
@@ -18,6 +24,7 @@ class VersionRAGIndexerGraph():
                 session.execute_write(self.link_categories_from_attributes_tx, files_with_attributes)
             else:
                 session.execute_write(self.cluster_categories_tx)
+        bump_index_epoch()
     
     def documentation_version_content_tx(self, tx, file: FileAttributes):
         tx.run("""
@@ -139,7 +146,10 @@ class VersionRAGIndexerGraph():
         documentation_nodes = [{"name": record["name"], "description": record["description"]} for record in result]
 
         # cluster to categories
-        cluster_result = cluster_categories(documentations=documentation_nodes)
+        key = hash_inputs(sorted((node["name"] or "", node["description"] or "") for node in documentation_nodes), CATEGORY_SIMILARITY)
+        if self.checkpoints.has("categories", key):
+            print("Resuming: categories from checkpoint")
+        cluster_result = self.checkpoints.cached("categories", key, lambda: cluster_categories(documentations=documentation_nodes))
         
         if cluster_result is not None:
             # create category nodes
@@ -158,11 +168,26 @@ class VersionRAGIndexerGraph():
         diff_contents = self.get_diff_contents()
         with self.graph.session() as session:
             for changelog_content in changelog_contents:
-                changes_from_changelog = extract_changes_from_changelog(changelog_content)
+                changes_from_changelog = self._checkpointed_changes("changes", [changelog_content["file"]], changelog_content,
+                                                                    lambda: extract_changes_from_changelog(changelog_content))
                 session.execute_write(self.store_changes, changes_from_changelog)
+                self.emit_progress("changes_extracted", file=changelog_content["file"], count=len(changes_from_changelog))
             # generate changes from difference between versions
-            changes_from_diff = generate_changes_from_diff(diff_contents)
+            changes_from_diff = []
+            for diff_content in diff_contents:
+                changes = self._checkpointed_changes("diff_changes", [diff_content["file1"], diff_content["file2"]], diff_content,
+                                                     lambda: generate_changes_from_diff([diff_content]))
+                changes_from_diff.extend(changes)
+                self.emit_progress("changes_extracted", file=diff_content["file2"], count=len(changes))
             session.execute_write(self.store_changes, changes_from_diff)
+        bump_index_epoch()
+           
+    def _checkpointed_changes(self, stage, files, content, extract):
+        # keyed by the graph context and the file contents; empty results (no diff, or failed retries) are recomputed
+        key = hash_inputs(content, [file_digest(file) for file in files])
+        if self.checkpoints.has(stage, key):
+            print(f"Resuming: changes of {content.get('documentation')} from checkpoint")
+        return self.checkpoints.cached(stage, key, extract, keep=bool)
            
     def get_all_content_nodes_with_context(self):
         query = """
@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import io
+import json
 import os
 import sys
 import time
 import uuid
-from contextlib import redirect_stderr, redirect_stdout
+from collections import deque
+from contextlib import asynccontextmanager, redirect_stderr, redirect_stdout
 from pathlib import Path
 from threading import Lock
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
@@ -36,12 +41,18 @@ from retrieval.versionrag.versionrag_retriever import VersionRAGRetriever  # noq
 from util.constants import (  # noqa: E402
     BASELINE_MODEL,
     VERSIONRAG_MODEL,
+    CHECKPOINT_DIR,
     MILVUS_URI,
     MILVUS_TOKEN,
     MILVUS_COLLECTION_NAME_BASELINE,
     MILVUS_COLLECTION_NAME_VERSIONRAG,
 )
+from util.answer_cache import SemanticAnswerCache  # noqa: E402
+from util.answer_text import astrip_streamed_answer_prefix, strip_answer_prefix  # noqa: E402
+from util.embedding_client import get_embedding_client  # noqa: E402
+from util.index_epoch import get_index_epoch  # noqa: E402
 from util.milvus_client_factory import get_milvus_client  # noqa: E402
+from util.progress import ProgressEvent  # noqa: E402
 
 
 # ---- App -------------------------------------------------------------------
@@ -82,12 +93,14 @@ class IndexStartResponse(BaseModel):
 class JobStatusResponse(BaseModel):
     job_id: str
     model: str
-    status: str  # queued | running | done | error
+    status: str  # queued | running | done | error | interrupted (server restarted mid-job; resumable)
     progress: int = 0  # 0..100 (approximation based on processed files)
     started_at: Optional[float] = None
     finished_at: Optional[float] = None
     error: Optional[str] = None
     logs_tail: str = ""
+    stages: Dict[str, int] = {}  # files through each index pipeline stage (parsed / embedded / written)
+    stage: Optional[str] = None  # current VersionRAG indexing stage (attributes / clustering / graph / changes / content)
 
 
 # ---- Simple component cache -------------------------------------------------
@@ -119,6 +132,33 @@ def _get_components(model: str) -> Dict[str, Any]:
         return obj
 
 
+# ---- Semantic answer cache ----------------------------------------------------
+# Many questions are the same calendar question in slightly different wording.
+# Answers are cached per (query embedding, model, index epoch); a new question with the same
+# numbers whose embedding is close enough to a cached one is answered without retrieval/generation.
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "256"))
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0.95"))
+
+_query_embedding_lock = Lock()
+_query_embedding_client = None
+
+
+def _embed_query(text: str) -> np.ndarray:
+    global _query_embedding_client
+    with _query_embedding_lock:
+        if _query_embedding_client is None:
+            _query_embedding_client = get_embedding_client()
+        client = _query_embedding_client
+    vec = np.asarray(client.encode_queries([text])[0], dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+_answer_cache = SemanticAnswerCache(max_entries=CHAT_CACHE_MAX_ENTRIES, threshold=CHAT_CACHE_SIMILARITY)
+
+
+
 # ---- Helpers ----------------------------------------------------------------
 def _raw_data_dir() -> str:
     # matches src/main.py logic
@@ -146,23 +186,6 @@ def _retrieved_context_to_string(retrieved: Any) -> str:
         return ""
 
 
-def _strip_answer_prefix(text: str) -> str:
-    """
-    Some generators/LLMs may return a prefixed answer like:
-    - "Answer: ..."
-    - "Jawaban: ..."
-    We remove these for a cleaner chat UI.
-    """
-    if not isinstance(text, str):
-        return str(text)
-    s = text.strip()
-    for prefix in ("answer:", "answer -", "answer—", "jawaban:", "jawaban -", "jawaban—"):
-        if s.lower().startswith(prefix):
-            s = s[len(prefix) :].lstrip()
-            break
-    return s
-
-
 # ---- Friendly error formatting ----------------------------------------------
 def _format_chat_exception(e: Exception) -> str:
     """
@@ -203,49 +226,242 @@ def _format_chat_exception(e: Exception) -> str:
 _jobs_lock = Lock()
 _jobs: Dict[str, Dict[str, Any]] = {}
 
+# Job records are persisted so a job interrupted by a restart can be resumed from the UI.
+_JOBS_DIR = Path(CHECKPOINT_DIR) / "jobs"
+_JOB_RECORD_LOG_CHARS = 20_000
+_JOB_RECORDS_KEPT = 20
+_JOB_LOG_CHARS = 200_000
+_JOB_EVENTS_KEPT = 1_000
+
+
+class _JobStream:
+    """
+    Log output and progress events of one index job, each kept bounded (the events in a ring
+    buffer with increasing ids, so SSE clients can continue after the last id they saw).
+
+    It has its own lock: writing logs and events never waits on `_jobs_lock`, and code holding
+    `_jobs_lock` may read from it. SSE handlers register a waiter and are woken on every change
+    instead of polling.
+    """
+
+    def __init__(self, logs: str = "") -> None:
+        self._lock = Lock()
+        self._log_parts: deque[str] = deque()
+        self._log_chars = 0
+        self._log_written = 0  # total characters ever written; offsets for log deltas
+        self._events: deque[Dict[str, Any]] = deque(maxlen=_JOB_EVENTS_KEPT)
+        self._next_event_id = 1
+        self._waiters: list[_JobStreamWaiter] = []
+        if logs:
+            self.write_log(logs)
+
+    def write_log(self, s: str) -> None:
+        with self._lock:
+            self._log_parts.append(s)
+            self._log_chars += len(s)
+            self._log_written += len(s)
+            while len(self._log_parts) > 1 and self._log_chars - len(self._log_parts[0]) >= _JOB_LOG_CHARS:
+                self._log_chars -= len(self._log_parts.popleft())
+            self._notify()
+
+    def logs_tail(self, chars: int) -> str:
+        with self._lock:
+            return self._logs_after(self._log_written - chars)
+
+    def logs_after(self, offset: int, max_chars: Optional[int] = None) -> tuple[str, int]:
+        """
+        Log text written after `offset` (as far as it is still kept, and at most the last
+        `max_chars` of it) and the offset to continue from.
+        """
+        with self._lock:
+            if max_chars is not None:
+                offset = max(offset, self._log_written - max_chars)
+            return self._logs_after(offset), self._log_written
+
+    def _logs_after(self, offset: int) -> str:
+        missing = self._log_written - max(0, offset)
+        parts: list[str] = []
+        size = 0
+        for part in reversed(self._log_parts):
+            if size >= missing:
+                break
+            parts.append(part)
+            size += len(part)
+        text = "".join(reversed(parts))
+        return text[len(text) - min(missing, len(text)):]
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._events.append({"id": self._next_event_id, **event})
+            self._next_event_id += 1
+            self._notify()
+
+    def events_after(self, event_id: int) -> list[Dict[str, Any]]:
+        with self._lock:
+            if event_id >= self._next_event_id:
+                # the id is from before a server restart; ids started over
+                event_id = 0
+            return [event for event in self._events if event["id"] > event_id]
+
+    def notify(self) -> None:
+        # the job's status changed
+        with self._lock:
+            self._notify()
+
+    def _notify(self) -> None:
+        for waiter in self._waiters:
+            waiter.wake()
+
+    def add_waiter(self) -> "_JobStreamWaiter":
+        waiter = _JobStreamWaiter()
+        with self._lock:
+            self._waiters.append(waiter)
+        return waiter
+
+    def remove_waiter(self, waiter: "_JobStreamWaiter") -> None:
+        with self._lock:
+            self._waiters.remove(waiter)
+
+
+class _JobStreamWaiter:
+    """
+    Wakes one SSE handler (an asyncio task) from the indexing threads. A burst of log writes
+    schedules a single wake-up until the handler has caught up.
+    """
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._lock = Lock()
+        self._scheduled = False
+
+    def wake(self) -> None:
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # event loop already closed (server shutting down); nothing to wake
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait for the next change; False if `timeout` passed without one.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            woken = True
+        except asyncio.TimeoutError:
+            woken = False
+        with self._lock:
+            self._event.clear()
+            self._scheduled = False
+        return woken
+
+
+_job_streams: Dict[str, _JobStream] = {}
+
+
+def _job_record(job: Dict[str, Any]) -> Dict[str, Any]:
+    # Snapshot under _jobs_lock; write it with _write_job_record after releasing the lock.
+    record = dict(job)
+    record["logs"] = _job_streams[job["job_id"]].logs_tail(_JOB_RECORD_LOG_CHARS)
+    return record
+
+
+def _write_job_record(record: Dict[str, Any]) -> None:
+    try:
+        _JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        path = _JOBS_DIR / f"{record['job_id']}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(record), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Warning: could not persist index job {record['job_id']}: {e}")
+
+
+def _load_job_records() -> None:
+    if not _JOBS_DIR.exists():
+        return
+    paths = sorted(_JOBS_DIR.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in paths[_JOB_RECORDS_KEPT:]:
+        path.unlink(missing_ok=True)
+    for path in paths[:_JOB_RECORDS_KEPT]:
+        try:
+            job = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if job.get("status") in ("queued", "running"):
+            # the process running it is gone
+            job["status"] = "interrupted"
+            job["error"] = "Server restarted during indexing; resume to continue from the last checkpoint."
+        _job_streams[job["job_id"]] = _JobStream(job.pop("logs", "") or "")
+        _jobs[job["job_id"]] = job
+
+
+_load_job_records()
+
 
 class _JobLogBuffer(io.TextIOBase):
     def __init__(self, job_id: str) -> None:
-        self.job_id = job_id
-        self._lock = Lock()
-        self._buf = ""
+        self._stream = _job_streams[job_id]
 
     def write(self, s: str) -> int:
-        with self._lock, _jobs_lock:
-            job = _jobs.get(self.job_id)
-            if job is not None:
-                job["logs"] += s
-                # keep logs bounded
-                if len(job["logs"]) > 200_000:
-                    job["logs"] = job["logs"][-200_000:]
-
-                # Update progress by parsing log lines ("Indexed:" / "Skipping:")
-                self._buf += s
-                if len(self._buf) > 50_000:
-                    self._buf = self._buf[-50_000:]
-
-                lines = self._buf.splitlines(keepends=False)
-                if not self._buf.endswith("\n"):
-                    self._buf = lines[-1] if lines else self._buf
-                    lines = lines[:-1]
-                else:
-                    self._buf = ""
-
-                if lines:
-                    _update_job_progress_from_lines(job, lines)
+        # Progress comes from the indexers' progress events, so logs are only stored.
+        self._stream.write_log(s)
         return len(s)
 
     def flush(self) -> None:  # pragma: no cover
         return
 
 
+def _apply_progress_event(job: Dict[str, Any], event: ProgressEvent) -> None:
+    """
+    Update the job's counters from an indexer progress event (under _jobs_lock).
+    Each file contributes 2 "ticks" to the progress: start + done.
+    """
+    total = int(job.get("total_files") or 0)
+    if event.type == "file_started":
+        job["started_files"] = int(job.get("started_files") or 0) + 1
+    elif event.type in ("file_done", "file_skipped"):
+        job["done_files"] = int(job.get("done_files") or 0) + 1
+    elif event.type == "pipeline":
+        job["stages"] = dict(event.counts or {})
+    elif event.type == "stage":
+        job["stage"] = event.stage
+
+    if total > 0:
+        done = min(total, int(job.get("done_files") or 0))
+        started = min(total, int(job.get("started_files") or 0))
+        # The index pipeline overlaps files, so several can be in progress.
+        ticks_done = done * 2 + max(0, started - done)
+        pct = int(round((ticks_done / (total * 2)) * 100))
+        if job.get("status") == "running":
+            pct = min(pct, 99)
+        job["progress"] = max(0, min(100, pct))
+
+
 def _run_index_job(job_id: str, model: str) -> None:
     with _jobs_lock:
         _jobs[job_id]["status"] = "running"
         _jobs[job_id]["started_at"] = time.time()
         _jobs[job_id]["progress"] = 0
+        record = _job_record(_jobs[job_id])
+    _write_job_record(record)
 
+    stream = _job_streams[job_id]
+    stream.notify()
     log_buf = _JobLogBuffer(job_id)
+
+    def on_progress(event: ProgressEvent) -> None:
+        # counters first, so a woken SSE handler sees them together with the event
+        with _jobs_lock:
+            _apply_progress_event(_jobs[job_id], event)
+        stream.add_event(event.to_dict())
+
+    indexer = None
     try:
         comps = _get_components(model)
         indexer = comps["indexer"]
@@ -255,7 +471,10 @@ def _run_index_job(job_id: str, model: str) -> None:
             _jobs[job_id]["done_files"] = 0
             _jobs[job_id]["started_files"] = 0
             _jobs[job_id]["progress"] = 0
+            _jobs[job_id]["stages"] = {}
+            _jobs[job_id]["stage"] = None
 
+        indexer.progress_listener = on_progress
         with redirect_stdout(log_buf), redirect_stderr(log_buf):
             indexer.index_data(files)
 
@@ -263,54 +482,22 @@ def _run_index_job(job_id: str, model: str) -> None:
             _jobs[job_id]["status"] = "done"
             _jobs[job_id]["finished_at"] = time.time()
             _jobs[job_id]["progress"] = 100
+        stream.notify()
     except Exception as e:
         with _jobs_lock:
             _jobs[job_id]["status"] = "error"
             _jobs[job_id]["finished_at"] = time.time()
             _jobs[job_id]["error"] = f"{type(e).__name__}: {e}"
-
-
-def _update_job_progress_from_lines(job: Dict[str, Any], lines: list[str]) -> None:
-    """
-    Approximate progress:
-    - Count completed files by matching typical BaseIndexer logs:
-      - "Indexed:" (file finished indexing)
-      - "Skipping:" (file already indexed)
-      - "Indexing:" (file started indexing)
-    """
-    total = int(job.get("total_files") or 0)
-    done = int(job.get("done_files") or 0)
-    started = int(job.get("started_files") or 0)
-
-    inc_done = 0
-    inc_started = 0
-    for ln in lines:
-        # Start signal: BaseIndexer.index_file prints "Indexing: <file>"
-        if ln.strip().startswith("Indexing:"):
-            inc_started += 1
-        # Done signals
-        if "Indexed:" in ln or "Skipping:" in ln:
-            inc_done += 1
-
-    if inc_started:
-        started = min(total, started + inc_started) if total else started + inc_started
-        job["started_files"] = started
-
-    if inc_done:
-        done = min(total, done + inc_done) if total else done + inc_done
-        job["done_files"] = done
-
-    if total > 0:
-        # Give progress movement as soon as a file starts.
-        # Each file contributes 2 "ticks": start + done.
-        in_progress = max(0, started - done)
-        # In normal flow, at most 1 file in progress, but clamp anyway.
-        in_progress = min(in_progress, 1)
-        ticks_done = done * 2 + in_progress
-        pct = int(round((ticks_done / (total * 2)) * 100))
-        if job.get("status") == "running":
-            pct = min(pct, 99)
-        job["progress"] = max(0, min(100, pct))
+        stream.notify()
+    finally:
+        if indexer is not None:
+            indexer.progress_listener = None
+        with _jobs_lock:
+            record = _job_record(_jobs[job_id])
+        _write_job_record(record)
+        # Entries are keyed by index epoch (bumped by the indexers on every write), so they
+        # can no longer hit after a job; dropping them just frees the memory right away.
+        _answer_cache.clear()
 
 
 def _start_thread(target, *args) -> None:
@@ -341,8 +528,14 @@ def health() -> Dict[str, Any]:
     except Exception as e:
         error = f"{type(e).__name__}: {e}"
 
+    # Parser fast-path counters (only once VersionRAG has been used; never builds components here).
+    with _components_lock:
+        versionrag = _components.get(VERSIONRAG_MODEL)
+    parser_stats = versionrag["retriever"].parser.stats() if versionrag else None
+
     return {
         "ok": True,
+        "versionrag_parser": parser_stats,
         "milvus": {
             "ok": milvus_ok,
             "uri": MILVUS_URI,
@@ -355,31 +548,153 @@ def health() -> Dict[str, Any]:
     }
 
 
-@app.post("/api/chat", response_model=ChatResponse)
-def chat(req: ChatRequest) -> ChatResponse:
+def _normalize_model(model: str) -> str:
+    return model if model in (BASELINE_MODEL, VERSIONRAG_MODEL) else (BASELINE_MODEL if model.lower() == "baseline" else VERSIONRAG_MODEL)
+
+
+# ---- Chat concurrency limiter -------------------------------------------------
+# A chat holds a retrieval + LLM chain for several seconds. Beyond CHAT_MAX_CONCURRENCY
+# in-flight chats, a request waits at most CHAT_QUEUE_TIMEOUT seconds for a slot and is
+# then rejected with 429 + Retry-After instead of queueing without bound.
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "16"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "0.5"))
+CHAT_RETRY_AFTER = int(os.getenv("CHAT_RETRY_AFTER", "2"))
+_chat_slots = asyncio.Semaphore(CHAT_MAX_CONCURRENCY)
+
+
+async def _acquire_chat_slot() -> None:
     try:
-        comps = _get_components(req.model)
-        retriever = comps["retriever"]
-        generator = comps["generator"]
-
-        retrieved = retriever.retrieve(req.message)
-        response = generator.generate(retrieved, req.message)
-        answer_text = getattr(response, "answer", None)
-        if not isinstance(answer_text, str) or not answer_text.strip():
-            answer_text = str(response)
-        answer_text = _strip_answer_prefix(answer_text)
-
-        return ChatResponse(
-            model=req.model if req.model in (BASELINE_MODEL, VERSIONRAG_MODEL) else (BASELINE_MODEL if req.model.lower() == "baseline" else VERSIONRAG_MODEL),
-            answer=answer_text,
-            context=_retrieved_context_to_string(retrieved),
-            meta={},
+        await asyncio.wait_for(_chat_slots.acquire(), timeout=CHAT_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy answering other questions. Please retry shortly.",
+            headers={"Retry-After": str(CHAT_RETRY_AFTER)},
         )
-    except HTTPException:
+
+
+@asynccontextmanager
+async def _chat_slot() -> AsyncIterator[None]:
+    await _acquire_chat_slot()
+    try:
+        yield
+    finally:
+        _chat_slots.release()
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest) -> ChatResponse:
+    async with _chat_slot():
+        try:
+            # First use connects to Milvus/Neo4j; keep that off the event loop.
+            comps = await asyncio.to_thread(_get_components, req.model)
+            retriever = comps["retriever"]
+            generator = comps["generator"]
+            model = _normalize_model(req.model)
+
+            query_vector = None
+            epoch = get_index_epoch()
+            if CHAT_CACHE_ENABLED:
+                query_vector = await asyncio.to_thread(_embed_query, req.message)
+                cached, similarity = _answer_cache.get(model, epoch, req.message, query_vector)
+                if cached is not None:
+                    return cached.model_copy(update={"meta": {**cached.meta, "cache": "hit", "similarity": round(similarity, 4)}})
+
+            retrieved = await retriever.aretrieve(req.message)
+            response = await generator.agenerate(retrieved, req.message)
+            answer_text = getattr(response, "answer", None)
+            if not isinstance(answer_text, str) or not answer_text.strip():
+                answer_text = str(response)
+            answer_text = strip_answer_prefix(answer_text)
+
+            chat_response = ChatResponse(
+                model=model,
+                answer=answer_text,
+                context=_retrieved_context_to_string(retrieved),
+                meta={},
+            )
+            if query_vector is not None:
+                _answer_cache.put(model, epoch, req.message, query_vector, chat_response)
+            return chat_response
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Convert to a readable error and use 503 to signal "dependency/config not ready".
+            raise HTTPException(status_code=503, detail=_format_chat_exception(e))
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(req: ChatRequest) -> StreamingResponse:
+    """
+    Same as /api/chat, but streams the answer as Server-Sent Events:
+    - `meta`  : model + retrieved context, sent once retrieval is done
+    - `token` : {"text": ...} for every generated delta
+    - `done`  : final answer + meta (incl. time-to-first-token in ms)
+    - `error` : {"detail": ...} if anything fails after the stream has started
+
+    The chat slot is taken before the response starts (so an overloaded server answers 429)
+    and held until the stream ends.
+    """
+    await _acquire_chat_slot()
+    try:
+        # raises 400 for unknown models before streaming starts
+        comps = await asyncio.to_thread(_get_components, req.model)
+    except BaseException:
+        _chat_slots.release()
         raise
-    except Exception as e:
-        # Convert to a readable error and use 503 to signal "dependency/config not ready".
-        raise HTTPException(status_code=503, detail=_format_chat_exception(e))
+    retriever = comps["retriever"]
+    generator = comps["generator"]
+    model = _normalize_model(req.model)
+
+    async def events() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        try:
+            query_vector = None
+            epoch = get_index_epoch()
+            if CHAT_CACHE_ENABLED:
+                query_vector = await asyncio.to_thread(_embed_query, req.message)
+                cached, similarity = _answer_cache.get(model, epoch, req.message, query_vector)
+                if cached is not None:
+                    meta = {**cached.meta, "cache": "hit", "similarity": round(similarity, 4)}
+                    yield _sse("meta", {"model": model, "context": cached.context})
+                    yield _sse("token", {"text": cached.answer})
+                    yield _sse("done", {"answer": cached.answer, "meta": meta})
+                    return
+
+            retrieved = await retriever.aretrieve(req.message)
+            context = _retrieved_context_to_string(retrieved)
+            yield _sse("meta", {"model": model, "context": context})
+
+            parts: list[str] = []
+            ttft_ms = None
+            async for token in astrip_streamed_answer_prefix(generator.agenerate_stream(retrieved, req.message)):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000.0, 1)
+                parts.append(token)
+                yield _sse("token", {"text": token})
+
+            answer_text = "".join(parts).strip()
+            meta = {"ttft_ms": ttft_ms, "total_ms": round((time.perf_counter() - started) * 1000.0, 1)}
+            yield _sse("done", {"answer": answer_text, "meta": meta})
+
+            if query_vector is not None and answer_text:
+                _answer_cache.put(model, epoch, req.message, query_vector, ChatResponse(model=model, answer=answer_text, context=context, meta={}))
+        except Exception as e:
+            yield _sse("error", {"detail": _format_chat_exception(e)})
+        finally:
+            _chat_slots.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering (nginx/Railway) so tokens are flushed as they are produced.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/api/index", response_model=IndexStartResponse)
@@ -406,20 +721,44 @@ def start_index(req: IndexRequest) -> IndexStartResponse:
             "started_at": None,
             "finished_at": None,
             "error": None,
-            "logs": "",
         }
+        _job_streams[job_id] = _JobStream()
+        record = _job_record(_jobs[job_id])
+    _write_job_record(record)
 
     _start_thread(_run_index_job, job_id, model)
     return IndexStartResponse(job_id=job_id, model=_jobs[job_id]["model"], status=_jobs[job_id]["status"])
 
 
-@app.get("/api/index/{job_id}", response_model=JobStatusResponse)
-def index_status(job_id: str) -> JobStatusResponse:
+@app.post("/api/index/{job_id}/resume", response_model=IndexStartResponse)
+def resume_index(job_id: str) -> IndexStartResponse:
+    """
+    Run an interrupted or failed index job again. Stage checkpoints and already indexed files
+    are reused, so it continues where the previous run stopped.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="job_id not found")
+        if job["status"] not in ("interrupted", "error"):
+            raise HTTPException(status_code=409, detail=f"job is {job['status']}; only interrupted or failed jobs can be resumed")
+        job["status"] = "queued"
+        job["error"] = None
+        job["finished_at"] = None
+        _job_streams[job_id].write_log("\n--- resumed ---\n")
+        model = job["model"]
+        record = _job_record(job)
+    _write_job_record(record)
+
+    _start_thread(_run_index_job, job_id, model)
+    return IndexStartResponse(job_id=job_id, model=model, status="queued")
+
+
+def _job_status(job_id: str, logs_tail_chars: int = 4000) -> JobStatusResponse:
     with _jobs_lock:
         job = _jobs.get(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="job_id not found")
-        logs = job.get("logs", "")
 
         return JobStatusResponse(
             job_id=job["job_id"],
@@ -429,10 +768,76 @@ def index_status(job_id: str) -> JobStatusResponse:
             started_at=job["started_at"],
             finished_at=job["finished_at"],
             error=job["error"],
-            logs_tail=logs[-4000:],
+            logs_tail=_job_streams[job_id].logs_tail(logs_tail_chars) if logs_tail_chars else "",
+            stages=dict(job.get("stages") or {}),
+            stage=job.get("stage"),
         )
 
 
+@app.get("/api/index/{job_id}", response_model=JobStatusResponse)
+def index_status(job_id: str) -> JobStatusResponse:
+    return _job_status(job_id)
+
+
+# without changes, a comment line is sent this often so proxies keep the connection open
+_INDEX_EVENTS_KEEPALIVE_SECONDS = 15.0
+_INDEX_EVENTS_LOG_TAIL_CHARS = 4000
+
+
+@app.get("/api/index/{job_id}/events")
+async def index_events(job_id: str, request: Request, after: int = 0) -> StreamingResponse:
+    """
+    Stream an index job as Server-Sent Events until it finishes:
+    - `progress` : an indexer progress event (see util.progress.ProgressEvent), with its id
+    - `log`      : {"text": ..., "reset": bool} log output; the first one carries the recent tail
+                   (reset=true), later ones only what was written since
+    - `status`   : the payload of GET /api/index/{job_id} without logs_tail, whenever it changed
+
+    The handler sleeps until the job writes logs, emits an event or changes status.
+    A reconnecting client continues after its Last-Event-ID (or `?after=`); events older than
+    the job's ring buffer are gone, but the next `status` carries the current totals.
+    """
+    _job_status(job_id, logs_tail_chars=0)  # 404 before streaming starts
+    stream = _job_streams[job_id]
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+
+    async def events() -> AsyncIterator[str]:
+        waiter = stream.add_waiter()
+        try:
+            event_id = after
+            last_status = None
+            log_text, log_offset = stream.logs_after(0, max_chars=_INDEX_EVENTS_LOG_TAIL_CHARS)
+            yield _sse("log", {"text": log_text, "reset": True})
+            while True:
+                # status before the events: a job that is finished has emitted all of them
+                status = jsonable_encoder(_job_status(job_id, logs_tail_chars=0), exclude={"logs_tail"})
+                for event in stream.events_after(event_id):
+                    event_id = event["id"]
+                    yield _sse("progress", event, event_id=event_id)
+                log_text, log_offset = stream.logs_after(log_offset)
+                if log_text:
+                    yield _sse("log", {"text": log_text, "reset": False})
+                if status != last_status:
+                    last_status = status
+                    yield _sse("status", status)
+                if status["status"] in ("done", "error", "interrupted"):
+                    return
+                if await request.is_disconnected():
+                    return
+                if not await waiter.wait(_INDEX_EVENTS_KEEPALIVE_SECONDS):
+                    yield ": keepalive\n\n"
+        finally:
+            stream.remove_waiter(waiter)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ---- Run local --------------------------------------------------------------
 if __name__ == "__main__":
     import uvicorn
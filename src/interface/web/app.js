@@ -20,6 +20,7 @@ let _composerOriginalNextSibling = null;
 const indexBaselineBtn = document.getElementById("indexBaselineBtn");
 const indexVersionBtn = document.getElementById("indexVersionBtn");
 const indexStatusEl = document.getElementById("indexStatus");
+const indexResumeBtn = document.getElementById("indexResumeBtn");
 const indexLogsEl = document.getElementById("indexLogs");
 const indexLogsWrapEl = document.getElementById("indexLogsWrap");
 const indexProgressWrapEl = document.getElementById("indexProgressWrap");
@@ -28,8 +29,10 @@ const copyrightYearEl = document.getElementById("copyrightYear");
 const themeToggleEl = document.getElementById("themeToggle");
 const brandLogoEl = document.getElementById("brandLogo");
 
-let indexPollTimer = null;
+let indexEvents = null; // EventSource of the followed index job
+let indexActivity = ""; // latest file-level progress event, as text
 let activeIndexJobId = null;
+const INDEX_JOB_KEY = "versionrag.activeIndexJobId"; // survives reloads, so a job can be followed or resumed
 
 function scrollToBottom() {
   chatEl.scrollTop = chatEl.scrollHeight;
@@ -189,24 +192,52 @@ if (clearBtn) {
   });
 }
 
-async function apiChat(model, message) {
-  const res = await fetch("/api/chat", {
+// Streams /api/chat/stream (Server-Sent Events over a POST response).
+// `handlers.onMeta/onToken/onDone` are called as events arrive.
+async function apiChatStream(model, message, handlers) {
+  const res = await fetch("/api/chat/stream", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ model, message }),
   });
-  if (!res.ok) {
-    // Prefer FastAPI's JSON error shape: { detail: "..." }
+  if (!res.ok || !res.body) {
+    const t = await res.text();
+    let detail = t;
     try {
-      const j = await res.json();
-      const detail = j && (j.detail || j.message);
-      throw new Error(detail || JSON.stringify(j));
-    } catch (_) {
-      const t = await res.text();
-      throw new Error(t || `HTTP ${res.status}`);
+      const j = JSON.parse(t);
+      detail = (j && (j.detail || j.message)) || t;
+    } catch (_) {}
+    throw new Error(detail || `HTTP ${res.status}`);
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line; keep the trailing partial event in the buffer.
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === "meta" && handlers.onMeta) handlers.onMeta(payload);
+      else if (event === "token" && handlers.onToken) handlers.onToken(payload.text || "");
+      else if (event === "done" && handlers.onDone) handlers.onDone(payload);
+      else if (event === "error") throw new Error(payload.detail || "Streaming failed");
     }
   }
-  return await res.json();
 }
 
 function stripAnswerPrefix(text) {
@@ -234,11 +265,25 @@ chatForm.addEventListener("submit", async (e) => {
   setBusy(true);
   const typing = addTypingDots();
 
+  let context = "";
+  let streamed = "";
   try {
-    const data = await apiChat(model, msg);
-    // Replace typing dots with final answer (no "Answer:" prefix)
-    typing.content.textContent = stripAnswerPrefix((data.answer || "").trim()) || "(no answer)";
-    const metaText = data.context ? `Context (debug):\n${data.context}` : "";
+    await apiChatStream(model, msg, {
+      onMeta: (meta) => {
+        context = meta.context || "";
+      },
+      onToken: (text) => {
+        // First token replaces the typing dots; later tokens are appended as they arrive.
+        streamed += text;
+        typing.content.textContent = stripAnswerPrefix(streamed);
+        scrollToBottom();
+      },
+      onDone: (data) => {
+        // Replace streamed text with final answer (no "Answer:" prefix)
+        typing.content.textContent = stripAnswerPrefix((data.answer || streamed).trim()) || "(no answer)";
+      },
+    });
+    const metaText = context ? `Context (debug):\n${context}` : "";
     if (metaText) {
       const details = el("details", "assistant-meta");
       const summary = el("summary", "assistant-meta-summary", "Context (debug)");
@@ -280,6 +325,15 @@ async function apiStartIndex(model) {
   return await res.json();
 }
 
+async function apiResumeIndex(jobId) {
+  const res = await fetch(`/api/index/${jobId}/resume`, { method: "POST" });
+  if (!res.ok) {
+    const t = await res.text();
+    throw new Error(t || `HTTP ${res.status}`);
+  }
+  return await res.json();
+}
+
 async function apiIndexStatus(jobId) {
   const res = await fetch(`/api/index/${jobId}`);
   if (!res.ok) {
@@ -292,6 +346,17 @@ async function apiIndexStatus(jobId) {
 function setIndexBusy(isBusy) {
   indexBaselineBtn.disabled = isBusy;
   indexVersionBtn.disabled = isBusy;
+  if (indexResumeBtn) indexResumeBtn.disabled = isBusy;
+}
+
+function setActiveIndexJob(jobId) {
+  activeIndexJobId = jobId;
+  if (jobId) localStorage.setItem(INDEX_JOB_KEY, jobId);
+  else localStorage.removeItem(INDEX_JOB_KEY);
+}
+
+function showIndexResume(show) {
+  if (indexResumeBtn) indexResumeBtn.classList.toggle("hidden", !show);
 }
 
 function showIndexUI({ running }) {
@@ -319,40 +384,92 @@ function showFinalIndexStatus(text, ok) {
   }
 }
 
-function stopPolling() {
-  if (indexPollTimer) {
-    clearInterval(indexPollTimer);
-    indexPollTimer = null;
+const INDEX_STAGE_LABELS = {
+  attributes: "ekstraksi atribut",
+  clustering: "clustering dokumentasi",
+  graph: "membangun graph",
+  changes: "ekstraksi perubahan",
+  content: "indexing konten",
+};
+
+function showIndexProgress(st) {
+  if (!indexProgressFillEl) return;
+  // Stay indeterminate until the first file has started; the percentage is file-based.
+  if (st.progress > 0) {
+    indexProgressFillEl.classList.remove("indeterminate");
+    indexProgressFillEl.style.transform = "";
+    indexProgressFillEl.style.width = `${st.progress}%`;
   }
+  const stage = st.stage ? INDEX_STAGE_LABELS[st.stage] || st.stage : "";
+  const stages = st.stages || {};
+  const pipeline = Object.keys(stages).length
+    ? `parsed ${stages.parsed || 0}, embedded ${stages.embedded || 0}, written ${stages.written || 0}`
+    : "";
+  indexProgressFillEl.title = [stage, pipeline, indexActivity, `${st.progress || 0}%`].filter(Boolean).join(" · ");
 }
 
-function startPolling(jobId) {
-  stopPolling();
-  indexPollTimer = setInterval(async () => {
-    try {
-      const st = await apiIndexStatus(jobId);
-      if (indexLogsEl) indexLogsEl.textContent = st.logs_tail || "";
+function stopIndexEvents() {
+  if (indexEvents) {
+    indexEvents.close();
+    indexEvents = null;
+  }
+}
 
-      if (indexProgressFillEl && indexProgressWrapEl && !indexProgressWrapEl.classList.contains("hidden")) {
-        // indeterminate bar; no percentage
-        indexProgressFillEl.classList.add("indeterminate");
-      }
+const INDEX_LOG_MAX_CHARS = 20000;
 
-      if (st.status === "done") {
-        showFinalIndexStatus("Indexing selesai ✅", true);
-        setIndexBusy(false);
-        stopPolling();
-      } else if (st.status === "error") {
-        showFinalIndexStatus(`Indexing gagal ❌ ${st.error || ""}`, false);
-        setIndexBusy(false);
-        stopPolling();
-      }
-    } catch (e) {
-      showFinalIndexStatus(`Error polling: ${e.message || e}`, false);
+function appendIndexLog(text, reset) {
+  if (!indexLogsEl) return;
+  const logs = (reset ? "" : indexLogsEl.textContent) + text;
+  indexLogsEl.textContent = logs.length > INDEX_LOG_MAX_CHARS ? logs.slice(-INDEX_LOG_MAX_CHARS) : logs;
+}
+
+// Follow a job over Server-Sent Events: `status` carries the progress, `log` new log output and
+// `progress` the individual indexer events. EventSource reconnects on its own and continues after
+// the last event id.
+function followIndexJob(jobId) {
+  stopIndexEvents();
+  indexActivity = "";
+  const source = new EventSource(`/api/index/${jobId}/events`);
+  indexEvents = source;
+
+  source.addEventListener("progress", (ev) => {
+    const event = JSON.parse(ev.data);
+    if (event.type === "file_started") indexActivity = `memproses ${event.file}`;
+    else if (event.type === "file_done") indexActivity = `${event.file}: ${event.count} chunk`;
+    else if (event.type === "changes_extracted") indexActivity = `${event.file}: ${event.count} perubahan`;
+  });
+
+  source.addEventListener("log", (ev) => {
+    const log = JSON.parse(ev.data);
+    appendIndexLog(log.text || "", log.reset);
+  });
+
+  source.addEventListener("status", (ev) => {
+    const st = JSON.parse(ev.data);
+
+    if (st.status === "done") {
+      stopIndexEvents();
+      showFinalIndexStatus("Indexing selesai ✅", true);
       setIndexBusy(false);
-      stopPolling();
+      showIndexResume(false);
+      setActiveIndexJob(null);
+    } else if (st.status === "error" || st.status === "interrupted") {
+      stopIndexEvents();
+      showFinalIndexStatus(`Indexing gagal ❌ ${st.error || ""}`, false);
+      setIndexBusy(false);
+      showIndexResume(true);
+    } else {
+      showIndexProgress(st);
     }
-  }, 1200);
+  });
+
+  source.onerror = () => {
+    // CONNECTING: the browser retries by itself; CLOSED: it gave up (e.g. job no longer exists)
+    if (source.readyState !== EventSource.CLOSED || indexEvents !== source) return;
+    indexEvents = null;
+    showFinalIndexStatus("Koneksi ke status indexing terputus ❌", false);
+    setIndexBusy(false);
+  };
 }
 
 async function runIndex(model) {
@@ -360,18 +477,60 @@ async function runIndex(model) {
   showIndexUI({ running: true });
   if (indexLogsEl) indexLogsEl.textContent = "";
   if (indexLogsWrapEl) indexLogsWrapEl.open = false; // start hidden
+  showIndexResume(false);
   try {
     const start = await apiStartIndex(model);
-    activeIndexJobId = start.job_id;
-    startPolling(start.job_id);
+    setActiveIndexJob(start.job_id);
+    followIndexJob(start.job_id);
   } catch (e) {
     showFinalIndexStatus(`Gagal mulai indexing ❌ ${e.message || e}`, false);
     setIndexBusy(false);
   }
 }
 
+async function resumeIndex() {
+  if (!activeIndexJobId) return;
+  setIndexBusy(true);
+  showIndexUI({ running: true });
+  showIndexResume(false);
+  try {
+    await apiResumeIndex(activeIndexJobId);
+    followIndexJob(activeIndexJobId);
+  } catch (e) {
+    showFinalIndexStatus(`Gagal melanjutkan indexing ❌ ${e.message || e}`, false);
+    setIndexBusy(false);
+    showIndexResume(true);
+  }
+}
+
+// Pick up the last index job after a page reload or a server restart.
+async function restoreIndexJob() {
+  const jobId = localStorage.getItem(INDEX_JOB_KEY);
+  if (!jobId) return;
+  try {
+    const st = await apiIndexStatus(jobId);
+    activeIndexJobId = jobId;
+    if (st.status === "queued" || st.status === "running") {
+      setIndexBusy(true);
+      showIndexUI({ running: true });
+      followIndexJob(jobId);
+    } else if (st.status === "error" || st.status === "interrupted") {
+      if (indexLogsEl) indexLogsEl.textContent = st.logs_tail || "";
+      showFinalIndexStatus(`Indexing terhenti ❌ ${st.error || ""}`, false);
+      showIndexResume(true);
+    } else {
+      setActiveIndexJob(null);
+    }
+  } catch (e) {
+    // job record gone (e.g. cleaned up): nothing to restore
+    setActiveIndexJob(null);
+  }
+}
+
 indexBaselineBtn.addEventListener("click", () => runIndex("Baseline"));
 indexVersionBtn.addEventListener("click", () => runIndex("VersionRAG"));
+if (indexResumeBtn) indexResumeBtn.addEventListener("click", resumeIndex);
+restoreIndexJob();
 
 // initial UI
 setActiveModelLabel();
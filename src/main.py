@@ -10,6 +10,7 @@ from generation.baseline.baseline_generator import BaselineGenerator
 from generation.versionrag.versionrag_generator import VersionRAGGenerator
 # from evaluation.evaluation import evaluate
 # from evaluation.evaluation_llm import judge_csv_file
+from util.answer_text import strip_streamed_answer_prefix
 from util.constants import AVAILABLE_MODELS, BASELINE_MODEL, VERSIONRAG_MODEL
 #  util.constants import AVAILABLE_MODELS, BASELINE_MODEL, KG_MODEL, VERSIONRAG_MODEL
 
@@ -105,8 +106,11 @@ def run_console_mode():
                 print("Exiting the question loop. Goodbye!")
                 break
             retrieved_data = retriever.retrieve(query)  # First retrieve relevant data
-            response = generator.generate(retrieved_data, query)  # Generate response
-            print(response)
+            # Stream the response so the answer shows up token by token
+            print("Answer: ", end="", flush=True)
+            for token in strip_streamed_answer_prefix(generator.generate_stream(retrieved_data, query)):
+                print(token, end="", flush=True)
+            print()
     elif mode == "Evaluation":
         # Default input file
         default_input_file = "evaluation_set.csv"
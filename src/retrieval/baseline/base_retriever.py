@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 class BaseRetriever:
@@ -12,20 +13,31 @@ class BaseRetriever:
             A RetrievedData object containing the chunks and source files.
         """
         raise NotImplementedError("Subclasses must implement this method.")
+
+    async def aretrieve(self, query: str):
+        """
+        Async variant of retrieve. Subclasses with async clients override this;
+        the default runs retrieve in a worker thread.
+        """
+        return await asyncio.to_thread(self.retrieve, query)
     
 class RetrievedData:
-    def __init__(self, chunks, page_nrs=None, source_files=None, versions=None):
+    def __init__(self, chunks, page_nrs=None, source_files=None, versions=None, scores=None, also_in=None):
         """
         Represents the data retrieved by the retriever.
 
         Args:
             chunks (list of str): The retrieved data chunks.
             source_files (list of str): The corresponding source filenames.
+            scores (list of float): Retrieval similarity per chunk (higher is better), if known.
+            also_in (list of list of str): Other sources whose near-duplicate chunks were folded into each chunk.
         """
         self.chunks = chunks
         self.page_nrs = page_nrs
         self.source_files = source_files
         self.versions = versions
+        self.scores = scores
+        self.also_in = also_in
     
     def source_files_with_page_nr(self):
         """
@@ -50,11 +62,18 @@ class RetrievedData:
         if self.page_nrs is None or self.source_files is None:
             return self.chunks
     
-        for chunk, page_nr, source_file, version in zip(self.chunks, self.page_nrs, self.source_files, self.versions or [None]*len(self.chunks)):
-            # Extract the filename from the absolute path
-            filename = os.path.basename(source_file)
-            result_str = f"Source File: {filename} (Page {page_nr})\nChunk: {chunk}\n"
-            if version:
-                result_str += f"Version: {version}\n"
-            result.append(result_str)
-        return "\n".join(result)
\ No newline at end of file
+        for i in range(len(self.chunks)):
+            result.append(self.entry_to_string(i))
+        return "\n".join(result)
+
+    def entry_to_string(self, i):
+        """Returns the string representation of the i-th retrieved chunk."""
+        # Extract the filename from the absolute path
+        filename = os.path.basename(self.source_files[i])
+        result_str = f"Source File: {filename} (Page {self.page_nrs[i]})\nChunk: {self.chunks[i]}\n"
+        version = self.versions[i] if self.versions else None
+        if version:
+            result_str += f"Version: {version}\n"
+        if self.also_in and self.also_in[i]:
+            result_str += f"Also in: {', '.join(self.also_in[i])}\n"
+        return result_str
\ No newline at end of file
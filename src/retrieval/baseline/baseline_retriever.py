@@ -1,9 +1,11 @@
+import asyncio
 from retrieval.baseline.base_retriever import BaseRetriever, RetrievedData
+from retrieval.baseline.near_duplicates import group_near_duplicates, group_versions, other_sources
 # from pymilvus import MilvusClient
 # from util.constants import MILVUS_URI, MILVUS_COLLECTION_NAME_BASELINE, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_BASELINE_SOURCE_COUNT
-from util.constants import MILVUS_COLLECTION_NAME_BASELINE, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_BASELINE_SOURCE_COUNT
+from util.constants import MILVUS_COLLECTION_NAME_BASELINE, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_VERSIONS, MILVUS_META_ATTRIBUTE_SIMHASH, MILVUS_BASELINE_SOURCE_COUNT
 from util.embedding_client import get_embedding_client
-from util.milvus_client_factory import get_milvus_client
+from util.milvus_client_factory import get_async_milvus_client, get_milvus_client, is_milvus_lite_uri
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -11,6 +13,7 @@ class BaselineRetriever(BaseRetriever):
     def __init__(self):
         self.embedding_fn = get_embedding_client()
         self.client = None
+        self.aclient = None
         super().__init__()
 
     def retrieve(self, query):
@@ -29,16 +32,42 @@ class BaselineRetriever(BaseRetriever):
         
         query_vectors = self.embedding_fn.encode_queries([query])
 
-        res = self.client.search(
+        res = self.client.search(**self._search_kwargs(query_vectors))
+        return self._to_retrieved_data(res[0])
+
+    async def aretrieve(self, query):
+        # Milvus Lite (local db file) is not supported by the async client.
+        if is_milvus_lite_uri():
+            return await super().aretrieve(query)
+        if self.aclient is None:
+            self.aclient = get_async_milvus_client()
+
+        if not await self.aclient.has_collection(collection_name=MILVUS_COLLECTION_NAME_BASELINE):
+            return RetrievedData("no data indexed")
+
+        # Embedding is CPU-bound (local model) or a sync HTTP call; keep it off the event loop.
+        query_vectors = await asyncio.to_thread(self.embedding_fn.encode_queries, [query])
+
+        res = await self.aclient.search(**self._search_kwargs(query_vectors))
+        return self._to_retrieved_data(res[0])
+
+    def _search_kwargs(self, query_vectors):
+        return dict(
             collection_name=MILVUS_COLLECTION_NAME_BASELINE,  # target collection
             data=query_vectors,  # query vectors
             limit=MILVUS_BASELINE_SOURCE_COUNT,  # number of returned entities
-            output_fields=[MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE],  # specifies fields to be returned
+            output_fields=[MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_VERSIONS, MILVUS_META_ATTRIBUTE_SIMHASH],  # specifies fields to be returned
         )
 
-        results = res[0]
+    def _to_retrieved_data(self, results):
+        # Near-identical paragraphs (typically the same text in several versions) become one chunk
+        groups = group_near_duplicates(results)
+        results = [group[0] for group in groups]
         chunks = [hit["entity"][MILVUS_META_ATTRIBUTE_TEXT] for hit in results]
         page_nrs = [hit["entity"][MILVUS_META_ATTRIBUTE_PAGE] for hit in results]
         source_files = [hit["entity"][MILVUS_META_ATTRIBUTE_FILE] for hit in results]
+        versions = [group_versions(group) for group in groups]
+        scores = [hit.get("distance") for hit in results]
+        also_in = [other_sources(group) for group in groups]
         
-        return RetrievedData(chunks, page_nrs, source_files)
\ No newline at end of file
+        return RetrievedData(chunks, page_nrs, source_files, versions, scores, also_in)
\ No newline at end of file
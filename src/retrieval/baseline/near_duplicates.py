@@ -0,0 +1,85 @@
+import os
+import re
+
+from util.constants import MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_VERSIONS, MILVUS_META_ATTRIBUTE_SIMHASH
+from util.simhash import hamming_distance, simhash
+
+
+_NUMBER = re.compile(r"\d+")
+
+
+def _numbers(hit) -> list:
+    return _NUMBER.findall(hit["entity"].get(MILVUS_META_ATTRIBUTE_TEXT) or "")
+
+
+def hit_versions(entity) -> list:
+    """
+    Versions a stored chunk applies to: the "|v1|v2|" list of deduplicated chunks, else its single version.
+    """
+    versions = entity.get(MILVUS_META_ATTRIBUTE_VERSIONS)
+    if versions and len(versions) >= 2:
+        return versions[1:-1].split("|")
+    version = entity.get(MILVUS_META_ATTRIBUTE_VERSION)
+    return [version] if version else []
+
+
+def _signature(hit) -> int:
+    stored = hit["entity"].get(MILVUS_META_ATTRIBUTE_SIMHASH)
+    if stored:
+        return int(stored, 16)
+    # Chunks indexed before signatures were stored
+    return simhash(hit["entity"].get(MILVUS_META_ATTRIBUTE_TEXT) or "")
+
+
+def group_near_duplicates(hits, max_distance=None):
+    """
+    Group search hits (best first) whose chunk SimHash lies within `max_distance` bits of a
+    group's first hit. Consecutive document versions repeat most paragraphs, so one group is
+    usually the same paragraph across versions. Groups keep the order of their best hit.
+    Hits whose numbers differ (dates, years, credits) are never grouped: in a calendar that
+    difference is the answer. A negative distance (RETRIEVAL_DEDUP_MAX_DISTANCE=-1) disables grouping.
+    """
+    if max_distance is None:
+        max_distance = int(os.getenv("RETRIEVAL_DEDUP_MAX_DISTANCE", "3"))
+    if max_distance < 0:
+        return [[hit] for hit in hits]
+
+    groups = []
+    signatures = []
+    for hit in hits:
+        signature = _signature(hit)
+        for group, group_signature in zip(groups, signatures):
+            if hamming_distance(signature, group_signature) <= max_distance and _numbers(hit) == _numbers(group[0]):
+                group.append(hit)
+                break
+        else:
+            groups.append([hit])
+            signatures.append(signature)
+    return groups
+
+
+def group_versions(group):
+    """
+    Every distinct version a group of hits applies to, e.g. "2024-2025, 2025-2026".
+    """
+    versions = []
+    for hit in group:
+        for version in hit_versions(hit["entity"]):
+            if version and version not in versions:
+                versions.append(version)
+    return ", ".join(versions) if versions else None
+
+
+def other_sources(group):
+    """
+    "'file' (Page n)" for the hits folded into the group's first hit.
+    """
+    first = group[0]["entity"]
+    seen = {(first.get(MILVUS_META_ATTRIBUTE_FILE), first.get(MILVUS_META_ATTRIBUTE_PAGE))}
+    sources = []
+    for hit in group[1:]:
+        key = (hit["entity"].get(MILVUS_META_ATTRIBUTE_FILE), hit["entity"].get(MILVUS_META_ATTRIBUTE_PAGE))
+        if key not in seen:
+            seen.add(key)
+            sources.append(f"'{os.path.basename(key[0] or '')}' (Page {key[1]})")
+    return sources
@@ -1,14 +1,72 @@
+import asyncio
+import os
 from retrieval.baseline.base_retriever import BaseRetriever
-from retrieval.versionrag.versionrag_retriever_db import VersionRAGRetrieverDatabase
+from retrieval.versionrag.versionrag_retriever_cache import RetrievalCache
+from retrieval.versionrag.versionrag_retriever_db import VersionRAGRetrieverDatabase, RetrievalType
 from retrieval.versionrag.versionrag_retriever_parser import VersionRAGRetrieverParser
+from util.index_epoch import get_index_epoch
 
 class VersionRAGRetriever(BaseRetriever):
     def __init__(self):
         self.database = VersionRAGRetrieverDatabase()
         self.parser = VersionRAGRetrieverParser(self.database)
+        self.cache = RetrievalCache()
+        self.speculative_search = os.getenv("VERSIONRAG_SPECULATIVE_SEARCH", "1").strip().lower() not in ("0", "false", "no")
         super().__init__()
         
     def retrieve(self, query: str):
-        retrieval_param = self.parser.parse_retrieval_mode(query=query)
-        retrieval = self.database.retrieve(params=retrieval_param)
-        return retrieval
\ No newline at end of file
+        # read before anything touches the index, so a result racing a re-index is not cached
+        epoch = get_index_epoch()
+        speculative = None
+        try:
+            retrieval_param = self.parser.fast_path(query)
+            if retrieval_param is None:
+                # Start embedding + unfiltered content search while the LLM parser is running;
+                # the result is reused (or narrowed in memory) if the parse ends up as ContentRetrieval.
+                speculative = self.database.start_speculative_search(query) if self.speculative_search else None
+                retrieval_param = self.parser.parse_with_llm(query)
+            if not self.cache.enabled:
+                return self.database.retrieve(params=retrieval_param, speculative=speculative)
+
+            query_vector = None
+            if retrieval_param.retrieval_type != RetrievalType.VersionRetrieval and retrieval_param.params.get("query"):
+                query_vector = self.database.encode_query(retrieval_param.params["query"])
+            cache_key = self.cache.make_key(retrieval_param, query_vector)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            retrieval = self.database.retrieve(params=retrieval_param, speculative=speculative)
+            self.cache.put(cache_key, retrieval, epoch)
+            return retrieval
+        finally:
+            # Unused speculative searches (non-content parses, cache hits) are not left running.
+            if speculative is not None and not speculative.future.done():
+                speculative.future.cancel()
+
+    async def aretrieve(self, query: str):
+        epoch = get_index_epoch()
+        speculative = None
+        try:
+            retrieval_param = await asyncio.to_thread(self.parser.fast_path, query)
+            if retrieval_param is None:
+                speculative = self.database.start_async_speculative_search(query) if self.speculative_search else None
+                retrieval_param = await self.parser.aparse_with_llm(query)
+            if not self.cache.enabled:
+                return await self.database.aretrieve(params=retrieval_param, speculative=speculative)
+
+            query_vector = None
+            if retrieval_param.retrieval_type != RetrievalType.VersionRetrieval and retrieval_param.params.get("query"):
+                query_vector = await self.database.aencode_query(retrieval_param.params["query"])
+            cache_key = self.cache.make_key(retrieval_param, query_vector)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            retrieval = await self.database.aretrieve(params=retrieval_param, speculative=speculative)
+            self.cache.put(cache_key, retrieval, epoch)
+            return retrieval
+        finally:
+            # Unused speculative searches (non-content parses, cache hits) are not left running.
+            if speculative is not None and not speculative.future.done():
+                speculative.future.cancel()
@@ -0,0 +1,71 @@
+import hashlib
+import os
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+from retrieval.versionrag.versionrag_retriever_db import RetrievalParam
+from util.index_epoch import get_index_epoch
+
+
+class RetrievalCache:
+    """
+    LRU cache of RetrievedData keyed by (retrieval type, normalized params, query-vector hash).
+    Entries are tied to the index epoch: as soon as an indexer bumps the epoch,
+    the whole cache is dropped so a re-index never serves stale data.
+    Callers read `get_index_epoch()` before retrieving and pass it to `put`.
+    """
+
+    def __init__(self, max_entries=None):
+        if max_entries is None:
+            max_entries = int(os.getenv("VERSIONRAG_RETRIEVAL_CACHE_SIZE", "256"))
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._epoch = get_index_epoch()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def make_key(self, params: RetrievalParam, query_vector=None) -> tuple:
+        normalized = tuple(sorted(
+            (str(k), str(v).strip().lower())
+            for k, v in (params.params or {}).items()
+            if k != "query" and v not in (None, "")
+        ))
+        vector_hash = None
+        if query_vector is not None:
+            vector_hash = hashlib.sha1(np.asarray(query_vector, dtype=np.float32).tobytes()).hexdigest()
+        return (params.retrieval_type.name, normalized, vector_hash)
+
+    def _sync_epoch(self):
+        epoch = get_index_epoch()
+        if epoch != self._epoch:
+            self._entries.clear()
+            self._epoch = epoch
+
+    def get(self, key):
+        with self._lock:
+            self._sync_epoch()
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, epoch):
+        """
+        Store `value`, computed against the index as of `epoch` (read before the retrieval ran).
+        A value computed while a re-index bumped the epoch is dropped instead of being cached
+        under the new epoch.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._sync_epoch()
+            if epoch != self._epoch:
+                return
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,182 @@
+from threading import Lock
+
+from util.index_epoch import get_index_epoch
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the graph catalog: categories, documentations (with description
+    and category) and ordered versions per documentation, plus the prompt fragments
+    rendered from them.
+    """
+
+    def __init__(self, categories: list, documentations: list, versions: list):
+        self.categories = categories
+        self.documentations = documentations
+        self.versions = versions  # [{category, documentation, version}] in version order
+
+        self.categories_prompt = self._render_categories(categories)
+        self.documentations_prompt = self._render_documentations(documentations)
+        self._documentations_prompt_by_category = {}
+        for doc in documentations:
+            self._documentations_prompt_by_category.setdefault(doc["category"], []).append(doc)
+        self._documentations_prompt_by_category = {
+            category: self._render_documentations(docs)
+            for category, docs in self._documentations_prompt_by_category.items()
+        }
+
+    @staticmethod
+    def _render_categories(categories: list) -> str:
+        return "\n".join(
+            f"{i}. Category Name: {cat['name']}\n"
+            for i, cat in enumerate(categories)
+        )
+
+    @staticmethod
+    def _render_documentations(documentations: list) -> str:
+        return "\n".join(
+            f"{i}. Documentation Name: {doc['name']}\n{i}. Documentation description: {doc['description']}\n{i}. Documentation category: {doc['category']}\n"
+            for i, doc in enumerate(documentations)
+        )
+
+    def pruned_prompts(self, documentation_indices) -> tuple:
+        """
+        Render (categories_prompt, documentations_prompt) restricted to the given documentations
+        and their categories. Entries keep the catalog order, not the relevance order, so the
+        same candidate set always renders to the same (cacheable) prompt prefix.
+        """
+        selected = sorted(set(documentation_indices))
+        documentations = [self.documentations[i] for i in selected]
+        category_names = {doc["category"] for doc in documentations}
+        categories = [cat for cat in self.categories if cat["name"] in category_names]
+        return self._render_categories(categories), self._render_documentations(documentations)
+
+    def id_prompt(self, documentation_indices=None) -> str:
+        """
+        Compact catalog listing with numeric IDs (the indices into categories, documentations and
+        versions) for the fused parser. Optionally restricted to the given documentations.
+        """
+        if documentation_indices is None:
+            selected = list(range(len(self.documentations)))
+        else:
+            selected = sorted(set(documentation_indices))
+        documentations = {i: self.documentations[i] for i in selected}
+        category_names = {doc["category"] for doc in documentations.values()}
+        pairs = {(doc["category"], doc["name"]) for doc in documentations.values()}
+
+        lines = ["Categories:"]
+        lines += [f"[{i}] {cat['name']}" for i, cat in enumerate(self.categories) if cat["name"] in category_names]
+        lines.append("Documentations:")
+        category_ids = {cat["name"]: i for i, cat in enumerate(self.categories)}
+        lines += [f"[{i}] {doc['name']} (category {category_ids.get(doc['category'])}): {doc['description']}" for i, doc in documentations.items()]
+        lines.append("Versions:")
+        documentation_ids = {(doc["category"], doc["name"]): i for i, doc in documentations.items()}
+        lines += [f"[{i}] documentation {documentation_ids[(v['category'], v['documentation'])]}: {v['version']}"
+                  for i, v in enumerate(self.versions) if (v["category"], v["documentation"]) in pairs]
+        return "\n".join(lines)
+
+    def documentations_prompt_for(self, category_name=None) -> str:
+        if not category_name:
+            return self.documentations_prompt
+        return self._documentations_prompt_by_category.get(category_name, "")
+
+    def versions_for(self, category_name, documentation_name=None) -> list:
+        return [
+            entry for entry in self.versions
+            if entry["category"] == category_name
+            and (not documentation_name or entry["documentation"] == documentation_name)
+        ]
+
+    def versions_prompt(self, category_name, documentation_name=None) -> str:
+        versions = self.versions_for(category_name, documentation_name)
+        if not versions:
+            return "No versions found for given parameters."
+        return "\n".join(f"{i}. Documentation: {entry['documentation']}\n   Version: {entry['version']}" for i, entry in enumerate(versions, 1))
+
+
+class GraphCatalog:
+    """
+    Loads the catalog from Neo4j once and serves it from memory until the index epoch
+    changes, so a chat request does not need any graph round-trip to build prompts.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._lock = Lock()
+        self._snapshot = None
+        self._epoch = None
+
+    def snapshot(self) -> CatalogSnapshot:
+        epoch = get_index_epoch()
+        with self._lock:
+            if self._snapshot is None or epoch != self._epoch:
+                self._snapshot = self._load()
+                self._epoch = epoch
+            return self._snapshot
+
+    def refresh(self) -> CatalogSnapshot:
+        with self._lock:
+            self._snapshot = None
+        return self.snapshot()
+
+    def _load(self) -> CatalogSnapshot:
+        with self.graph.session() as session:
+            categories = [record.data() for record in session.run("""
+                MATCH (c:Category)
+                RETURN c.name AS name, c.description AS description
+                ORDER BY c.name
+                """)]
+            documentations = [record.data() for record in session.run("""
+                MATCH (d:Documentation)
+                OPTIONAL MATCH (c:Category)-[:CONTAINS]->(d)
+                RETURN d.name AS name, d.description AS description, c.name AS category
+                ORDER BY d.name, c.name
+                """)]
+            versions = [record.data() for record in session.run("""
+                MATCH (c:Category)-[:CONTAINS]->(d:Documentation)-[:HAS_VERSION]->(v:Version)
+                RETURN c.name AS category, d.name AS documentation, v.version AS version
+                ORDER BY c.name, d.name,
+                    CASE 
+                        // Priority 1: numeric versions
+                        WHEN v.version =~ '^\\d+(\\.\\d+)*$' THEN 1
+                        ELSE 2
+                    END,
+                    CASE 
+                        WHEN v.version =~ '^\\d+(\\.\\d+)*$' 
+                        THEN toFloat(replace(v.version, '\\.', ''))
+                        ELSE 0
+                    END,
+                    CASE 
+                        // Priority 2: year range versions (2016-2017, 2017-2018)
+                        WHEN v.version =~ '^\\d{4}\\-\\d{4}$' THEN 2
+                        ELSE 3
+                    END,
+                    CASE 
+                        WHEN v.version =~ '^\\d{4}\\-\\d{4}$' 
+                        THEN toInteger(substring(v.version, 0, 4))
+                        ELSE 0
+                    END,
+                    CASE 
+                        // Priority 3: single year versions
+                        WHEN v.version =~ '^\\d{4}$' THEN 3
+                        ELSE 4
+                    END,
+                    CASE 
+                        WHEN v.version =~ '^\\d{4}$' 
+                        THEN toInteger(v.version)
+                        ELSE 0
+                    END,
+                    CASE 
+                        // Priority 4: date versions (dd-MM-yyyy)
+                        WHEN v.version =~ '^\\d{2}\\-\\d{2}\\-\\d{4}$' THEN 4
+                        ELSE 5
+                    END,
+                    CASE 
+                        WHEN v.version =~ '^\\d{2}\\-\\d{2}\\-\\d{4}$' 
+                        THEN date(substring(v.version, 6, 4) + "-" + substring(v.version, 3, 2) + "-" + substring(v.version, 0, 2)) 
+                        ELSE date('9999-12-31') 
+                    END,
+                    v.version
+                """)]
+        print(f"loaded graph catalog: {len(categories)} categories, {len(documentations)} documentations, {len(versions)} versions")
+        return CatalogSnapshot(categories=categories, documentations=documentations, versions=versions)
@@ -1,12 +1,20 @@
+from collections import OrderedDict
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from threading import Lock
+import os
 from util.graph_client import GraphClient
 from util.llm_client import LLMClient
 # from pymilvus import MilvusClient
 from retrieval.baseline.base_retriever import RetrievedData
+from retrieval.baseline.near_duplicates import group_near_duplicates, group_versions, hit_versions, other_sources
+from retrieval.versionrag.versionrag_retriever_catalog import GraphCatalog
+from retrieval.versionrag.versionrag_retriever_resolver import CatalogNameResolver
 # from util.constants import MILVUS_URI, MILVUS_COLLECTION_NAME_VERSIONRAG, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE
-from util.constants import MILVUS_COLLECTION_NAME_VERSIONRAG, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE
+from util.constants import MILVUS_COLLECTION_NAME_VERSIONRAG, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_VERSION, MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_SIMHASH, MILVUS_META_ATTRIBUTE_VERSIONS
 from util.embedding_client import get_embedding_client
-from util.milvus_client_factory import get_milvus_client
+from util.milvus_client_factory import get_async_milvus_client, get_milvus_client, is_milvus_lite_uri
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -16,27 +24,135 @@ class RetrievalType(Enum):
     ContentRetrieval = 3
 
 class RetrievalParam:
-    def __init__(self, retrieval_type: RetrievalType, params):
+    def __init__(self, retrieval_type: RetrievalType, params, resolved: bool = False):
         self.retrieval_type = retrieval_type
         self.params = params
+        # True when the names in params are already exact catalog names (fused parsing)
+        self.resolved = resolved
+
+class SpeculativeSearch:
+    """
+    Unfiltered content search started before the parse result is known.
+    `future` resolves to the raw Milvus hits for `query` (at most `limit`);
+    it is an asyncio task on the async path.
+    """
+    def __init__(self, query: str, limit: int, future: Future):
+        self.query = query
+        self.limit = limit
+        self.future = future
+
+_CONTENT_OUTPUT_FIELDS = [MILVUS_META_ATTRIBUTE_TEXT, 
+                          MILVUS_META_ATTRIBUTE_PAGE, 
+                          MILVUS_META_ATTRIBUTE_FILE, 
+                          MILVUS_META_ATTRIBUTE_CATEGORY, 
+                          MILVUS_META_ATTRIBUTE_DOCUMENTATION, 
+                          MILVUS_META_ATTRIBUTE_VERSION, 
+                          MILVUS_META_ATTRIBUTE_TYPE,
+                          MILVUS_META_ATTRIBUTE_SIMHASH,
+                          MILVUS_META_ATTRIBUTE_VERSIONS]
 
 class VersionRAGRetrieverDatabase:
     def __init__(self):
         self.graph = GraphClient()
+        self.catalog = GraphCatalog(self.graph)
         self.llm_client = LLMClient()
         # self.vdb = MilvusClient(MILVUS_URI)
         self.vdb = get_milvus_client()
+        # AsyncMilvusClient binds to the running event loop, so it is created on first async use.
+        self.avdb = None
         self.vdb_embedding = get_embedding_client()
+        self.resolver = CatalogNameResolver(self.catalog, self.vdb_embedding)
+        self._query_vectors = OrderedDict()
+        self._query_vectors_lock = Lock()
+        self.concurrent_changes = os.getenv("VERSIONRAG_CONCURRENT_CHANGES", "1").strip().lower() not in ("0", "false", "no")
+        # speculative content searches
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv("VERSIONRAG_RETRIEVAL_WORKERS", "4")), thread_name_prefix="versionrag-retrieval")
+        # change retrieval fan-out; separate so it never queues behind speculative searches under load
+        self.changes_executor = ThreadPoolExecutor(max_workers=int(os.getenv("VERSIONRAG_CHANGES_WORKERS", "4")), thread_name_prefix="versionrag-changes")
+
+    def encode_query(self, text: str):
+        """
+        Embed a query text, memoizing recent results so the retrieval cache and the
+        vector search do not embed the same query twice. Concurrent callers asking for
+        the same text share one in-flight embedding call.
+        """
+        owner = False
+        with self._query_vectors_lock:
+            future = self._query_vectors.get(text)
+            if future is not None:
+                self._query_vectors.move_to_end(text)
+            else:
+                future = Future()
+                owner = True
+                self._query_vectors[text] = future
+                while len(self._query_vectors) > 256:
+                    self._query_vectors.popitem(last=False)
+        if owner:
+            try:
+                future.set_result(self.vdb_embedding.encode_queries([text])[0])
+            except Exception as e:
+                future.set_exception(e)
+                with self._query_vectors_lock:
+                    self._query_vectors.pop(text, None)
+        return future.result()
+
+    def start_speculative_search(self, query: str, limit=None) -> SpeculativeSearch:
+        """
+        Start an unfiltered content search in the background. ContentRetrieval is the most common
+        parse outcome, so the search can overlap with the parser LLM call.
+        """
+        if limit is None:
+            limit = int(os.getenv("VERSIONRAG_SPECULATIVE_LIMIT", "60"))
+        future = self.executor.submit(self._search_content, query, "", limit)
+        return SpeculativeSearch(query=query, limit=limit, future=future)
+
+    async def aencode_query(self, text: str):
+        # Embedding is CPU-bound (local model) or a sync HTTP call; keep it off the event loop.
+        return await asyncio.to_thread(self.encode_query, text)
 
-    def retrieve(self, params: RetrievalParam) -> RetrievedData:
-        self.preprocess_params(params=params)
+    async def _avdb_call(self, method: str, **kwargs):
+        """
+        Run a Milvus client call on the async client, or on the sync client in a worker
+        thread for Milvus Lite, which the async client does not support.
+        """
+        if is_milvus_lite_uri():
+            return await asyncio.to_thread(getattr(self.vdb, method), **kwargs)
+        if self.avdb is None:
+            self.avdb = get_async_milvus_client()
+        return await getattr(self.avdb, method)(**kwargs)
+
+    def start_async_speculative_search(self, query: str, limit=None) -> SpeculativeSearch:
+        """
+        Async counterpart of start_speculative_search; must be called inside a running event loop.
+        """
+        if limit is None:
+            limit = int(os.getenv("VERSIONRAG_SPECULATIVE_LIMIT", "60"))
+        task = asyncio.ensure_future(self._asearch_content(query, "", limit))
+        return SpeculativeSearch(query=query, limit=limit, future=task)
+
+    def retrieve(self, params: RetrievalParam, speculative: SpeculativeSearch = None) -> RetrievedData:
+        if not params.resolved:
+            self.preprocess_params(params=params)
         match params.retrieval_type:
             case RetrievalType.VersionRetrieval:
                 return self.wrap("Retrieved availabe versions in system", self.retrieve_versions(params=params.params))
             case RetrievalType.ChangeRetrieval:
                 return self.wrap("Retrieved available changes in system", self.retrieve_changes(params=params.params))
             case RetrievalType.ContentRetrieval:
-                return self.wrap("Retrieved available content in system", self.retrieve_content(params=params.params))
+                return self.wrap("Retrieved available content in system", self.retrieve_content(params=params.params, speculative=speculative))
+
+    async def aretrieve(self, params: RetrievalParam, speculative: SpeculativeSearch = None) -> RetrievedData:
+        if not params.resolved:
+            # Local name resolution is CPU/embedding work with a rare (sync) LLM fallback.
+            await asyncio.to_thread(self.preprocess_params, params=params)
+        match params.retrieval_type:
+            case RetrievalType.VersionRetrieval:
+                # the catalog snapshot may reload from Neo4j after an index epoch bump
+                return self.wrap("Retrieved availabe versions in system", await asyncio.to_thread(self.retrieve_versions, params=params.params))
+            case RetrievalType.ChangeRetrieval:
+                return self.wrap("Retrieved available changes in system", await self.aretrieve_changes(params=params.params))
+            case RetrievalType.ContentRetrieval:
+                return self.wrap("Retrieved available content in system", await self.aretrieve_content(params=params.params, speculative=speculative))
 
     def wrap(self, prefix, output) -> RetrievedData:
         if not isinstance(output, RetrievedData):
@@ -44,62 +160,42 @@ class VersionRAGRetrieverDatabase:
         return output
             
     def preprocess_params(self, params: RetrievalParam):
+        """
+        Map the parsed category/documentation/version names onto names that exist in the graph
+        and write them back into the parameters. Names are resolved locally first; the LLM is
+        only asked when the local match is not confident.
+        """
         parameters = params.params
         category_name = parameters.get("category")
         if category_name:
-            category_name = self.retrieve_category_name(category_name)
+            resolved, confidence = self.resolver.resolve_category(category_name)
+            if not self.resolver.is_confident(confidence):
+                resolved = self.retrieve_category_name(category_name)
+            category_name = parameters["category"] = resolved or category_name
             
         documentation_name = parameters.get("documentation")
         if documentation_name:
-            documentation_name = self.retrieve_documentation_name(category_name=category_name, documentation_input_name=documentation_name)
+            resolved, confidence = self.resolver.resolve_documentation(category_name, documentation_name)
+            if not self.resolver.is_confident(confidence):
+                resolved = self.retrieve_documentation_name(category_name=category_name, documentation_input_name=documentation_name)
+            documentation_name = parameters["documentation"] = resolved or documentation_name
 
         version_name = parameters.get("version")
         if version_name:
-            version_name = self.retrieve_version(category_name=category_name, documentation_name=documentation_name, version_input_name=version_name)
+            resolved, confidence = self.resolver.resolve_version(category_name, documentation_name, version_name)
+            if not self.resolver.is_confident(confidence):
+                resolved = self.retrieve_version(category_name=category_name, documentation_name=documentation_name, version_input_name=version_name)
+            parameters["version"] = resolved or version_name
 
     def retrieve_categories(self):
-        query = """
-        MATCH (c:Category)
-        RETURN c.name AS name, c.description AS description
-        ORDER BY c.name
-        """
-        with self.graph.session() as session:
-            result = session.run(query)
-            categories = [record.data() for record in result]
-            retrieval_string = "\n".join(
-                f"{i}. Category Name: {cat['name']}\n"
-                for i, cat in enumerate(categories)
-            )
-        return retrieval_string
+        return self.catalog.snapshot().categories_prompt
     
     def retrieve_documentations(self, params=None):
         category_name = None
         if params:
             category_name = params.get("category")
-        
-        with self.graph.session() as session:
-            if category_name:
-                # Only documentations within category
-                query = """
-                MATCH (c:Category {name: $category_name})-[:CONTAINS]->(d:Documentation)
-                RETURN d.name AS name, d.description AS description, c.name AS category
-                """
-                result = session.run(query, category_name=category_name)
-            else:
-                # All documentations
-                query = """
-                MATCH (d:Documentation)
-                OPTIONAL MATCH (c:Category)-[:CONTAINS]->(d)
-                RETURN d.name AS name, d.description AS description, c.name AS category
-                """
-                result = session.run(query)
-            
-            documentations = [record.data() for record in result]
-            retrieval_string = "\n".join(
-                f"{i}. Documentation Name: {doc['name']}\n{i}. Documentation description: {doc['description']}\n{i}. Documentation category: {doc['category']}\n"
-                for i, doc in enumerate(documentations)
-            )
-            return retrieval_string
+        # Only documentations within category if a category is given, otherwise all documentations
+        return self.catalog.snapshot().documentations_prompt_for(category_name)
         
     def retrieve_versions(self, params):
         category_name = params.get("category")
@@ -107,83 +203,73 @@ class VersionRAGRetrieverDatabase:
 
         if not category_name:
             return "Error: Parameter 'category' is required for version retrieval."
-        
-        query = """
-        MATCH (c:Category {name: $category_name})-[:CONTAINS]->(d:Documentation)
-        """
-        if documentation_name:
-            query += " WHERE d.name = $documentation_name"
-        query += """
-        MATCH (d)-[:HAS_VERSION]->(v:Version)
-        RETURN d.name AS documentation, v.version AS version
-        ORDER BY d.name,
-            CASE 
-                // Priority 1: numeric versions
-                WHEN v.version =~ '^\\d+(\\.\\d+)*$' THEN 1
-                ELSE 2
-            END,
-            CASE 
-                WHEN v.version =~ '^\\d+(\\.\\d+)*$' 
-                THEN toFloat(replace(v.version, '\\.', ''))
-                ELSE 0
-            END,
-            CASE 
-                // Priority 2: year range versions (2016-2017, 2017-2018)
-                WHEN v.version =~ '^\\d{4}\\-\\d{4}$' THEN 2
-                ELSE 3
-            END,
-            CASE 
-                WHEN v.version =~ '^\\d{4}\\-\\d{4}$' 
-                THEN toInteger(substring(v.version, 0, 4))
-                ELSE 0
-            END,
-            CASE 
-                // Priority 3: single year versions
-                WHEN v.version =~ '^\\d{4}$' THEN 3
-                ELSE 4
-            END,
-            CASE 
-                WHEN v.version =~ '^\\d{4}$' 
-                THEN toInteger(v.version)
-                ELSE 0
-            END,
-            CASE 
-                // Priority 4: date versions (dd-MM-yyyy)
-                WHEN v.version =~ '^\\d{2}\\-\\d{2}\\-\\d{4}$' THEN 4
-                ELSE 5
-            END,
-            CASE 
-                WHEN v.version =~ '^\\d{2}\\-\\d{2}\\-\\d{4}$' 
-                THEN date(substring(v.version, 6, 4) + "-" + substring(v.version, 3, 2) + "-" + substring(v.version, 0, 2)) 
-                ELSE date('9999-12-31') 
-            END,
-            v.version
-        """
-        
-        with self.graph.session() as session:
-            result = session.run(query, category_name=category_name, documentation_name=documentation_name)
-            versions = [record.data() for record in result]
 
-        if not versions:
-            return "No versions found for given parameters."
-
-        return "\n".join(f"{i}. Documentation: {entry['documentation']}\n   Version: {entry['version']}" for i, entry in enumerate(versions, 1))
+        return self.catalog.snapshot().versions_prompt(category_name, documentation_name)
 
     def retrieve_changes(self, params):
         category_name = params.get("category")
         documentation_name = params.get("documentation")
         version_name = params.get("version")
 
-        if not category_name:
+        error = self._check_change_params(params)
+        if error:
+            return error
+        
+        # only retrieve from change nodes (copy so the caller's params stay untouched)
+        content_params = {**params, "type": "change"}
+        if self.concurrent_changes:
+            # The vector search and the Cypher query are independent; run them side by side.
+            content_future = self.changes_executor.submit(self.retrieve_content, params=content_params, entity_limit=150)
+            result_string = self._query_changes(category_name, documentation_name, version_name)
+            retrieved_content = content_future.result()
+        else:
+            retrieved_content = self.retrieve_content(params=content_params, entity_limit=150)
+            result_string = self._query_changes(category_name, documentation_name, version_name)
+
+        if result_string is None:
+            return "No changes found."
+        return f"retrieved content in changes: {retrieved_content}\nretrieved changes:{result_string}"
+
+    async def aretrieve_changes(self, params):
+        error = self._check_change_params(params)
+        if error:
+            return error
+
+        content_params = {**params, "type": "change"}
+        retrieved_content, result_string = await asyncio.gather(
+            self.aretrieve_content(params=content_params, entity_limit=150),
+            self._aquery_changes(params.get("category"), params.get("documentation"), params.get("version")),
+        )
+
+        if result_string is None:
+            return "No changes found."
+        return f"retrieved content in changes: {retrieved_content}\nretrieved changes:{result_string}"
+
+    @staticmethod
+    def _check_change_params(params):
+        if not params.get("category"):
             return "Error: Parameter 'category' is required for change retrieval."
         
-        if not documentation_name:
+        if not params.get("documentation"):
             return  "Error: Parameter 'documentation' is required for change retrieval."
-        
-        params["type"] = "change" # only retrieve from change nodes
-        
-        retrieved_content = self.retrieve_content(params=params, entity_limit=150)
+        return None
+
+    def _query_changes(self, category_name, documentation_name, version_name):
+        query, query_params = self._changes_query(category_name, documentation_name, version_name)
+        with self.graph.session() as session:
+            result = session.run(query, **query_params)
+            changes = [record.data() for record in result]
+        return self._format_changes(changes)
+
+    async def _aquery_changes(self, category_name, documentation_name, version_name):
+        query, query_params = self._changes_query(category_name, documentation_name, version_name)
+        async with self.graph.async_session() as session:
+            result = await session.run(query, **query_params)
+            changes = await result.data()
+        return self._format_changes(changes)
 
+    @staticmethod
+    def _changes_query(category_name, documentation_name, version_name):
         query = """
         MATCH (c:Category {name: $category_name})-[:CONTAINS]->(d:Documentation {name: $documentation_name})-[:HAS_VERSION]->(v:Version)
         """
@@ -233,13 +319,12 @@ class VersionRAGRetrieverDatabase:
 
         if version_name:
             query_params["version_number"] = version_name
+        return query, query_params
 
-        with self.graph.session() as session:
-            result = session.run(query, **query_params)
-            changes = [record.data() for record in result]
-
+    @staticmethod
+    def _format_changes(changes):
         if not changes:
-            return "No changes found."
+            return None
 
         result_string = ""
         for i, ch in enumerate(changes, start=1):
@@ -251,21 +336,47 @@ class VersionRAGRetrieverDatabase:
                 result_string += f"   Origin: {ch['origin']}\n"
             result_string += "\n"
         
-        return f"retrieved content in changes: {retrieved_content}\nretrieved changes:{result_string.strip()}"
+        return result_string.strip()
     
-    def retrieve_content(self, params, entity_limit=15) -> RetrievedData:
+    def retrieve_content(self, params, entity_limit=15, speculative: SpeculativeSearch = None) -> RetrievedData:
         query = params.get("query")
-        category = params.get("category")
-        documentation = params.get("documentation")
-        version = params.get("version")
-        type = params.get("type")
         
         if not query:
             return "Error: Parameter 'query' is required for content retrieval."
         
         if not self.vdb.has_collection(collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG):
             return "no data indexed"
-        
+
+        if speculative is not None and speculative.query == query:
+            hits = self._filter_speculative_hits(speculative, params, entity_limit)
+            if hits is not None:
+                return self._hits_to_retrieved_data(hits)
+
+        return self._hits_to_retrieved_data(self._search_content(query, self._content_filter(params), entity_limit))
+
+    async def aretrieve_content(self, params, entity_limit=15, speculative: SpeculativeSearch = None) -> RetrievedData:
+        query = params.get("query")
+        if not query:
+            return "Error: Parameter 'query' is required for content retrieval."
+
+        if not await self._avdb_call("has_collection", collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG):
+            return "no data indexed"
+
+        if speculative is not None and speculative.query == query:
+            await asyncio.wait([speculative.future])
+            hits = self._filter_speculative_hits(speculative, params, entity_limit)
+            if hits is not None:
+                return self._hits_to_retrieved_data(hits)
+
+        return self._hits_to_retrieved_data(await self._asearch_content(query, self._content_filter(params), entity_limit))
+
+    @staticmethod
+    def _content_filter(params) -> str:
+        category = params.get("category")
+        documentation = params.get("documentation")
+        version = params.get("version")
+        type = params.get("type")
+
         # create vdb filter from params
         filters = []
         if category:
@@ -273,35 +384,76 @@ class VersionRAGRetrieverDatabase:
         if documentation:
             filters.append(f'documentation == "{documentation}"')
         if version:
-            # Try exact match first, then prefix match for version
-            # Note: Milvus doesn't support OR in filter, so we use prefix match
-            filters.append(f'version like "{version}%"')
+            # Prefix match for version; deduplicated chunks list every version they occur in
+            filters.append(f'(version like "{version}%" or versions like "%|{version}%")')
         if type:
             filters.append(f'type == "{type}"')
-        filter_string = " and ".join(filters) if filters else ""
+        return " and ".join(filters) if filters else ""
 
-        query_vectors = self.vdb_embedding.encode_queries([query])
+    def _search_content(self, query, filter_string, limit) -> list:
+        query_vectors = [self.encode_query(query)]
 
         res = self.vdb.search(
             collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG,
             data=query_vectors,
-            limit=entity_limit,  # number of returned entities
-            output_fields=[MILVUS_META_ATTRIBUTE_TEXT, 
-                           MILVUS_META_ATTRIBUTE_PAGE, 
-                           MILVUS_META_ATTRIBUTE_FILE, 
-                           MILVUS_META_ATTRIBUTE_CATEGORY, 
-                           MILVUS_META_ATTRIBUTE_DOCUMENTATION, 
-                           MILVUS_META_ATTRIBUTE_VERSION, 
-                           MILVUS_META_ATTRIBUTE_TYPE],
+            limit=limit,  # number of returned entities
+            output_fields=_CONTENT_OUTPUT_FIELDS,
+            filter=filter_string
+        )
+        return res[0]
+
+    async def _asearch_content(self, query, filter_string, limit) -> list:
+        query_vectors = [await self.aencode_query(query)]
+
+        res = await self._avdb_call(
+            "search",
+            collection_name=MILVUS_COLLECTION_NAME_VERSIONRAG,
+            data=query_vectors,
+            limit=limit,  # number of returned entities
+            output_fields=_CONTENT_OUTPUT_FIELDS,
             filter=filter_string
         )
+        return res[0]
 
-        results = res[0]
+    def _filter_speculative_hits(self, speculative: SpeculativeSearch, params, entity_limit):
+        """
+        Narrow the speculative (unfiltered) hits in memory with the same filters retrieve_content
+        would send to Milvus. Returns None when the speculative result cannot be trusted to
+        contain the filtered top-k, so the caller runs the filtered search instead.
+        """
+        try:
+            hits = speculative.future.result()
+        except Exception as e:
+            print(f"Warning: speculative search failed, running filtered search: {e}")
+            return None
+
+        expected = {
+            MILVUS_META_ATTRIBUTE_CATEGORY: params.get("category"),
+            MILVUS_META_ATTRIBUTE_DOCUMENTATION: params.get("documentation"),
+            MILVUS_META_ATTRIBUTE_TYPE: params.get("type"),
+        }
+        version = params.get("version")
+        filtered = [
+            hit for hit in hits
+            if all(not value or hit["entity"].get(field) == value for field, value in expected.items())
+            and (not version or any(str(v).startswith(version) for v in hit_versions(hit["entity"])))
+        ]
+        # Enough matches, or the unfiltered search already returned every entity there is.
+        if len(filtered) >= entity_limit or len(hits) < speculative.limit:
+            return filtered[:entity_limit]
+        return None
+
+    def _hits_to_retrieved_data(self, results) -> RetrievedData:
+        # The same paragraph in consecutive versions becomes one chunk annotated with all its versions
+        groups = group_near_duplicates(results)
+        results = [group[0] for group in groups]
         chunks = [hit["entity"][MILVUS_META_ATTRIBUTE_TEXT] for hit in results]
         page_nrs = [hit["entity"][MILVUS_META_ATTRIBUTE_PAGE] for hit in results]
         source_files = [hit["entity"][MILVUS_META_ATTRIBUTE_FILE] for hit in results]
-        versions = [hit["entity"][MILVUS_META_ATTRIBUTE_VERSION] for hit in results]
-        return RetrievedData(chunks, page_nrs, source_files, versions)
+        versions = [group_versions(group) for group in groups]
+        scores = [hit.get("distance") for hit in results]
+        also_in = [other_sources(group) for group in groups]
+        return RetrievedData(chunks, page_nrs, source_files, versions, scores, also_in)
 
     def retrieve_category_name(self, category_input_name):
         # get existing category name for input name
@@ -1,6 +1,12 @@
 from retrieval.versionrag.versionrag_retriever_db import RetrievalParam, RetrievalType
+from retrieval.versionrag.versionrag_retriever_router import QueryRouter
+from retrieval.versionrag.versionrag_retriever_rules import RuleBasedClassifier
 from util.llm_client import LLMClient
+from threading import Lock
+import asyncio
+import numpy as np
 import json
+import os
 
 system_prompt = """
             You are an advanced AI assistant specializing in query classification and parameter extraction.
@@ -41,28 +47,278 @@ system_prompt = """
             - If the query does not fit into any category, the default is ContentRetrieval.
         """
 
+fused_system_prompt = """
+            You are an advanced AI assistant specializing in query classification and catalog lookup.
+            Determine the retrieval type that best fits the user's question and select the matching catalog entries by their numeric IDs.
+
+            ### **Retrieval Types**
+            - VersionRetrieval: Retrieves all available versions in a category, optionally filtered by a single documentation. Requires category_id.
+            - ChangeRetrieval: Retrieves all changes made in a specific category and documentation, optionally filtered by a version. Requires category_id and documentation_id.
+            - ContentRetrieval: Retrieves content, optionally filtered by category, documentation or version. This is the default.
+
+            ### **Output Format (Valid JSON only)**
+            {
+            "retrieval": "VersionRetrieval" | "ChangeRetrieval" | "ContentRetrieval",
+            "query": "<the user's question>",
+            "category_id": <integer or null>,
+            "documentation_id": <integer or null>,
+            "version_id": <integer or null>
+            }
+
+            Important Guidelines
+            - Only use IDs that are listed in the catalog in the user message; use null when the query does not refer to an entry.
+            - A documentation must belong to the selected category, and a version must belong to the selected documentation.
+            - Do not assume information that is not explicitly stated in the query.
+            - Ensure the response is always valid JSON, suitable for direct parsing in Python.
+        """
+
 class VersionRAGRetrieverParser:
     def __init__(self, database):
         self.database = database
         self.llm_client = LLMClient(json_format=True, temp=0.0)
+        use_rules = os.getenv("VERSIONRAG_PARSER_RULES", "1").strip().lower() not in ("0", "false", "no")
+        self.rules = RuleBasedClassifier() if use_rules else None
+        use_router = os.getenv("VERSIONRAG_ROUTER", "1").strip().lower() not in ("0", "false", "no")
+        self.router = QueryRouter() if use_router else None
+        # classic: parser call + name resolution in preprocess_params; fused: one call returning catalog IDs
+        self.mode = os.getenv("VERSIONRAG_PARSER_MODE", "classic").strip().lower()
+        # Above this many documentations only the top-N most similar ones go into the prompt.
+        self.catalog_max_documentations = int(os.getenv("VERSIONRAG_PARSER_MAX_DOCUMENTATIONS", "25"))
+        self._stats_lock = Lock()
+        self._stats = {"rules": 0, "router": 0, "llm": 0}
+
+    def _count(self, path: str):
+        with self._stats_lock:
+            self._stats[path] = self._stats.get(path, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Counters of which path answered parse_retrieval_mode, plus the fast-path ratio.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = sum(stats.values())
+        stats["total"] = total
+        stats["fast_path_ratio"] = round((total - stats.get("llm", 0)) / total, 4) if total else 0.0
+        return stats
+
+    def candidate_documentations(self, query, snapshot):
+        """
+        Indices of the documentations to show the parser, or None to show the whole catalog.
+        Small catalogs are inlined completely; large ones are pruned to the documentations
+        whose name/description embedding is closest to the query.
+        """
+        if self.catalog_max_documentations <= 0 or len(snapshot.documentations) <= self.catalog_max_documentations:
+            return None
+
+        _, documentation_vectors = self.database.resolver.catalog_vectors(snapshot)
+        query_vector = np.asarray(self.database.encode_query(query), dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+        similarities = documentation_vectors @ query_vector
+        return [int(i) for i in np.argsort(-similarities, kind="stable")[:self.catalog_max_documentations]]
+
+    def catalog_prompts(self, query) -> tuple:
+        """
+        (categories_prompt, documentations_prompt) for the parser, pruned on large catalogs.
+        """
+        snapshot = self.database.catalog.snapshot()
+        candidates = self.candidate_documentations(query, snapshot)
+        if candidates is None:
+            return snapshot.categories_prompt, snapshot.documentations_prompt
+        return snapshot.pruned_prompts(candidates)
+
+    def fast_path(self, query):
+        """
+        Answer from the rule-based classifier or the trained router, or None if neither is sure
+        (then `parse_with_llm` has to decide).
+        """
+        if self.rules is not None:
+            retrieval_param = self.rules.classify(query, self.database.catalog.snapshot())
+            if retrieval_param is not None:
+                self._count("rules")
+                print(f"retrieval mode (rules): {retrieval_param.retrieval_type.name} {retrieval_param.params}")
+                return retrieval_param
+
+        if self.router is not None and self.router.is_trained:
+            retrieval_param = self.router.route(query, self.database.encode_query(query), self.database.catalog.snapshot())
+            if retrieval_param is not None:
+                self._count("router")
+                print(f"retrieval mode (router): {retrieval_param.retrieval_type.name} {retrieval_param.params}")
+                return retrieval_param
+        return None
 
     def parse_retrieval_mode(self, query) -> RetrievalParam:
-        user_query = f"Available categories: {self.database.retrieve_categories()}\nAvailable documentations: {self.database.retrieve_documentations()}\nUser query: {query}"
+        retrieval_param = self.fast_path(query)
+        if retrieval_param is not None:
+            return retrieval_param
+        return self.parse_with_llm(query)
+
+    def parse_with_llm(self, query) -> RetrievalParam:
+        self._count("llm")
+        if self.mode == "fused":
+            retrieval_param = self.parse_fused(query)
+            if self._accept_fused(query, retrieval_param):
+                self._log_decision(query, retrieval_param)
+                return retrieval_param
+
+        user_query = self.classic_user_prompt(query)
         max_attempts = 5
         
         parsed_result = None
         for attempt in range(max_attempts):
             response = self.llm_client.generate(system_prompt=system_prompt, user_prompt=user_query)
-            response = response.replace("```json", "").replace("```", "").strip()
             try:
-                parsed_result = json.loads(response)
+                parsed_result = self._load_json(response)
+                break
+            except json.JSONDecodeError as e:
+                if attempt == max_attempts - 1:
+                    raise ValueError(f"Error parsing JSON response: {e}")
+        return self._classic_result(query, parsed_result)
+
+    async def aparse_retrieval_mode(self, query) -> RetrievalParam:
+        """
+        Async variant of parse_retrieval_mode: the LLM calls are awaited, the local
+        (embedding/CPU) steps run in a worker thread.
+        """
+        retrieval_param = await asyncio.to_thread(self.fast_path, query)
+        if retrieval_param is not None:
+            return retrieval_param
+        return await self.aparse_with_llm(query)
+
+    async def aparse_with_llm(self, query) -> RetrievalParam:
+        self._count("llm")
+        if self.mode == "fused":
+            retrieval_param = await self.aparse_fused(query)
+            if self._accept_fused(query, retrieval_param):
+                await asyncio.to_thread(self._log_decision, query, retrieval_param)
+                return retrieval_param
+
+        user_query = await asyncio.to_thread(self.classic_user_prompt, query)
+        max_attempts = 5
+
+        parsed_result = None
+        for attempt in range(max_attempts):
+            response = await self.llm_client.agenerate(system_prompt=system_prompt, user_prompt=user_query)
+            try:
+                parsed_result = self._load_json(response)
                 break
             except json.JSONDecodeError as e:
-                if attempt >= max_attempts:
+                if attempt == max_attempts - 1:
                     raise ValueError(f"Error parsing JSON response: {e}")
+        return await asyncio.to_thread(self._classic_result, query, parsed_result)
+
+    def classic_user_prompt(self, query) -> str:
+        # Catalog first, query last: the system prompt + catalog form a stable prefix for provider-side prompt caching.
+        categories_prompt, documentations_prompt = self.catalog_prompts(query)
+        return f"Available categories: {categories_prompt}\nAvailable documentations: {documentations_prompt}\nUser query: {query}"
+
+    @staticmethod
+    def _load_json(response: str) -> dict:
+        return json.loads(response.replace("```json", "").replace("```", "").strip())
 
+    def _classic_result(self, query, parsed_result) -> RetrievalParam:
         print(f"retrieval mode: {parsed_result}")
         parsed_retrieval_type = parsed_result["retrieval"]
         parsed_params = parsed_result["parameters"]
         retrieval_type = RetrievalType[parsed_retrieval_type]
-        return RetrievalParam(retrieval_type=retrieval_type, params=parsed_params)
\ No newline at end of file
+        retrieval_param = RetrievalParam(retrieval_type=retrieval_type, params=parsed_params)
+        self._log_decision(query, retrieval_param)
+        return retrieval_param
+
+    def _accept_fused(self, query, retrieval_param) -> bool:
+        if retrieval_param is None:
+            print("fused parsing failed, falling back to classic parsing")
+            return False
+        print(f"retrieval mode (fused): {retrieval_param.retrieval_type.name} {retrieval_param.params}")
+        return True
+
+    def _log_decision(self, query, retrieval_param: RetrievalParam):
+        if self.router is not None:
+            # Every LLM decision becomes a training example for the router.
+            self.router.log_decision(query, self.database.encode_query(query), RetrievalParam(retrieval_param.retrieval_type, dict(retrieval_param.params)))
+
+    def fused_user_prompt(self, query) -> tuple:
+        """
+        (user prompt, snapshot, candidate documentation indices) for a fused parser call.
+        """
+        snapshot = self.database.catalog.snapshot()
+        candidates = self.candidate_documentations(query, snapshot)
+        return f"{snapshot.id_prompt(candidates)}\nUser query: {query}", snapshot, candidates
+
+    def parse_fused(self, query):
+        """
+        Parse the retrieval mode and resolve category/documentation/version in a single LLM call.
+        The catalog is shown with numeric IDs and the answer is validated against the snapshot,
+        so the returned RetrievalParam is already resolved (preprocess_params is skipped).
+        Returns None when no valid answer was produced.
+        """
+        user_query, snapshot, candidates = self.fused_user_prompt(query)
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            response = self.llm_client.generate(system_prompt=fused_system_prompt, user_prompt=user_query)
+            retrieval_param = self._parse_fused_response(response, query, snapshot, candidates, attempt)
+            if retrieval_param is not None:
+                return retrieval_param
+        return None
+
+    async def aparse_fused(self, query):
+        user_query, snapshot, candidates = await asyncio.to_thread(self.fused_user_prompt, query)
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            response = await self.llm_client.agenerate(system_prompt=fused_system_prompt, user_prompt=user_query)
+            retrieval_param = self._parse_fused_response(response, query, snapshot, candidates, attempt)
+            if retrieval_param is not None:
+                return retrieval_param
+        return None
+
+    def _parse_fused_response(self, response, query, snapshot, candidates, attempt):
+        try:
+            return self._validate_fused(self._load_json(response), query, snapshot, candidates)
+        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+            print(f"Attempt {attempt + 1} failed: {e}")
+            return None
+
+    @staticmethod
+    def _validate_fused(parsed_result: dict, query, snapshot, candidates) -> RetrievalParam:
+        retrieval_type = RetrievalType[parsed_result["retrieval"]]
+
+        def lookup(key, entries, allowed=None):
+            value = parsed_result.get(key)
+            if value is None or value == "":
+                return None
+            index = int(value)
+            if not 0 <= index < len(entries) or (allowed is not None and index not in allowed):
+                raise ValueError(f"{key} {value} is not in the catalog")
+            return entries[index]
+
+        allowed_documentations = set(candidates) if candidates is not None else None
+        category = lookup("category_id", snapshot.categories)
+        documentation = lookup("documentation_id", snapshot.documentations, allowed_documentations)
+        version = lookup("version_id", snapshot.versions)
+
+        category_name = category["name"] if category else None
+        if documentation:
+            if category_name and documentation["category"] != category_name:
+                raise ValueError(f"documentation {documentation['name']} is not in category {category_name}")
+            category_name = category_name or documentation["category"]
+        if version:
+            if documentation and version["documentation"] != documentation["name"]:
+                raise ValueError(f"version {version['version']} does not belong to {documentation['name']}")
+            if category_name and version["category"] != category_name:
+                raise ValueError(f"version {version['version']} is not in category {category_name}")
+
+        params = {}
+        if retrieval_type != RetrievalType.VersionRetrieval:
+            params["query"] = parsed_result.get("query") or query
+        if category_name:
+            params["category"] = category_name
+        if documentation:
+            params["documentation"] = documentation["name"]
+        if version and retrieval_type != RetrievalType.VersionRetrieval:
+            params["version"] = version["version"]
+
+        if retrieval_type == RetrievalType.VersionRetrieval and not category_name:
+            raise ValueError("VersionRetrieval requires a category")
+        if retrieval_type == RetrievalType.ChangeRetrieval and not (category_name and documentation):
+            raise ValueError("ChangeRetrieval requires a category and a documentation")
+        return RetrievalParam(retrieval_type=retrieval_type, params=params, resolved=True)
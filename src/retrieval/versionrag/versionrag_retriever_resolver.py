@@ -0,0 +1,101 @@
+import os
+from threading import Lock
+
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+
+class CatalogNameResolver:
+    """
+    Resolves parsed category/documentation/version names against the catalog snapshot locally.
+
+    Names are scored with rapidfuzz string similarity and, for categories and documentations,
+    with cosine similarity against precomputed embeddings of the catalog entries. Every method
+    returns (name, confidence); callers fall back to the LLM when the confidence is below
+    `threshold` (VERSIONRAG_RESOLVER_THRESHOLD).
+    """
+
+    def __init__(self, catalog, embedding_client, threshold=None):
+        self.catalog = catalog
+        self.embedding_client = embedding_client
+        if threshold is None:
+            threshold = float(os.getenv("VERSIONRAG_RESOLVER_THRESHOLD", "0.85"))
+        self.threshold = threshold
+        self._lock = Lock()
+        self._embedded_snapshot = None
+        self._category_vectors = None
+        self._documentation_vectors = None
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.threshold
+
+    def catalog_vectors(self, snapshot):
+        # Catalog embeddings are computed once per snapshot (i.e. once per index epoch).
+        with self._lock:
+            if self._embedded_snapshot is not snapshot:
+                category_texts = [cat["name"] for cat in snapshot.categories]
+                documentation_texts = [f"{doc['name']}: {doc['description'] or ''}" for doc in snapshot.documentations]
+                self._category_vectors = self._encode(category_texts, self.embedding_client.encode_documents)
+                self._documentation_vectors = self._encode(documentation_texts, self.embedding_client.encode_documents)
+                self._embedded_snapshot = snapshot
+            return self._category_vectors, self._documentation_vectors
+
+    @staticmethod
+    def _encode(texts, encode_fn):
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.asarray(encode_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _best_match(self, input_name, names, vectors=None):
+        if not input_name or not names:
+            return None, 0.0
+        scores = np.array([fuzz.WRatio(input_name, name, processor=utils.default_process) / 100.0 for name in names])
+        # Only pay for an embedding call when the string match alone is not decisive.
+        if vectors is not None and len(vectors) and scores.max() < self.threshold:
+            query_vector = self._encode([input_name], self.embedding_client.encode_queries)[0]
+            scores = np.maximum(scores, vectors @ query_vector)
+        order = np.argsort(-scores, kind="stable")
+        best = int(order[0])
+        confidence = float(scores[best])
+        # Two near-equal candidates (e.g. "Kalender 2024" vs "Kalender 2025") are not a confident match.
+        if len(order) > 1 and names[best] != names[int(order[1])] and confidence - float(scores[int(order[1])]) < 0.05:
+            confidence = min(confidence, self.threshold - 0.01)
+        return names[best], confidence
+
+    def resolve_category(self, input_name):
+        snapshot = self.catalog.snapshot()
+        category_vectors, _ = self.catalog_vectors(snapshot)
+        names = [cat["name"] for cat in snapshot.categories]
+        return self._best_match(input_name, names, category_vectors)
+
+    def resolve_documentation(self, category_name, input_name):
+        snapshot = self.catalog.snapshot()
+        _, documentation_vectors = self.catalog_vectors(snapshot)
+        indices = [i for i, doc in enumerate(snapshot.documentations) if not category_name or doc["category"] == category_name]
+        names = [snapshot.documentations[i]["name"] for i in indices]
+        vectors = documentation_vectors[indices] if len(documentation_vectors) else None
+        return self._best_match(input_name, names, vectors)
+
+    def resolve_version(self, category_name, documentation_name, input_name):
+        if not input_name:
+            return None, 0.0
+        snapshot = self.catalog.snapshot()
+        versions = [entry["version"] for entry in snapshot.versions_for(category_name, documentation_name)] if category_name else \
+            [entry["version"] for entry in snapshot.versions if not documentation_name or entry["documentation"] == documentation_name]
+        versions = list(dict.fromkeys(versions))
+        if not versions:
+            return None, 0.0
+        needle = input_name.strip().lower()
+        exact = [v for v in versions if v.lower() == needle]
+        if exact:
+            return exact[0], 1.0
+        # Version identifiers are short codes ("2024-2025", "1.2"), so prefix matches are
+        # more meaningful than embeddings; a unique prefix match is confident.
+        prefixed = [v for v in versions if v.lower().startswith(needle)]
+        if len(prefixed) == 1:
+            return prefixed[0], 0.95
+        match = process.extractOne(input_name, versions, scorer=fuzz.ratio, processor=utils.default_process)
+        if match is None:
+            return None, 0.0
+        return match[0], match[1] / 100.0
@@ -0,0 +1,280 @@
+"""
+Lightweight learned query router for VersionRAG.
+
+Every decision of the LLM parser is logged (query, query embedding, retrieval type, params).
+A nearest-centroid classifier over those embeddings then predicts the retrieval type and the
+target category in well under a millisecond; the LLM parser stays the fallback for queries
+the router is not confident about.
+
+Log records and the trained model are tagged with the embedding model and variant (full
+precision or int8-quantized); after switching EMBEDDING_MODEL or to/from EMBEDDING_BACKEND=onnx-int8
+the old ones are ignored until enough new decisions are logged to retrain. The log keeps only
+the last VERSIONRAG_ROUTER_LOG_MAX_LINES decisions.
+
+Train / evaluate from the src folder:
+    python retrieval/versionrag/versionrag_retriever_router.py train
+    python retrieval/versionrag/versionrag_retriever_router.py evaluate
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+_SRC_DIR = Path(__file__).resolve().parents[2]
+if str(_SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(_SRC_DIR))
+
+from retrieval.versionrag.versionrag_retriever_db import RetrievalParam, RetrievalType
+from util.constants import EMBEDDING_MODEL, EMBEDDING_VARIANT, VERSIONRAG_ROUTER_LOG_PATH, VERSIONRAG_ROUTER_MODEL_PATH
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class NearestCentroidClassifier:
+    """
+    Cosine nearest-centroid classifier; confidence is a softmax over centroid similarities.
+    """
+
+    def __init__(self, labels: list, centroids: np.ndarray, temperature: float = 0.05):
+        self.labels = list(labels)
+        self.centroids = centroids
+        self.temperature = temperature
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, labels: list, temperature: float = 0.05):
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        distinct = sorted(set(labels))
+        label_array = np.asarray(labels)
+        centroids = np.stack([vectors[label_array == label].mean(axis=0) for label in distinct])
+        return cls(distinct, _normalize_rows(centroids), temperature)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.centroids.shape[-1])
+
+    def predict(self, vector) -> tuple:
+        vector = _normalize_rows(np.asarray(vector, dtype=np.float32))
+        if vector.shape[-1] != self.dimension:
+            # vector from another embedding model: no confident prediction
+            return None, 0.0
+        sims = self.centroids @ vector
+        logits = (sims - sims.max()) / self.temperature
+        probs = np.exp(logits) / np.exp(logits).sum()
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+
+class QueryRouter:
+    def __init__(self, log_path: str = VERSIONRAG_ROUTER_LOG_PATH, model_path: str = VERSIONRAG_ROUTER_MODEL_PATH, min_confidence=None):
+        self.log_path = log_path
+        self.model_path = model_path
+        if min_confidence is None:
+            min_confidence = float(os.getenv("VERSIONRAG_ROUTER_MIN_CONFIDENCE", "0.9"))
+        self.min_confidence = min_confidence
+        self.log_max_lines = int(os.getenv("VERSIONRAG_ROUTER_LOG_MAX_LINES", "20000"))
+        self._log_writes = 0
+        self.type_classifier = None
+        self.category_classifier = None
+        self._log_lock = Lock()
+        self.load()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.type_classifier is not None
+
+    def log_decision(self, query: str, query_vector, retrieval_param: RetrievalParam):
+        record = {
+            "ts": time.time(),
+            "query": query,
+            "retrieval": retrieval_param.retrieval_type.name,
+            "parameters": retrieval_param.params,
+            "embedding_model": EMBEDDING_MODEL,
+            "embedding_variant": EMBEDDING_VARIANT,
+            "dimension": len(query_vector),
+            "vector": [round(float(x), 6) for x in query_vector],
+        }
+        try:
+            with self._log_lock:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._log_writes += 1
+                # trim every ~10% of the cap, so the file stays between N and 1.1 N lines
+                if self.log_max_lines > 0 and self._log_writes >= max(1, self.log_max_lines // 10):
+                    self._log_writes = 0
+                    self._trim_log()
+        except OSError as e:
+            print(f"Warning: Could not log parser decision: {e}")
+
+    def _last_log_lines(self) -> list:
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            if self.log_max_lines <= 0:
+                return f.readlines()
+            return list(deque(f, maxlen=self.log_max_lines))
+
+    def _trim_log(self):
+        lines = self._last_log_lines()
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.log_path)
+
+    def load_examples(self) -> list:
+        if not os.path.exists(self.log_path):
+            return []
+        examples = []
+        with self._log_lock:
+            lines = self._last_log_lines()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("retrieval") not in RetrievalType.__members__ or not record.get("vector"):
+                continue
+            # vectors of another (or an unrecorded) embedding model or variant are not comparable
+            if (record.get("embedding_model"), record.get("embedding_variant")) != (EMBEDDING_MODEL, EMBEDDING_VARIANT) \
+                    or len(record["vector"]) != record.get("dimension"):
+                continue
+            examples.append(record)
+        return examples
+
+    @staticmethod
+    def _fit(examples: list) -> tuple:
+        vectors = np.asarray([e["vector"] for e in examples], dtype=np.float32)
+        type_labels = [e["retrieval"] for e in examples]
+        category_labels = [(e.get("parameters") or {}).get("category") or "" for e in examples]
+        return NearestCentroidClassifier.fit(vectors, type_labels), NearestCentroidClassifier.fit(vectors, category_labels)
+
+    def train(self, min_examples: int = 30) -> dict:
+        examples = self.load_examples()
+        if len(examples) < min_examples:
+            raise ValueError(f"need at least {min_examples} logged parser decisions in {self.log_path}, found {len(examples)}")
+        if len({e["retrieval"] for e in examples}) < 2:
+            # A single-class router would be "confident" about every query.
+            raise ValueError("logged parser decisions cover only one retrieval type; keep logging before training")
+        self.type_classifier, self.category_classifier = self._fit(examples)
+        np.savez(
+            self.model_path,
+            type_labels=np.asarray(self.type_classifier.labels),
+            type_centroids=self.type_classifier.centroids,
+            category_labels=np.asarray(self.category_classifier.labels),
+            category_centroids=self.category_classifier.centroids,
+            embedding_model=np.asarray(EMBEDDING_MODEL),
+            embedding_variant=np.asarray(EMBEDDING_VARIANT),
+            dimension=np.asarray(self.type_classifier.dimension),
+        )
+        return {"examples": len(examples), "types": self.type_classifier.labels, "categories": self.category_classifier.labels}
+
+    def load(self):
+        if not os.path.exists(self.model_path):
+            return
+        try:
+            data = np.load(self.model_path, allow_pickle=False)
+            model = str(data["embedding_model"]) if "embedding_model" in data.files else None
+            variant = str(data["embedding_variant"]) if "embedding_variant" in data.files else None
+            if (model, variant) != (EMBEDDING_MODEL, EMBEDDING_VARIANT):
+                print(f"Warning: query router was trained on {variant or 'unknown'} embeddings of {model or 'an unknown model'}, "
+                      f"not {EMBEDDING_VARIANT} {EMBEDDING_MODEL}; ignoring it until it is retrained")
+                return
+            self.type_classifier = NearestCentroidClassifier(data["type_labels"].tolist(), data["type_centroids"])
+            self.category_classifier = NearestCentroidClassifier(data["category_labels"].tolist(), data["category_centroids"])
+        except Exception as e:
+            print(f"Warning: Could not load query router model: {e}")
+            self.type_classifier = self.category_classifier = None
+
+    def route(self, query: str, query_vector, snapshot):
+        """
+        Predict a RetrievalParam, or None when the router is not confident
+        (or the prediction does not fit the current catalog).
+        """
+        if not self.is_trained:
+            return None
+        retrieval, type_confidence = self.type_classifier.predict(query_vector)
+        category, category_confidence = self.category_classifier.predict(query_vector)
+        if min(type_confidence, category_confidence) < self.min_confidence:
+            return None
+
+        retrieval_type = RetrievalType[retrieval]
+        if category and category not in {cat["name"] for cat in snapshot.categories}:
+            return None
+
+        params = {}
+        if retrieval_type != RetrievalType.VersionRetrieval:
+            params["query"] = query
+        if category:
+            params["category"] = category
+
+        if retrieval_type == RetrievalType.VersionRetrieval and not category:
+            return None
+        if retrieval_type == RetrievalType.ChangeRetrieval:
+            # The router does not predict documentations; only route when the category has exactly one.
+            documentations = {doc["name"] for doc in snapshot.documentations if doc["category"] == category}
+            if not category or len(documentations) != 1:
+                return None
+            params["documentation"] = documentations.pop()
+        return RetrievalParam(retrieval_type=retrieval_type, params=params)
+
+    def evaluate(self, folds: int = 5) -> dict:
+        """
+        k-fold agreement of the router with the logged LLM decisions.
+        """
+        examples = self.load_examples()
+        if len(examples) < folds:
+            raise ValueError(f"need at least {folds} logged parser decisions, found {len(examples)}")
+        type_agree = category_agree = covered = covered_agree = 0
+        latencies = []
+        indices = np.arange(len(examples))
+        for fold in range(folds):
+            test_idx = indices[indices % folds == fold]
+            train = [examples[i] for i in indices if i % folds != fold]
+            type_clf, category_clf = self._fit(train)
+            for i in test_idx:
+                example = examples[i]
+                expected_category = (example.get("parameters") or {}).get("category") or ""
+                start = time.perf_counter()
+                predicted_type, type_conf = type_clf.predict(example["vector"])
+                predicted_category, category_conf = category_clf.predict(example["vector"])
+                latencies.append(time.perf_counter() - start)
+                ok = predicted_type == example["retrieval"] and predicted_category == expected_category
+                type_agree += predicted_type == example["retrieval"]
+                category_agree += predicted_category == expected_category
+                if min(type_conf, category_conf) >= self.min_confidence:
+                    covered += 1
+                    covered_agree += ok
+        total = len(examples)
+        return {
+            "examples": total,
+            "folds": folds,
+            "type_agreement": round(type_agree / total, 4),
+            "category_agreement": round(category_agree / total, 4),
+            "coverage": round(covered / total, 4),
+            "agreement_when_confident": round(covered_agree / covered, 4) if covered else None,
+            "p50_predict_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the VersionRAG query router from logged parser decisions.")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--folds", type=int, default=5, help="Number of cross-validation folds for evaluate.")
+    parser.add_argument("--min-examples", type=int, default=30, help="Minimum number of logged decisions required to train.")
+    args = parser.parse_args()
+
+    router = QueryRouter()
+    if args.command == "train":
+        print(json.dumps(router.train(min_examples=args.min_examples), indent=2, ensure_ascii=False))
+    else:
+        print(json.dumps(router.evaluate(folds=args.folds), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import re
+
+from retrieval.versionrag.versionrag_retriever_db import RetrievalParam, RetrievalType
+
+# Cue words (Indonesian + English). Word boundaries keep "versi" from matching inside "Universitas".
+_CHANGE_PATTERN = re.compile(
+    r"\b(perubahan|berubah|diubah|perbedaan|berbeda|bedanya|revisi|changes?|changed|differences?|diff|revisions?|updated?)\b",
+    re.IGNORECASE,
+)
+_VERSION_LIST_PATTERN = re.compile(
+    r"\b(daftar|list|which|what|berapa|semua|all)\s+(the\s+)?(versi|versions?)\b"
+    r"|\b(versi|versions?)\s+(apa saja|apa aja|yang tersedia|tersedia|available|yang ada)\b",
+    re.IGNORECASE,
+)
+_VERSION_WORD_PATTERN = re.compile(r"\b(versi|versions?|terbaru|latest|terakhir|sebelumnya|previous)\b", re.IGNORECASE)
+_YEAR_RANGE_PATTERN = re.compile(r"\b((?:19|20)\d{2})\s*[-/–]\s*((?:19|20)\d{2})\b")
+_YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+def _normalize(text: str) -> str:
+    # punctuation and separators become spaces, so "(Kurikulum)" or "Akademik?" still match catalog names
+    return " ".join(re.sub(r"[\W_]+", " ", text.lower()).split())
+
+
+class RuleBasedClassifier:
+    """
+    Deterministic pre-classifier for VersionRAG queries.
+
+    Uses keyword/regex cues and exact catalog-name matches to build a RetrievalParam
+    without an LLM call. `classify` returns None whenever the query is ambiguous,
+    in which case the caller defers to the LLM parser.
+    """
+
+    def classify(self, query: str, snapshot):
+        normalized_query = f" {_normalize(query)} "
+        category, documentation = self._match_catalog(normalized_query, snapshot)
+
+        version = None
+        year_range = _YEAR_RANGE_PATTERN.search(query)
+        if year_range:
+            version = f"{year_range.group(1)}-{year_range.group(2)}"
+            known_versions = {entry["version"] for entry in snapshot.versions}
+            if version not in known_versions:
+                return None
+        elif _YEAR_PATTERN.search(query):
+            # A single year ("semester genap 2025") can belong to several academic years.
+            return None
+
+        is_change = bool(_CHANGE_PATTERN.search(query))
+        is_version_list = bool(_VERSION_LIST_PATTERN.search(query))
+
+        if is_change and is_version_list:
+            return None
+
+        if is_version_list:
+            category = category or self._only(cat["name"] for cat in snapshot.categories)
+            if not category:
+                return None
+            params = {"category": category}
+            if documentation:
+                params["documentation"] = documentation
+            return RetrievalParam(retrieval_type=RetrievalType.VersionRetrieval, params=params)
+
+        if is_change:
+            if not documentation:
+                documentation = self._only(doc["name"] for doc in snapshot.documentations if not category or doc["category"] == category)
+                if documentation and not category:
+                    category = self._only(doc["category"] for doc in snapshot.documentations if doc["name"] == documentation)
+            if not category or not documentation:
+                return None
+            params = {"query": query, "category": category, "documentation": documentation}
+            if version:
+                params["version"] = version
+            return RetrievalParam(retrieval_type=RetrievalType.ChangeRetrieval, params=params)
+
+        if _VERSION_WORD_PATTERN.search(query) and not version:
+            # "versi terbaru", "previous version" ... needs the LLM to pick the version.
+            return None
+
+        if not (category or documentation or version):
+            # no positive signal; only the LLM parser can fill in category/documentation filters
+            return None
+
+        params = {"query": query}
+        if category:
+            params["category"] = category
+        if documentation:
+            params["documentation"] = documentation
+        if version:
+            params["version"] = version
+        return RetrievalParam(retrieval_type=RetrievalType.ContentRetrieval, params=params)
+
+    @staticmethod
+    def _only(values):
+        distinct = {value for value in values if value}
+        return distinct.pop() if len(distinct) == 1 else None
+
+    @staticmethod
+    def _match_catalog(normalized_query: str, snapshot):
+        categories = [cat["name"] for cat in snapshot.categories
+                      if cat["name"] and f" {_normalize(cat['name'])} " in normalized_query]
+        documentations = [doc for doc in snapshot.documentations
+                          if doc["name"] and f" {_normalize(doc['name'])} " in normalized_query]
+        category = categories[0] if len(categories) == 1 else None
+        documentation = None
+        if len({doc["name"] for doc in documentations}) == 1:
+            documentation = documentations[0]["name"]
+            doc_categories = {doc["category"] for doc in documentations if doc["category"]}
+            if category is None and len(doc_categories) == 1:
+                category = doc_categories.pop()
+        return category, documentation
@@ -0,0 +1,59 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+
+import numpy as np
+
+_NUMBER = re.compile(r"\d+")
+
+
+def question_numbers(text: str) -> tuple:
+    """
+    Numbers in a question (years, semesters, versions). "UTS 2024-2025" and "UTS 2025-2026"
+    embed almost identically, but in a calendar that difference is the answer.
+    """
+    return tuple(_NUMBER.findall(text or ""))
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU cache of answers keyed by query embedding, model and index epoch.
+
+    A cached answer is only reused for a question with the same numbers (see `question_numbers`)
+    whose normalized embedding reaches `threshold` cosine similarity.
+    """
+
+    def __init__(self, max_entries: int, threshold: float) -> None:
+        self.max_entries = max(1, max_entries)
+        self.threshold = threshold
+        self._lock = Lock()
+        self._entries: "OrderedDict[int, tuple[str, int, tuple, np.ndarray, Any]]" = OrderedDict()
+        self._next_key = 0
+
+    def get(self, model: str, epoch: int, question: str, vector: np.ndarray) -> tuple[Optional[Any], float]:
+        numbers = question_numbers(question)
+        with self._lock:
+            keys = [k for k, (m, e, n, _, _) in self._entries.items() if m == model and e == epoch and n == numbers]
+            if not keys:
+                return None, 0.0
+            matrix = np.stack([self._entries[k][3] for k in keys])
+            sims = matrix @ vector
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < self.threshold:
+                return None, similarity
+            key = keys[best]
+            self._entries.move_to_end(key)
+            return self._entries[key][4], similarity
+
+    def put(self, model: str, epoch: int, question: str, vector: np.ndarray, response: Any) -> None:
+        with self._lock:
+            self._entries[self._next_key] = (model, epoch, question_numbers(question), vector, response)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
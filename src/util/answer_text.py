@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import AsyncIterator, Iterator
+
+ANSWER_PREFIXES = ("answer:", "answer -", "answer—", "jawaban:", "jawaban -", "jawaban—")
+
+
+def strip_answer_prefix(text: str) -> str:
+    """
+    Some generators/LLMs may return a prefixed answer like:
+    - "Answer: ..."
+    - "Jawaban: ..."
+    We remove these for a cleaner chat UI.
+    """
+    if not isinstance(text, str):
+        return str(text)
+    s = text.strip()
+    for prefix in ANSWER_PREFIXES:
+        if s.lower().startswith(prefix):
+            s = s[len(prefix) :].lstrip()
+            break
+    return s
+
+
+_LONGEST_PREFIX = max(len(p) for p in ANSWER_PREFIXES) + 1
+
+
+def _strip_head(head: str) -> str:
+    head = head.lstrip()
+    for prefix in ANSWER_PREFIXES:
+        if head.lower().startswith(prefix):
+            return head[len(prefix) :].lstrip()
+    return head
+
+
+def strip_streamed_answer_prefix(tokens: Iterator[str]) -> Iterator[str]:
+    """
+    Streaming counterpart of `strip_answer_prefix`: hold back the first few characters
+    until we know whether they are an "Answer:" prefix, then pass tokens through as-is.
+    """
+    head = ""
+    tokens = iter(tokens)
+    for token in tokens:
+        head += token
+        if len(head.lstrip()) >= _LONGEST_PREFIX:
+            break
+    head = _strip_head(head)
+    if head:
+        yield head
+    yield from tokens
+
+
+async def astrip_streamed_answer_prefix(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Async variant of `strip_streamed_answer_prefix`.
+    """
+    head = ""
+    tokens = aiter(tokens)
+    async for token in tokens:
+        head += token
+        if len(head.lstrip()) >= _LONGEST_PREFIX:
+            break
+    head = _strip_head(head)
+    if head:
+        yield head
+    async for token in tokens:
+        yield token
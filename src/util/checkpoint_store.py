@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from typing import Any, Callable
+
+from util.constants import CHECKPOINT_DIR
+
+
+def hash_inputs(*parts: Any) -> str:
+    """
+    Stable key for a stage's inputs (anything JSON-serializable; other values via str).
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """
+    sha1 of a file's bytes: a checkpoint must miss when a file changed under the same name.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """
+    Pickled outputs of indexing stages under data/db/checkpoints/<stage>/<key>.pkl.
+    Keys are hashes of the stage inputs, so a rerun loads everything whose inputs are
+    unchanged and only recomputes the rest. Disable with INDEX_CHECKPOINTS=0.
+    """
+
+    def __init__(self, root: str = CHECKPOINT_DIR):
+        self.root = root
+        self.enabled = os.getenv("INDEX_CHECKPOINTS", "1").strip().lower() not in ("0", "false", "no")
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, stage, f"{key}.pkl")
+
+    def has(self, stage: str, key: str) -> bool:
+        return self.enabled and os.path.exists(self._path(stage, key))
+
+    def load(self, stage: str, key: str, default: Any = None) -> Any:
+        if not self.has(stage, key):
+            return default
+        try:
+            with open(self._path(stage, key), "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Warning: could not read checkpoint {stage}/{key}: {e}")
+            return default
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename, so a crash mid-write never leaves a truncated checkpoint behind
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def cached(self, stage: str, key: str, compute: Callable[[], Any], keep: Callable[[Any], bool] = None) -> Any:
+        """
+        The checkpointed value of (stage, key), computed and saved on a miss.
+        Values for which `keep` returns False (e.g. an empty result after failed retries) are not saved.
+        """
+        if self.has(stage, key):
+            value = self.load(stage, key, default=self)
+            if value is not self:
+                return value
+        value = compute()
+        if keep is None or keep(value):
+            self.save(stage, key, value)
+        return value
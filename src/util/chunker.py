@@ -1,35 +1,142 @@
+import os
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
 import pymupdf4llm
 from markdown_chunker import MarkdownChunkingStrategy
 
+from util.constants import MILVUS_MAX_TOKEN_COUNT
+from util.token_chunker import TokenChunkingStrategy
+from util.token_counter import count_embedding_tokens, embedding_max_tokens
+
+def _convert_pages(doc, pages, hdr_info):
+    # `doc` is an open document or, in a worker process, the file path
+    return [page_chunk["text"] for page_chunk in pymupdf4llm.to_markdown(doc=doc, pages=pages, page_chunks=True, hdr_info=hdr_info)]
+
 class Chunk:
     def __init__(self, chunk: str, page: int):
          self.chunk = chunk
          self.page = page
 
 class Chunker:
-    def __init__(self): 
-        self.strategy = MarkdownChunkingStrategy(min_chunk_len=512,    # Minimum chunk size (default: 512)
-                                                soft_max_len=800,       # Preferred maximum chunk size (default: 1024)
-                                                hard_max_len=1024,      # Absolute maximum chunk size (default: 2048)
-                                                detect_headers_footers=False,   # Detect and remove repeating headers/footers
-                                                remove_duplicates=False,        # Remove duplicate chunks
-                                                add_metadata=False,             # Add metadata in each chunk as YAML front matter,
-                                                parallel_processing=True,
-                                                max_workers=4
-                                                )
+    def __init__(self, convert_workers=None):
+        # CHUNKER_SIZING=tokens sizes chunks by the embedding model's tokenizer instead of characters
+        if os.getenv("CHUNKER_SIZING", "chars").strip().lower() == "tokens":
+            self.strategy = TokenChunkingStrategy(count_tokens=count_embedding_tokens,
+                                                  max_tokens=min(embedding_max_tokens(), MILVUS_MAX_TOKEN_COUNT))
+        else:
+            self.strategy = MarkdownChunkingStrategy(min_chunk_len=512,    # Minimum chunk size (default: 512)
+                                                    soft_max_len=800,       # Preferred maximum chunk size (default: 1024)
+                                                    hard_max_len=1024,      # Absolute maximum chunk size (default: 2048)
+                                                    detect_headers_footers=False,   # Detect and remove repeating headers/footers
+                                                    remove_duplicates=False,        # Remove duplicate chunks
+                                                    add_metadata=False,             # Add metadata in each chunk as YAML front matter,
+                                                    parallel_processing=True,
+                                                    max_workers=4
+                                                    )
+        # PDFs are converted this many pages at a time
+        self.page_window = max(1, int(os.getenv("CHUNKER_PAGE_WINDOW", "10")))
+        # PDFs with at least CHUNKER_PARALLEL_MIN_PAGES pages convert their windows in a process pool
+        if convert_workers is None:
+            convert_workers = int(os.getenv("CHUNKER_CONVERT_WORKERS", str(os.cpu_count() or 1)))
+        self.convert_workers = max(1, convert_workers)
+        self.parallel_min_pages = int(os.getenv("CHUNKER_PARALLEL_MIN_PAGES", "50"))
 
     def chunk_document(self, data_file, page_to=None) -> list[Chunk]:
+        return list(self.iter_chunks(data_file, page_to=page_to))
+
+    def iter_chunks(self, data_file, page_to=None):
+        """
+        Yield the chunks of a document while it is being converted. PDFs are converted one
+        window of pages at a time, so memory stays bounded on long documents, and each chunk
+        carries the (1-based) page it starts on. Markdown files have no pages (page -1).
+        """
         if data_file.lower().endswith(".md"):
             with open(data_file, "r", encoding="utf-8") as f:
                 md_text = f.read()
-        else:
-            # docling is not able to serialize links so we use pymupdf4llm
-            if page_to:
-                md_text = pymupdf4llm.to_markdown(doc=data_file, pages=(0, page_to-1))
-            else:
-                md_text = pymupdf4llm.to_markdown(doc=data_file)
-        results = []
-        chunks = self.strategy.chunk_markdown(md_text)
-        for i, chunk in enumerate(chunks):
-            results.append(Chunk(chunk=str(chunk), page=-1)) # page ignored for now
-        return results
\ No newline at end of file
+            for chunk in self.strategy.chunk_markdown(md_text):
+                yield Chunk(chunk=str(chunk), page=-1)
+            return
+
+        # docling is not able to serialize links so we use pymupdf4llm
+        with pymupdf.open(data_file) as doc:
+            page_count = min(page_to, doc.page_count) if page_to else doc.page_count
+            # Heading levels come from font sizes across the whole document, not per window,
+            # so a heading gets the same level whichever window it lands in.
+            hdr_info = pymupdf4llm.IdentifyHeaders(doc, pages=list(range(page_count)))
+
+        # The last chunk of a window may continue on the next page, so its text is carried
+        # over and chunked again together with the next window.
+        carry = []
+        for pages, texts in self._convert_windows(data_file, page_count, hdr_info):
+            parts = carry + list(zip([page + 1 for page in pages], texts))
+            is_last = pages[-1] == page_count - 1
+            chunks, carry = self._chunk_pages(parts, keep_tail=not is_last)
+            yield from chunks
+
+    def _convert_windows(self, data_file, page_count, hdr_info):
+        """
+        Yield (pages, markdown per page) for each window of pages, in page order. Large PDFs
+        are converted by a pool of processes, a few windows ahead of the chunking.
+        """
+        windows = [list(range(start, min(start + self.page_window, page_count)))
+                   for start in range(0, page_count, self.page_window)]
+        workers = min(self.convert_workers, len(windows))
+        if workers <= 1 or page_count < self.parallel_min_pages:
+            with pymupdf.open(data_file) as doc:
+                for pages in windows:
+                    yield pages, _convert_pages(doc, pages, hdr_info)
+            return
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            in_flight = deque()
+            for pages in windows:
+                in_flight.append((pages, pool.submit(_convert_pages, data_file, pages, hdr_info)))
+                if len(in_flight) >= workers * 2:
+                    pages, future = in_flight.popleft()
+                    yield pages, future.result()
+            while in_flight:
+                pages, future = in_flight.popleft()
+                yield pages, future.result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _chunk_pages(self, parts, keep_tail):
+        """
+        Chunk the concatenated text of (page, text) parts. Returns the chunks and, if `keep_tail`,
+        the parts that make up the last chunk instead of that chunk.
+        """
+        text = ""
+        offsets = []
+        pages = []
+        for page, page_text in parts:
+            offsets.append(len(text))
+            pages.append(page)
+            text += page_text
+        if not text.strip():
+            return [], []
+
+        chunks = []
+        cursor = 0
+        for chunk in self.strategy.chunk_markdown(text):
+            chunk = str(chunk)
+            # The chunker may trim whitespace, so locate the chunk by its first characters.
+            position = text.find(chunk.strip()[:64], cursor)
+            if position < 0:
+                position = cursor
+            cursor = position
+            chunks.append((position, Chunk(chunk=chunk, page=pages[bisect_right(offsets, position) - 1])))
+
+        if not keep_tail or not chunks:
+            return [chunk for _, chunk in chunks], []
+
+        tail_start, _ = chunks.pop()
+        carry = []
+        for i, (offset, page) in enumerate(zip(offsets, pages)):
+            end = offsets[i + 1] if i + 1 < len(offsets) else len(text)
+            if end > tail_start:
+                carry.append((page, text[max(offset, tail_start):end]))
+        return [chunk for _, chunk in chunks], carry
@@ -0,0 +1,98 @@
+import numpy as np
+
+# inputs / centroids compared per matrix product; bounds memory to _BLOCK x k similarities
+_BLOCK = 256
+
+
+def _normalize(x):
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+def cluster_vectors(vectors, similarity: float) -> list[list[int]]:
+    """
+    Group row vectors by cosine similarity to cluster centroids.
+
+    One pass assigns every vector to its most similar centroid, or opens a new cluster if no
+    centroid reaches `similarity`. Inputs are compared against the centroids a block at a time
+    (one matrix product per block); only the few centroids that change inside a block are
+    compared again per input, and each centroid is renormalized only when it changes.
+    Clusters whose centroids still reach `similarity` are then merged (centroid linkage) in
+    rounds: per round, disjoint pairs are merged, most similar first.
+
+    The result only depends on the input order, so a sorted input clusters the same way on
+    every run. Returns lists of row indices, ordered by their first member.
+    """
+    x = _normalize(np.asarray(vectors, dtype=np.float32))
+    if len(x) == 0:
+        return []
+
+    sums = np.zeros_like(x)
+    centroids = np.zeros_like(x)
+    members = []
+    for start in range(0, len(x), _BLOCK):
+        block = x[start:start + _BLOCK]
+        known = len(members)
+        block_similarities = block @ centroids[:known].T
+        touched = []  # clusters changed or opened in this block; their block similarities are stale
+        for offset, vector in enumerate(block):
+            best, best_similarity = -1, -np.inf
+            if known:
+                row = block_similarities[offset]
+                stale = [cluster for cluster in touched if cluster < known]
+                if stale:
+                    row = row.copy()
+                    row[stale] = -np.inf
+                best = int(np.argmax(row))
+                best_similarity = row[best]
+            if touched:
+                similarities = centroids[touched] @ vector
+                j = int(np.argmax(similarities))
+                if similarities[j] > best_similarity or (similarities[j] == best_similarity and touched[j] < best):
+                    best, best_similarity = touched[j], similarities[j]
+
+            if best_similarity >= similarity:
+                sums[best] += vector
+                centroids[best] = _normalize(sums[best])
+                members[best].append(start + offset)
+                if best not in touched:
+                    touched.append(best)
+            else:
+                sums[len(members)] = vector
+                centroids[len(members)] = vector
+                touched.append(len(members))
+                members.append([start + offset])
+
+    sums = sums[:len(members)]
+    while len(members) > 1:
+        pairs = _similar_pairs(_normalize(sums), similarity)
+        if not pairs:
+            break
+        merged = set()
+        absorbed = set()
+        for _, a, b in pairs:
+            if a in merged or b in merged:
+                continue
+            sums[a] += sums[b]
+            members[a].extend(members[b])
+            merged.update((a, b))
+            absorbed.add(b)
+        keep = [cluster for cluster in range(len(members)) if cluster not in absorbed]
+        sums = sums[keep]
+        members = [members[cluster] for cluster in keep]
+
+    return sorted((sorted(cluster) for cluster in members), key=lambda cluster: cluster[0])
+
+
+def _similar_pairs(centroids, similarity):
+    """
+    (-similarity, a, b) for every centroid pair a < b reaching `similarity`, most similar first.
+    """
+    pairs = []
+    for start in range(0, len(centroids), _BLOCK):
+        similarities = centroids[start:start + _BLOCK] @ centroids.T
+        for row, column in zip(*np.nonzero(similarities >= similarity)):
+            a = start + int(row)
+            if a < column:
+                pairs.append((-float(similarities[row, column]), a, int(column)))
+    pairs.sort()
+    return pairs
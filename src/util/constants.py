@@ -17,6 +17,10 @@ _DATA_DB_DIR = _REPO_ROOT / "data" / "db"
 _DATA_DB_DIR.mkdir(parents=True, exist_ok=True)
 
 KNOWLEDGE_GRAPH_PATH = str(_DATA_DB_DIR / "knowledge_graph_index.pkl")
+INDEX_EPOCH_PATH = str(_DATA_DB_DIR / "index_epoch")  # bumped by indexers, read by retrieval caches
+VERSIONRAG_ROUTER_LOG_PATH = str(_DATA_DB_DIR / "versionrag_router_log.jsonl")  # logged LLM parser decisions
+VERSIONRAG_ROUTER_MODEL_PATH = str(_DATA_DB_DIR / "versionrag_router.npz")  # trained query router
+CHECKPOINT_DIR = str(_DATA_DB_DIR / "checkpoints")  # indexing stage outputs and job records, for resuming
 
 # Milvus connection:
 # - On Linux/macOS you *can* use Milvus Lite with a local db file (pymilvus extra `milvus-lite`).
@@ -29,8 +33,22 @@ MILVUS_URI = os.getenv("MILVUS_URI")
 if not MILVUS_URI:
     MILVUS_URI = "http://localhost:19530" if sys.platform == "win32" else MILVUS_DB_PATH
 MILVUS_TOKEN = os.getenv("MILVUS_TOKEN", "").strip()
-MILVUS_COLLECTION_NAME_BASELINE = "baseline_collection"
-MILVUS_COLLECTION_NAME_VERSIONRAG = "VersionRAG_collection"
+
+# Embeddings
+# - openai: requires OPENAI_API_KEY
+# - local: uses sentence-transformers (free)
+# - local-cpu: sentence-transformers tuned for CPU-only hosts (ONNX Runtime, length-bucketed batches, optional process pool)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")  # openai / local / local-cpu
+# local-cpu inference backend: torch / onnx (same vectors up to float rounding) / onnx-int8 (quantized: different vectors)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx")
+EMBEDDING_ONNX_CACHE_DIR = str(_DATA_DB_DIR / "onnx")  # locally quantized ONNX models
+
+# Quantized vectors are not comparable with full-precision ones, so they are indexed into their own collections.
+EMBEDDING_VARIANT = "int8" if EMBEDDING_PROVIDER == "local-cpu" and EMBEDDING_BACKEND == "onnx-int8" else "full"
+_COLLECTION_SUFFIX = "_int8" if EMBEDDING_VARIANT == "int8" else ""
+MILVUS_COLLECTION_NAME_BASELINE = "baseline_collection" + _COLLECTION_SUFFIX
+MILVUS_COLLECTION_NAME_VERSIONRAG = "VersionRAG_collection" + _COLLECTION_SUFFIX
+
 MILVUS_MAX_TOKEN_COUNT = 512 # Maximum tokens per chunk
 MILVUS_META_ATTRIBUTE_TEXT = "text"
 MILVUS_META_ATTRIBUTE_PAGE = "page"
@@ -39,16 +57,15 @@ MILVUS_META_ATTRIBUTE_CATEGORY = "category"
 MILVUS_META_ATTRIBUTE_DOCUMENTATION = "documentation"
 MILVUS_META_ATTRIBUTE_VERSION = "version"
 MILVUS_META_ATTRIBUTE_TYPE = "type" # file / node
+MILVUS_META_ATTRIBUTE_SIMHASH = "simhash" # 64-bit SimHash of the chunk text (hex), for near-duplicate collapsing
+MILVUS_META_ATTRIBUTE_VERSIONS = "versions" # "|v1|v2|": every version a deduplicated chunk occurs in
+MILVUS_META_ATTRIBUTE_FILES = "files" # "|f1|f2|": file of each entry in versions (same order)
 MILVUS_BASELINE_SOURCE_COUNT = 15
 LLM_MODE = os.getenv("LLM_MODE", "openai")  # openai / groq / offline
 LLM_OFFLINE_MODEL = os.getenv("LLM_OFFLINE_MODEL", "")  # local llm model (offline mode)
 
-# Embeddings
-# - openai: requires OPENAI_API_KEY
-# - local: uses sentence-transformers (free)
-EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")  # openai / local
-
-if EMBEDDING_PROVIDER == "local":
+# Embedding model defaults per provider
+if EMBEDDING_PROVIDER in ("local", "local-cpu"):
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "384"))
 else:
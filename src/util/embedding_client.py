@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import atexit
+import os
+from dataclasses import dataclass, field
+from threading import Lock
 from typing import List
 
-from util.constants import EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS
+from util.constants import EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, EMBEDDING_BACKEND, EMBEDDING_ONNX_CACHE_DIR
 
 
 class EmbeddingClient:
@@ -38,6 +41,113 @@ class LocalSentenceTransformerEmbeddings(EmbeddingClient):
         return vectors.astype("float32").tolist()
 
 
+@dataclass
+class LocalCPUEmbeddings(LocalSentenceTransformerEmbeddings):
+    """
+    sentence-transformers tuned for CPU-only hosts:
+    - backend: "onnx" runs ONNX Runtime (same vectors as torch up to float rounding),
+      "onnx-int8" a dynamically quantized model (faster, different vectors: indexed into
+      separate *_int8 collections), "torch" the regular model
+    - texts are sorted by length and batched by a token budget (many short texts or a few
+      long ones per batch), so little compute goes into padding
+    - processes > 1 encodes large inputs with a multi-process pool
+    """
+    backend: str = EMBEDDING_BACKEND
+    batch_tokens: int = int(os.getenv("EMBEDDING_BATCH_TOKENS", "8192"))
+    max_batch_size: int = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "128"))
+    processes: int = int(os.getenv("EMBEDDING_PROCESSES", "1"))
+    _pool: object = field(default=None, init=False, repr=False)
+    _pool_lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == "onnx-int8":
+            self._model = self._load_quantized()
+        elif self.backend == "onnx":
+            try:
+                self._model = SentenceTransformer(self.model_name, backend="onnx")
+            except Exception as e:
+                # needs sentence-transformers[onnx]; torch gives the same vectors, only slower
+                print(f"Warning: ONNX backend unavailable, falling back to torch: {e}")
+                self.backend = "torch"
+                self._model = SentenceTransformer(self.model_name)
+        else:
+            self._model = SentenceTransformer(self.model_name)
+
+    def _load_quantized(self):
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        # AVX2 runs on practically every x86-64 server; avx512_vnni is faster where available
+        config = os.getenv("EMBEDDING_QUANTIZATION", "avx2")
+        file_name = f"onnx/model_qint8_{config}.onnx"
+        try:
+            # many hub models ship pre-quantized ONNX files
+            return SentenceTransformer(self.model_name, backend="onnx", model_kwargs={"file_name": file_name})
+        except Exception:
+            pass
+
+        local_dir = os.path.join(EMBEDDING_ONNX_CACHE_DIR, self.model_name.replace("/", "__"))
+        if not os.path.exists(os.path.join(local_dir, file_name)):
+            print(f"Quantizing {self.model_name} to int8 ({config}) into {local_dir}")
+            model = SentenceTransformer(self.model_name, backend="onnx")
+            model.save_pretrained(local_dir)
+            export_dynamic_quantized_onnx_model(model, quantization_config=config, model_name_or_path=local_dir)
+        return SentenceTransformer(local_dir, backend="onnx", model_kwargs={"file_name": file_name})
+
+    def _batches(self, texts: List[str]) -> List[List[int]]:
+        # Indices of texts, longest first, cut into batches of at most batch_tokens padded tokens.
+        # Characters / 4 is close enough for bucketing; the model truncates at max_seq_length.
+        max_length = getattr(self._model, "max_seq_length", None) or 512
+        lengths = [min(len(text) // 4 + 1, max_length) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: -lengths[i])
+        batches = []
+        batch = []
+        for i in order:
+            longest = lengths[batch[0]] if batch else lengths[i]
+            if batch and (len(batch) >= self.max_batch_size or (len(batch) + 1) * longest > self.batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _multi_process_pool(self):
+        if self._pool is None:
+            self._pool = self._model.start_multi_process_pool(["cpu"] * self.processes)
+            atexit.register(self._model.stop_multi_process_pool, self._pool)
+        return self._pool
+
+    def encode_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        if self.processes > 1 and len(texts) >= self.processes * self.max_batch_size:
+            # the pool shares one input/output queue pair, so concurrent callers must take turns
+            with self._pool_lock:
+                vectors = self._model.encode_multi_process(
+                    texts,
+                    self._multi_process_pool(),
+                    batch_size=self.max_batch_size,
+                    normalize_embeddings=True,
+                )
+            return vectors.astype("float32").tolist()
+
+        results = [None] * len(texts)
+        for batch in self._batches(texts):
+            vectors = self._model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            for i, vector in zip(batch, vectors.astype("float32").tolist()):
+                results[i] = vector
+        return results
+
+
 def get_embedding_client() -> EmbeddingClient:
     """
     Factory based on EMBEDDING_PROVIDER.
@@ -46,6 +156,8 @@ def get_embedding_client() -> EmbeddingClient:
     """
     if EMBEDDING_PROVIDER == "local":
         return LocalSentenceTransformerEmbeddings(model_name=EMBEDDING_MODEL)
+    if EMBEDDING_PROVIDER == "local-cpu":
+        return LocalCPUEmbeddings(model_name=EMBEDDING_MODEL)
 
     # Default: OpenAI embeddings via pymilvus helper (requires OPENAI_API_KEY)
     from pymilvus.model.dense import OpenAIEmbeddingFunction
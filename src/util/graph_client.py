@@ -1,4 +1,4 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from neo4j.exceptions import ServiceUnavailable, ReadServiceUnavailable, SessionExpired
 from dotenv import load_dotenv
 import os
@@ -20,6 +20,7 @@ class GraphClient:
         self.AUTH = AUTH
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.async_driver = None
         
         # Try to connect with retries
         for attempt in range(max_retries):
@@ -79,6 +80,14 @@ class GraphClient:
         
     def session(self):
         return self.driver.session()
+
+    def async_session(self):
+        """
+        Session on the async driver, created on first use (for the async chat path).
+        """
+        if self.async_driver is None:
+            self.async_driver = AsyncGraphDatabase.driver(self.URI, auth=self.AUTH)
+        return self.async_driver.session()
     
     def getDriver(self):
         return self.driver
\ No newline at end of file
@@ -1,6 +1,6 @@
 from neo4j_graphrag.llm import LLMInterface, LLMResponse
 from groq import Groq, AsyncGroq
-from typing import List, Optional, Union
+from typing import AsyncIterator, Iterator, List, Optional, Union
 from neo4j_graphrag.message_history import MessageHistory
 from neo4j_graphrag.types import LLMMessage
 import os
@@ -58,6 +58,18 @@ class GROQLLM(LLMInterface):
         return LLMResponse(content=response.choices[0].message.content)
 
 
+    def stream(self, input: str, system_instruction: Optional[str] = None) -> Iterator[str]:
+        kwargs = self._build_kwargs(input, system_instruction)
+        for chunk in self.client.chat.completions.create(**kwargs, stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def astream(self, input: str, system_instruction: Optional[str] = None) -> AsyncIterator[str]:
+        kwargs = self._build_kwargs(input, system_instruction)
+        async for chunk in await self.aclient.chat.completions.create(**kwargs, stream=True):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     async def ainvoke(self, input: str, message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None, system_instruction: Optional[str] = None) -> LLMResponse:
         kwargs = self._build_kwargs(input, system_instruction)
         response = await self.aclient.chat.completions.create(**kwargs)
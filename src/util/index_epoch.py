@@ -0,0 +1,60 @@
+"""
+Monotonically increasing "index epoch".
+
+Indexers bump the epoch whenever they write to Milvus or Neo4j. Caches on the retrieval
+side key their entries on the epoch, so they never serve results computed against an
+older index. The value is persisted under data/db so that a console indexing run also
+invalidates the caches of an already running web server.
+"""
+import os
+from threading import Lock
+
+from util.constants import INDEX_EPOCH_PATH
+
+_lock = Lock()
+_epoch = 0
+_mtime_ns = None
+
+
+def _read_epoch_file() -> int:
+    try:
+        with open(INDEX_EPOCH_PATH, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def get_index_epoch() -> int:
+    """
+    Return the current index epoch. Cheap enough to call on every request
+    (a single stat unless another process bumped the epoch).
+    """
+    global _epoch, _mtime_ns
+    try:
+        mtime_ns = os.stat(INDEX_EPOCH_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return _epoch
+    with _lock:
+        if mtime_ns != _mtime_ns:
+            _epoch = max(_epoch, _read_epoch_file())
+            _mtime_ns = mtime_ns
+        return _epoch
+
+
+def bump_index_epoch() -> int:
+    """
+    Advance the index epoch after a write to Milvus or Neo4j and return the new value.
+    """
+    global _epoch, _mtime_ns
+    with _lock:
+        _epoch = max(_epoch, _read_epoch_file()) + 1
+        tmp_path = f"{INDEX_EPOCH_PATH}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(str(_epoch))
+            os.replace(tmp_path, INDEX_EPOCH_PATH)
+            _mtime_ns = os.stat(INDEX_EPOCH_PATH).st_mtime_ns
+        except OSError as e:
+            # The in-process epoch still advances; only cross-process invalidation is lost.
+            print(f"Warning: Could not persist index epoch: {e}")
+        return _epoch
@@ -1,8 +1,10 @@
+import asyncio
 import os
+from typing import AsyncIterator, Iterator
 from dotenv import load_dotenv
 from util.constants import LLM_MODE
 import lmstudio as lms
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from util.groq_llm_client import GROQLLM
 
 # Load environment variables from the .env file
@@ -18,6 +20,7 @@ class LLMClient:
             # Allow customizing request timeout for hosted environments.
             timeout_s = float(os.getenv("OPENAI_TIMEOUT", "60"))
             self.client = OpenAI(timeout=timeout_s)
+            self.aclient = AsyncOpenAI(timeout=timeout_s)
         elif LLM_MODE == 'groq':
             self.client = GROQLLM(response_format_json=json_format, temp=temp)
         else:
@@ -27,43 +30,98 @@ class LLMClient:
             
             self.client = lms.llm(self.model)
     
+    def _openai_kwargs(self, system_prompt: str, user_prompt: str):
+        kwargs = {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+        }
 
-    def generate(self, system_prompt: str, user_prompt: str):
-        if LLM_MODE == 'openai':
-            kwargs = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-            }
+        if self.temp is not None:
+            kwargs["temperature"] = self.temp
 
-            if self.temp is not None:
-                kwargs["temperature"] = self.temp
+        if self.json_format:
+            kwargs["response_format"] = {"type": "json_object"}
 
-            if self.json_format:
-                kwargs["response_format"] = {"type": "json_object"}
+        # Keep completions bounded to reduce latency and avoid gateway timeouts.
+        if self.max_completion_tokens and self.max_completion_tokens > 0:
+            kwargs["max_completion_tokens"] = self.max_completion_tokens
+        return kwargs
+
+    def _lmstudio_chat_config(self, system_prompt: str, user_prompt: str):
+        config = {}
+        if self.temp is not None:
+            config["temperature"] = self.temp
+
+        if self.json_format:
+            config["response_format"] = {"type": "json_object"}
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        return {"messages": messages}, config
 
-            # Keep completions bounded to reduce latency and avoid gateway timeouts.
-            if self.max_completion_tokens and self.max_completion_tokens > 0:
-                kwargs["max_completion_tokens"] = self.max_completion_tokens
-                
-            response = self.client.chat.completions.create(**kwargs)
+    def generate(self, system_prompt: str, user_prompt: str):
+        if LLM_MODE == 'openai':
+            response = self.client.chat.completions.create(**self._openai_kwargs(system_prompt, user_prompt))
             return response.choices[0].message.content
         elif LLM_MODE == 'groq':
             response = self.client.invoke(system_instruction=system_prompt, input=user_prompt)
             return response.content
         else:
-            config = {}
-            if self.temp is not None:
-                config["temperature"] = self.temp
+            chat, config = self._lmstudio_chat_config(system_prompt, user_prompt)
+            response = self.client.respond(chat, config=config)
+            return response.content
 
-            if self.json_format:
-                config["response_format"] = {"type": "json_object"}
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-            response = self.client.respond({"messages": messages}, config=config)
-            return response.content
\ No newline at end of file
+    def generate_stream(self, system_prompt: str, user_prompt: str) -> Iterator[str]:
+        """
+        Like `generate`, but yields the completion as text deltas while the model produces them.
+        """
+        if LLM_MODE == 'openai':
+            stream = self.client.chat.completions.create(**self._openai_kwargs(system_prompt, user_prompt), stream=True)
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        elif LLM_MODE == 'groq':
+            yield from self.client.stream(system_instruction=system_prompt, input=user_prompt)
+        else:
+            chat, config = self._lmstudio_chat_config(system_prompt, user_prompt)
+            for fragment in self.client.respond_stream(chat, config=config):
+                if fragment.content:
+                    yield fragment.content
+
+    async def agenerate(self, system_prompt: str, user_prompt: str):
+        """
+        Async variant of `generate` for the async chat path.
+        """
+        if LLM_MODE == 'openai':
+            response = await self.aclient.chat.completions.create(**self._openai_kwargs(system_prompt, user_prompt))
+            return response.choices[0].message.content
+        elif LLM_MODE == 'groq':
+            response = await self.client.ainvoke(system_instruction=system_prompt, input=user_prompt)
+            return response.content
+        else:
+            # The LM Studio client used here is synchronous; keep it off the event loop.
+            return await asyncio.to_thread(self.generate, system_prompt, user_prompt)
+
+    async def agenerate_stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """
+        Async variant of `generate_stream` for the streaming chat endpoint.
+        """
+        if LLM_MODE == 'openai':
+            stream = await self.aclient.chat.completions.create(**self._openai_kwargs(system_prompt, user_prompt), stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        elif LLM_MODE == 'groq':
+            async for token in self.client.astream(system_instruction=system_prompt, input=user_prompt):
+                yield token
+        else:
+            # The LM Studio client used here is synchronous; pull each fragment in a worker thread.
+            tokens = self.generate_stream(system_prompt, user_prompt)
+            done = object()
+            while (token := await asyncio.to_thread(next, tokens, done)) is not done:
+                yield token
@@ -1,8 +1,18 @@
-from pymilvus import MilvusClient
+from pymilvus import AsyncMilvusClient, MilvusClient
 
 from util.constants import MILVUS_URI, MILVUS_TOKEN
 
 
+def _client_kwargs(uri: str | None, token: str | None) -> dict:
+    resolved_uri = uri or MILVUS_URI
+    resolved_token = token if token is not None else MILVUS_TOKEN
+
+    kwargs = {"uri": resolved_uri}
+    if resolved_token:
+        kwargs["token"] = resolved_token
+    return kwargs
+
+
 def get_milvus_client(uri: str | None = None, token: str | None = None) -> MilvusClient:
     """
     Create a Milvus client from centralized settings.
@@ -10,13 +20,22 @@ def get_milvus_client(uri: str | None = None, token: str | None = None) -> Milvu
     - Local/self-hosted Milvus: set MILVUS_URI only.
     - Zilliz Cloud: set MILVUS_URI and MILVUS_TOKEN.
     """
-    resolved_uri = uri or MILVUS_URI
-    resolved_token = token if token is not None else MILVUS_TOKEN
+    return MilvusClient(**_client_kwargs(uri, token))
 
-    kwargs = {"uri": resolved_uri}
-    if resolved_token:
-        kwargs["token"] = resolved_token
 
-    return MilvusClient(**kwargs)
+def is_milvus_lite_uri(uri: str | None = None) -> bool:
+    """
+    True when the URI points at a local Milvus Lite db file (e.g. data/db/milvus.db).
+    """
+    return (uri or MILVUS_URI or "").endswith(".db")
+
+
+def get_async_milvus_client(uri: str | None = None, token: str | None = None) -> AsyncMilvusClient:
+    """
+    Same settings as `get_milvus_client`, for the async chat path.
+    Must be created (and used) inside a running event loop. Milvus Lite is not
+    supported by the async client; callers fall back to the sync client there.
+    """
+    return AsyncMilvusClient(**_client_kwargs(uri, token))
 
 
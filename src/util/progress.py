@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class ProgressEvent:
+    """
+    One typed indexing progress update, emitted alongside the human-readable logs.
+
+    type:
+    - stage             : a VersionRAG indexing stage started (`stage`)
+    - file_started      : a file started parsing (`file`)
+    - file_skipped      : a file was already indexed (`file`)
+    - file_done         : all chunks of a file were written (`file`, `count` chunks)
+    - chunks_embedded   : a batch of chunks was embedded (`file`, `count`)
+    - changes_extracted : changes were extracted from a changelog or version diff (`file`, `count`)
+    - pipeline          : files through each index pipeline stage (`counts`)
+    """
+    type: str
+    stage: Optional[str] = None
+    file: Optional[str] = None
+    count: Optional[int] = None
+    counts: Optional[Dict[str, int]] = None
+    time: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {key: value for key, value in asdict(self).items() if value is not None}
+        if self.file:
+            data["file"] = os.path.basename(self.file)
+        return data
+
+
+ProgressListener = Callable[[ProgressEvent], None]
+
+
+def emit(listener: Optional[ProgressListener], type: str, **fields: Any) -> None:
+    """
+    Send an event to `listener` if there is one. A failing listener never breaks indexing.
+    """
+    if listener is None:
+        return
+    try:
+        listener(ProgressEvent(type=type, **fields))
+    except Exception as e:
+        print(f"Warning: progress listener failed: {e}")
@@ -0,0 +1,80 @@
+"""
+Report how many stored chunks are longer than the embedding model's input window, i.e. how much
+text was embedded only partially (the model silently drops everything past its max sequence length).
+
+Jalankan dari folder src:
+    python util/report_truncated_chunks.py [--top 10]
+"""
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+_SRC_DIR = Path(__file__).resolve().parents[1]
+if str(_SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(_SRC_DIR))
+
+from util.constants import (
+    EMBEDDING_MODEL,
+    MILVUS_COLLECTION_NAME_BASELINE,
+    MILVUS_COLLECTION_NAME_VERSIONRAG,
+    MILVUS_META_ATTRIBUTE_TEXT,
+    MILVUS_META_ATTRIBUTE_FILE,
+)
+from util.milvus_client_factory import get_milvus_client
+from util.token_counter import count_embedding_tokens, embedding_max_tokens
+
+
+def _report_collection(client, collection_name: str, max_tokens: int, top: int) -> None:
+    total = 0
+    truncated = 0
+    dropped_tokens = 0
+    truncated_per_file = Counter()
+
+    iterator = client.query_iterator(collection_name=collection_name,
+                                     batch_size=1000,
+                                     filter="",
+                                     output_fields=[MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_FILE])
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            for row in batch:
+                total += 1
+                tokens = count_embedding_tokens(row.get(MILVUS_META_ATTRIBUTE_TEXT) or "")
+                if tokens > max_tokens:
+                    truncated += 1
+                    dropped_tokens += tokens - max_tokens
+                    truncated_per_file[Path(row.get(MILVUS_META_ATTRIBUTE_FILE) or "-").name] += 1
+    finally:
+        iterator.close()
+
+    share = truncated / total * 100 if total else 0.0
+    print(f"  chunks: {total}, truncated: {truncated} ({share:.1f}%)")
+    if truncated:
+        print(f"  tokens dropped: {dropped_tokens} (avg {dropped_tokens / truncated:.0f} per truncated chunk)")
+        for file, count in truncated_per_file.most_common(top):
+            print(f"    {count:6d}  {file}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Count stored chunks that exceed the embedding model's window.")
+    parser.add_argument("--top", type=int, default=10, help="Files with the most truncated chunks to list.")
+    args = parser.parse_args()
+
+    client = get_milvus_client()
+    max_tokens = embedding_max_tokens()
+    print(f"Embedding model: {EMBEDDING_MODEL} (embeds the first {max_tokens} tokens of a chunk)\n")
+
+    collections = client.list_collections()
+    for name in [MILVUS_COLLECTION_NAME_BASELINE, MILVUS_COLLECTION_NAME_VERSIONRAG]:
+        if name not in collections:
+            continue
+        print(f"Collection: {name}")
+        _report_collection(client, name, max_tokens, args.top)
+        print()
+
+
+if __name__ == "__main__":
+    main()
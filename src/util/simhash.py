@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import hashlib
+import re
+
+SIMHASH_BITS = 64
+
+_WORD = re.compile(r"\w+")
+
+
+def _features(text: str, shingle_size: int = 3) -> list[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle_size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of a text over word 3-shingles. Texts that share most of their
+    wording get signatures with a small Hamming distance.
+    """
+    weights = [0] * SIMHASH_BITS
+    for feature in _features(text or ""):
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def simhash_hex(text: str) -> str:
+    """
+    SimHash as a fixed-width hex string, the form it is stored in Milvus
+    (an unsigned 64-bit value does not fit an INT64 field).
+    """
+    return f"{simhash(text):016x}"
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
@@ -0,0 +1,103 @@
+import re
+
+_BLOCK = re.compile(r"\n\s*\n")
+
+class TokenChunkingStrategy:
+    """
+    Packs markdown blocks (paragraphs, tables, lists) into chunks of at most `max_tokens`
+    tokens as counted by `count_tokens`, so each chunk fills the embedding model's window
+    without running past it. Blocks are only split when a single one is too long: by
+    lines first, then by words. Same interface as MarkdownChunkingStrategy.chunk_markdown.
+    """
+    def __init__(self, count_tokens, max_tokens):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+
+    def fits(self, text):
+        return self.count_tokens(text) <= self.max_tokens
+
+    def chunk_markdown(self, text) -> list[str]:
+        pieces = []
+        for block in _BLOCK.split(text):
+            block = block.strip()
+            if not block:
+                continue
+            cost = self.count_tokens(block)
+            if cost <= self.max_tokens:
+                pieces.append((block, cost))
+            else:
+                pieces.extend((piece, self.count_tokens(piece)) for piece in self._split_block(block))
+
+        # Keep a running count (pieces plus separators) instead of re-tokenizing the growing
+        # chunk on every append; the exact count is only taken where a chunk would end.
+        separator = self.count_tokens("\n\n")
+        chunks = []
+        current = []
+        used = 0
+        for piece, cost in pieces:
+            if current and used + separator + cost > self.max_tokens:
+                joined = "\n\n".join([p for p, _ in current] + [piece])
+                exact = self.count_tokens(joined)
+                if exact <= self.max_tokens:
+                    current.append((piece, cost))
+                    used = exact
+                    continue
+                carry = []
+                # keep a heading together with the text it introduces
+                if len(current) > 1 and current[-1][0].startswith("#") and self.fits(current[-1][0] + "\n\n" + piece):
+                    carry = [current.pop()]
+                chunks.extend(self._close(current))
+                current = carry
+                used = carry[0][1] if carry else 0
+            used = used + separator + cost if current else cost
+            current.append((piece, cost))
+        if current:
+            chunks.extend(self._close(current))
+        return chunks
+
+    def _close(self, current):
+        # The running count ignores merges across separators; confirm once per chunk.
+        chunks = []
+        while current:
+            end = len(current)
+            while end > 1 and not self.fits("\n\n".join(p for p, _ in current[:end])):
+                end -= 1
+            chunks.append("\n\n".join(p for p, _ in current[:end]))
+            current = current[end:]
+        return chunks
+
+    def _split_block(self, block):
+        pieces = []
+        current = []
+        for line in block.split("\n"):
+            if not self.fits(line):
+                if current:
+                    pieces.append("\n".join(current))
+                    current = []
+                pieces.extend(self._split_words(line))
+                continue
+            if current and not self.fits("\n".join(current + [line])):
+                pieces.append("\n".join(current))
+                current = []
+            current.append(line)
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    def _split_words(self, line):
+        # Word costs are nearly additive, so pack by their sum and trim the rare overshoot.
+        words = line.split(" ")
+        costs = [self.count_tokens(" " + word) for word in words]
+        pieces = []
+        start = 0
+        while start < len(words):
+            end = start
+            used = 0
+            while end < len(words) and (end == start or used + costs[end] <= self.max_tokens):
+                used += costs[end]
+                end += 1
+            while end - start > 1 and not self.fits(" ".join(words[start:end])):
+                end -= 1
+            pieces.append(" ".join(words[start:end]))
+            start = end
+        return pieces
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+from util.constants import LLM_MODE, EMBEDDING_PROVIDER, EMBEDDING_MODEL
+
+# OpenAI embedding models accept up to 8191 input tokens
+_OPENAI_EMBEDDING_MAX_TOKENS = 8191
+
+
+@lru_cache(maxsize=1)
+def _load_counter() -> Callable[[str], int]:
+    """
+    Pick the most accurate token counter available for the configured LLM:
+    - LLM_TOKENIZER set: that Hugging Face tokenizer (e.g. for Groq / LM Studio Llama models)
+    - openai: tiktoken encoding of gpt-4o-mini
+    - otherwise (or if the optional package is missing): ~4 characters per token
+    """
+    tokenizer_name = os.getenv("LLM_TOKENIZER", "").strip()
+    if tokenizer_name:
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+        except Exception as e:
+            print(f"Warning: could not load tokenizer '{tokenizer_name}', estimating tokens: {e}")
+
+    if LLM_MODE == "openai":
+        try:
+            import tiktoken
+
+            try:
+                encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except ImportError:
+            pass
+
+    return lambda text: math.ceil(len(text) / 4)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Number of tokens `text` takes in the prompt of the configured LLM.
+    """
+    if not text:
+        return 0
+    return _load_counter()(text)
+
+
+def _sentence_transformer_max_length(model_name: str) -> Optional[int]:
+    """
+    max_seq_length from the model's sentence_bert_config.json: the length sentence-transformers
+    truncates to, often shorter than what the tokenizer itself allows (256 vs 512 for MiniLM).
+    """
+    try:
+        if os.path.isdir(model_name):
+            path = os.path.join(model_name, "sentence_bert_config.json")
+        else:
+            from huggingface_hub import hf_hub_download
+
+            path = hf_hub_download(model_name, "sentence_bert_config.json")
+        with open(path, "r", encoding="utf-8") as f:
+            return int(json.load(f)["max_seq_length"])
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _load_embedding_counter() -> Tuple[Callable[[str], int], int]:
+    """
+    Token counter (without special tokens) and usable tokens per text for the configured
+    embedding model:
+    - local: the model's Hugging Face tokenizer; max_seq_length minus [CLS]/[SEP]
+    - openai: tiktoken encoding of the model; 8191 tokens
+    - otherwise (or if the optional package is missing): ~4 characters per token
+    """
+    if EMBEDDING_PROVIDER in ("local", "local-cpu"):
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+            max_length = _sentence_transformer_max_length(EMBEDDING_MODEL) or tokenizer.model_max_length
+            max_length = min(max_length, 8192)  # model_max_length is a huge sentinel when unset
+            special_tokens = len(tokenizer.encode("", add_special_tokens=True))
+            counter = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+            return counter, max_length - special_tokens
+        except Exception as e:
+            print(f"Warning: could not load tokenizer of '{EMBEDDING_MODEL}', estimating tokens: {e}")
+            return (lambda text: math.ceil(len(text) / 4)), 256
+
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(EMBEDDING_MODEL)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return (lambda text: len(encoding.encode(text, disallowed_special=()))), _OPENAI_EMBEDDING_MAX_TOKENS
+    except ImportError:
+        return (lambda text: math.ceil(len(text) / 4)), _OPENAI_EMBEDDING_MAX_TOKENS
+
+
+def count_embedding_tokens(text: str) -> int:
+    """
+    Number of tokens `text` takes in the configured embedding model, special tokens excluded.
+    """
+    if not text:
+        return 0
+    return _load_embedding_counter()[0](text)
+
+
+def embedding_max_tokens() -> int:
+    """
+    Tokens of a text the configured embedding model actually embeds; the rest is silently dropped.
+    """
+    return _load_embedding_counter()[1]
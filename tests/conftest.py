@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# modules import from src/ (e.g. util.*, retrieval.*), as when running from the src folder
+_SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(_SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(_SRC_DIR))
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from util.answer_cache import SemanticAnswerCache, question_numbers
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _at_similarity(similarity):
+    # unit vector with the given cosine similarity to (1, 0)
+    return _unit(similarity, np.sqrt(1 - similarity ** 2))
+
+
+def test_hit_just_above_threshold_and_miss_just_below():
+    cache = SemanticAnswerCache(max_entries=8, threshold=0.95)
+    cache.put("VersionRAG", 1, "Kapan UTS ganjil?", _unit(1, 0), "answer")
+
+    answer, similarity = cache.get("VersionRAG", 1, "Kapan UTS semester ganjil?", _at_similarity(0.951))
+    assert answer == "answer"
+    assert similarity == pytest.approx(0.951, abs=1e-5)
+
+    answer, similarity = cache.get("VersionRAG", 1, "Kapan UTS semester ganjil?", _at_similarity(0.949))
+    assert answer is None
+    assert similarity == pytest.approx(0.949, abs=1e-5)
+
+
+def test_questions_differing_only_by_year_never_share_an_answer():
+    cache = SemanticAnswerCache(max_entries=8, threshold=0.95)
+    vector = _unit(1, 2, 3)
+    cache.put("VersionRAG", 1, "Kapan UTS ganjil 2024-2025?", vector, "2024-2025 answer")
+
+    # identical embedding, only the academic year differs
+    answer, _ = cache.get("VersionRAG", 1, "Kapan UTS ganjil 2025-2026?", vector)
+    assert answer is None
+
+    answer, _ = cache.get("VersionRAG", 1, "kapan uts ganjil 2024-2025", vector)
+    assert answer == "2024-2025 answer"
+
+
+def test_entries_are_scoped_to_model_and_epoch():
+    cache = SemanticAnswerCache(max_entries=8, threshold=0.95)
+    cache.put("VersionRAG", 1, "Kapan UTS?", _unit(1, 0), "answer")
+
+    assert cache.get("Baseline", 1, "Kapan UTS?", _unit(1, 0))[0] is None
+    assert cache.get("VersionRAG", 2, "Kapan UTS?", _unit(1, 0))[0] is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(max_entries=2, threshold=0.99)
+    cache.put("m", 1, "a", _unit(1, 0, 0), "a")
+    cache.put("m", 1, "b", _unit(0, 1, 0), "b")
+    assert cache.get("m", 1, "a", _unit(1, 0, 0))[0] == "a"  # "b" is now least recently used
+    cache.put("m", 1, "c", _unit(0, 0, 1), "c")
+
+    assert cache.get("m", 1, "a", _unit(1, 0, 0))[0] == "a"
+    assert cache.get("m", 1, "b", _unit(0, 1, 0))[0] is None
+    assert cache.get("m", 1, "c", _unit(0, 0, 1))[0] == "c"
+
+
+def test_question_numbers():
+    assert question_numbers("Kapan UTS ganjil 2024-2025?") == ("2024", "2025")
+    assert question_numbers("Kapan UTS?") == ()
@@ -0,0 +1,33 @@
+import asyncio
+
+from util.answer_text import astrip_streamed_answer_prefix, strip_answer_prefix, strip_streamed_answer_prefix
+
+
+def test_strip_answer_prefix():
+    assert strip_answer_prefix("  Jawaban: UTS dimulai 7 Oktober.") == "UTS dimulai 7 Oktober."
+    assert strip_answer_prefix("UTS dimulai 7 Oktober.") == "UTS dimulai 7 Oktober."
+
+
+def test_streamed_prefix_split_across_tokens():
+    tokens = ["Ans", "wer", ": ", "UTS ", "dimulai ", "7 Oktober."]
+    assert "".join(strip_streamed_answer_prefix(tokens)) == "UTS dimulai 7 Oktober."
+
+
+def test_streamed_without_prefix_is_unchanged():
+    tokens = ["UTS ", "dimulai ", "7 Oktober."]
+    assert "".join(strip_streamed_answer_prefix(tokens)) == "UTS dimulai 7 Oktober."
+
+
+def test_streamed_short_answer():
+    assert "".join(strip_streamed_answer_prefix(["Ya."])) == "Ya."
+
+
+def test_async_streamed_prefix_split_across_tokens():
+    async def tokens():
+        for token in ["Jaw", "aban:", " UTS ", "dimulai ", "7 Oktober."]:
+            yield token
+
+    async def collect():
+        return "".join([token async for token in astrip_streamed_answer_prefix(tokens())])
+
+    assert asyncio.run(collect()) == "UTS dimulai 7 Oktober."
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from retrieval.versionrag.versionrag_retriever_catalog import CatalogSnapshot
+from retrieval.versionrag.versionrag_retriever_resolver import CatalogNameResolver
+
+
+class FakeCatalog:
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def snapshot(self):
+        return self._snapshot
+
+
+class FakeEmbeddingClient:
+    """
+    Embeds texts by looking up their first word in `vectors`; unknown words embed to a
+    vector orthogonal to all of them.
+    """
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+
+    def _encode(self, texts):
+        self.calls += 1
+        return [self.vectors.get(text.split(":")[0].split()[0].lower(), [0.0, 0.0, 1.0]) for text in texts]
+
+    encode_documents = _encode
+    encode_queries = _encode
+
+
+def _resolver(embedding_client=None):
+    snapshot = CatalogSnapshot(
+        categories=[{"name": "Kalender Akademik"}, {"name": "Peraturan Akademik"}],
+        documentations=[
+            {"name": "Kalender Akademik 2024", "description": "Jadwal kuliah", "category": "Kalender Akademik"},
+            {"name": "Kalender Akademik 2025", "description": "Jadwal kuliah", "category": "Kalender Akademik"},
+            {"name": "Pedoman Skripsi", "description": "Aturan tugas akhir", "category": "Peraturan Akademik"},
+        ],
+        versions=[
+            {"category": "Kalender Akademik", "documentation": "Kalender Akademik 2024", "version": "2024-2025"},
+            {"category": "Kalender Akademik", "documentation": "Kalender Akademik 2025", "version": "2025-2026"},
+            {"category": "Peraturan Akademik", "documentation": "Pedoman Skripsi", "version": "1.0"},
+            {"category": "Peraturan Akademik", "documentation": "Pedoman Skripsi", "version": "1.1"},
+        ],
+    )
+    client = embedding_client or FakeEmbeddingClient({})
+    return CatalogNameResolver(FakeCatalog(snapshot), client, threshold=0.85), client
+
+
+def test_exact_name_is_confident_without_embedding_the_query():
+    resolver, client = _resolver()
+    name, confidence = resolver.resolve_category("kalender akademik")
+    assert name == "Kalender Akademik"
+    assert resolver.is_confident(confidence)
+    # only the catalog itself was embedded, not the query
+    assert client.calls == 2
+
+
+def test_two_near_equal_candidates_are_not_confident():
+    resolver, _ = _resolver()
+    name, confidence = resolver.resolve_documentation("Kalender Akademik", "Kalender Akademik")
+    assert name in ("Kalender Akademik 2024", "Kalender Akademik 2025")
+    assert not resolver.is_confident(confidence)
+
+
+def test_embedding_similarity_resolves_a_paraphrase():
+    vectors = {"pedoman": [1.0, 0.0, 0.0], "thesis": [1.0, 0.0, 0.0], "kalender": [0.0, 1.0, 0.0]}
+    resolver, _ = _resolver(FakeEmbeddingClient(vectors))
+    name, confidence = resolver.resolve_documentation("Peraturan Akademik", "thesis guidelines")
+    assert name == "Pedoman Skripsi"
+    assert confidence == pytest.approx(1.0)
+
+
+def test_documentations_are_restricted_to_the_category():
+    resolver, _ = _resolver()
+    name, _ = resolver.resolve_documentation("Peraturan Akademik", "Kalender Akademik 2024")
+    assert name == "Pedoman Skripsi"
+
+
+@pytest.mark.parametrize("input_name, expected, confidence", [
+    ("2024-2025", "2024-2025", 1.0),  # exact
+    ("2025", "2025-2026", 0.95),      # unique prefix
+])
+def test_version_exact_and_unique_prefix(input_name, expected, confidence):
+    resolver, _ = _resolver()
+    assert resolver.resolve_version("Kalender Akademik", None, input_name) == (expected, confidence)
+
+
+def test_ambiguous_version_prefix_falls_back_to_fuzzy_score():
+    resolver, _ = _resolver()
+    name, confidence = resolver.resolve_version("Peraturan Akademik", "Pedoman Skripsi", "1")
+    assert name in ("1.0", "1.1")
+    assert confidence < 0.95
+
+
+def test_missing_names_resolve_to_nothing():
+    resolver, _ = _resolver()
+    assert resolver.resolve_category("") == (None, 0.0)
+    assert resolver.resolve_version("Unknown", None, "2024") == (None, 0.0)
@@ -0,0 +1,69 @@
+import pytest
+
+import generation.baseline.context_packer as context_packer
+from generation.baseline.context_packer import pack_context
+from retrieval.baseline.base_retriever import RetrievedData
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # one token per whitespace-separated word, independent of the configured LLM tokenizer
+    monkeypatch.setattr(context_packer, "count_tokens", lambda text: len(text.split()))
+
+
+def _data(chunks, scores=None, versions=None):
+    n = len(chunks)
+    return RetrievedData(chunks=chunks, page_nrs=list(range(1, n + 1)), source_files=[f"/raw/f{i}.pdf" for i in range(n)],
+                         versions=versions, scores=scores)
+
+
+def _cost(data, i):
+    return len(data.entry_to_string(i).split()) + 1
+
+
+def test_everything_fits_in_relevance_order():
+    data = _data(["uts ganjil oktober", "uas ganjil desember", "libur semester januari"], scores=[0.2, 0.9, 0.5])
+    packed = pack_context(data, max_tokens=1000)
+    assert packed.index("uas ganjil") < packed.index("libur semester") < packed.index("uts ganjil")
+
+
+def test_chunks_over_the_remaining_budget_are_skipped_whole():
+    long_chunk = " ".join(["panjang"] * 50)
+    data = _data([long_chunk, "uts ganjil oktober", "uas ganjil desember"], scores=[0.9, 0.8, 0.7])
+    budget = _cost(data, 1) + _cost(data, 2)
+    packed = pack_context(data, max_tokens=budget)
+    assert "panjang" not in packed
+    assert "uts ganjil oktober" in packed and "uas ganjil desember" in packed
+    assert len(packed.split()) <= budget
+
+
+def test_budget_is_never_exceeded():
+    data = _data([f"chunk {i} " + "kata " * i for i in range(20)], scores=[1.0 - i / 20 for i in range(20)])
+    for budget in (5, 17, 40, 100):
+        packed = pack_context(data, max_tokens=budget)
+        assert len(packed.split()) <= budget or packed.endswith("[...chunk truncated...]\n")
+
+
+def test_only_an_oversized_best_chunk_is_truncated():
+    data = _data([" ".join(["panjang"] * 200)], scores=[1.0])
+    packed = pack_context(data, max_tokens=10)
+    assert packed.endswith("[...chunk truncated...]\n")
+
+
+def test_duplicates_within_a_version_collapse():
+    text = "uts semester ganjil dilaksanakan pada minggu ke delapan perkuliahan"
+    data = _data([text, text + " ", "wisuda bulan agustus"], scores=[0.9, 0.8, 0.1], versions=["2024-2025"] * 3)
+    packed = pack_context(data, max_tokens=1000)
+    assert packed.count("uts semester ganjil") == 1
+    assert "wisuda" in packed
+
+
+def test_the_same_paragraph_in_two_versions_is_kept():
+    text = "uts semester ganjil dilaksanakan pada minggu ke delapan perkuliahan"
+    data = _data([text, text], scores=[0.9, 0.8], versions=["2024-2025", "2025-2026"])
+    packed = pack_context(data, max_tokens=1000)
+    assert packed.count("uts semester ganjil") == 2
+
+
+def test_no_chunks_pack_to_nothing():
+    assert pack_context(_data([]), max_tokens=100) == ""
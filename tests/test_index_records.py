@@ -0,0 +1,66 @@
+import pytest
+
+import indexing.baseline.base_indexer as base_indexer
+from indexing.baseline.base_indexer import BaseIndexer
+from util.constants import (MILVUS_META_ATTRIBUTE_CATEGORY, MILVUS_META_ATTRIBUTE_DOCUMENTATION, MILVUS_META_ATTRIBUTE_FILE,
+                            MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_SIMHASH, MILVUS_META_ATTRIBUTE_TEXT,
+                            MILVUS_META_ATTRIBUTE_TYPE, MILVUS_META_ATTRIBUTE_VERSION)
+
+
+class FakeMilvus:
+    def __init__(self):
+        self.inserts = []
+
+    def insert(self, collection_name, data):
+        self.inserts.append(data)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def encode_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def indexer(monkeypatch):
+    epochs = []
+    monkeypatch.setattr(base_indexer, "bump_index_epoch", lambda: epochs.append(1))
+    indexer = BaseIndexer.__new__(BaseIndexer)
+    indexer.client = FakeMilvus()
+    indexer.embedding_fn = FakeEmbeddings()
+    indexer.progress_listener = None
+    indexer.epochs = epochs
+    return indexer
+
+
+def _record(text, version="2025-2026"):
+    return {MILVUS_META_ATTRIBUTE_TEXT: text, MILVUS_META_ATTRIBUTE_PAGE: -1, MILVUS_META_ATTRIBUTE_FILE: "/raw/kalender.pdf",
+            MILVUS_META_ATTRIBUTE_CATEGORY: "Kalender", MILVUS_META_ATTRIBUTE_DOCUMENTATION: "Kalender Akademik",
+            MILVUS_META_ATTRIBUTE_VERSION: version, MILVUS_META_ATTRIBUTE_TYPE: "change"}
+
+
+def test_records_are_embedded_and_inserted_in_batches(indexer):
+    records = [_record(f"perubahan {i}") for i in range(5)]
+    assert indexer.index_records(records, "coll", batch_size=2) == 5
+    assert [len(batch) for batch in indexer.embedding_fn.batches] == [2, 2, 1]
+    assert [len(data) for data in indexer.client.inserts] == [2, 2, 1]
+    row = indexer.client.inserts[0][0]
+    assert row[MILVUS_META_ATTRIBUTE_TEXT] == "perubahan 0"
+    assert len(row[MILVUS_META_ATTRIBUTE_SIMHASH]) == 16
+    assert indexer.epochs == [1]
+
+
+def test_identical_records_are_stored_once(indexer):
+    records = [_record("UTS diundur"), _record("UTS diundur"), _record("UTS diundur", version="2024-2025")]
+    assert indexer.index_records(records, "coll") == 2
+    ids = [row["id"] for data in indexer.client.inserts for row in data]
+    assert len(set(ids)) == 2
+
+
+def test_no_records_write_nothing(indexer):
+    assert indexer.index_records([], "coll") == 0
+    assert indexer.client.inserts == []
+    assert indexer.epochs == []
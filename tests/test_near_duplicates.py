@@ -0,0 +1,52 @@
+from retrieval.baseline.near_duplicates import group_near_duplicates, group_versions, other_sources
+from util.constants import MILVUS_META_ATTRIBUTE_FILE, MILVUS_META_ATTRIBUTE_PAGE, MILVUS_META_ATTRIBUTE_SIMHASH, MILVUS_META_ATTRIBUTE_TEXT, MILVUS_META_ATTRIBUTE_VERSION
+from util.simhash import hamming_distance, simhash, simhash_hex
+
+PARAGRAPH = ("Perkuliahan semester ganjil dimulai pada minggu pertama dan ujian tengah semester "
+             "dilaksanakan setelah tujuh minggu perkuliahan sesuai jadwal fakultas masing masing")
+
+
+def _hit(text, version, file="/raw/kalender.pdf", page=1, stored_simhash=None):
+    entity = {MILVUS_META_ATTRIBUTE_TEXT: text, MILVUS_META_ATTRIBUTE_VERSION: version,
+              MILVUS_META_ATTRIBUTE_FILE: file, MILVUS_META_ATTRIBUTE_PAGE: page}
+    if stored_simhash:
+        entity[MILVUS_META_ATTRIBUTE_SIMHASH] = stored_simhash
+    return {"entity": entity}
+
+
+def test_simhash_distance_tracks_wording():
+    assert hamming_distance(simhash(PARAGRAPH), simhash(PARAGRAPH)) == 0
+    assert hamming_distance(simhash(PARAGRAPH), simhash(PARAGRAPH.upper())) == 0
+    unrelated = "Wisuda diselenggarakan di auditorium utama dengan toga dan undangan untuk orang tua mahasiswa"
+    assert hamming_distance(simhash(PARAGRAPH), simhash(unrelated)) > 10
+    assert len(simhash_hex(PARAGRAPH)) == 16
+
+
+def test_same_paragraph_across_versions_collapses():
+    hits = [_hit(PARAGRAPH, "2024-2025"), _hit(PARAGRAPH, "2025-2026", file="/raw/kalender2.pdf", page=3)]
+    groups = group_near_duplicates(hits, max_distance=3)
+    assert len(groups) == 1
+    assert group_versions(groups[0]) == "2024-2025, 2025-2026"
+    assert other_sources(groups[0]) == ["'kalender2.pdf' (Page 3)"]
+
+
+def test_differing_numbers_are_never_grouped():
+    first = "UTS ganjil dilaksanakan 14 Oktober sampai 25 Oktober di semua fakultas dan program studi"
+    second = "UTS ganjil dilaksanakan 13 Oktober sampai 24 Oktober di semua fakultas dan program studi"
+    groups = group_near_duplicates([_hit(first, "2024-2025"), _hit(second, "2025-2026")], max_distance=64)
+    assert len(groups) == 2
+
+
+def test_negative_distance_disables_grouping():
+    hits = [_hit(PARAGRAPH, "2024-2025"), _hit(PARAGRAPH, "2025-2026")]
+    assert group_near_duplicates(hits, max_distance=-1) == [[hits[0]], [hits[1]]]
+
+
+def test_stored_signature_is_used_and_groups_keep_best_first_order():
+    unrelated = "Wisuda diselenggarakan di auditorium utama dengan toga dan undangan untuk orang tua mahasiswa"
+    # the stored signatures claim the two texts are identical
+    hits = [_hit(unrelated, "2024-2025", stored_simhash="00000000000000ff"), _hit(PARAGRAPH, "2024-2025"),
+            _hit(PARAGRAPH, "2025-2026", stored_simhash="00000000000000ff")]
+    groups = group_near_duplicates(hits, max_distance=0)
+    assert [len(group) for group in groups] == [2, 1]
+    assert groups[0][0] is hits[0] and groups[0][1] is hits[2]
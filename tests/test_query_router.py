@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import retrieval.versionrag.versionrag_retriever_router as router_module
+from retrieval.versionrag.versionrag_retriever_db import RetrievalParam, RetrievalType
+from retrieval.versionrag.versionrag_retriever_router import QueryRouter
+
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    monkeypatch.setenv("VERSIONRAG_ROUTER_LOG_MAX_LINES", "20")
+    return QueryRouter(log_path=str(tmp_path / "log.jsonl"), model_path=str(tmp_path / "router.npz"))
+
+
+def _log(router, n, retrieval_type=RetrievalType.ContentRetrieval):
+    for i in range(n):
+        router.log_decision(f"q{i}", [1.0, float(i)], RetrievalParam(retrieval_type=retrieval_type, params={"category": "kalender"}))
+
+
+def test_log_is_capped_to_the_last_lines(router):
+    _log(router, 55)
+    with open(router.log_path, encoding="utf-8") as f:
+        lines = f.readlines()
+    assert len(lines) <= 22
+    examples = router.load_examples()
+    assert len(examples) == 20
+    assert examples[-1]["query"] == "q54"
+
+
+def test_examples_of_another_embedding_variant_are_ignored(router, monkeypatch):
+    _log(router, 3)
+    monkeypatch.setattr(router_module, "EMBEDDING_VARIANT", "int8")
+    _log(router, 2)
+    assert [e["query"] for e in router.load_examples()] == ["q0", "q1"]
+    with open(router.log_path, encoding="utf-8") as f:
+        assert {json.loads(line)["embedding_variant"] for line in f} == {"full", "int8"}
+
+
+def test_model_of_another_embedding_variant_is_not_loaded(router, monkeypatch):
+    _log(router, 10, RetrievalType.ContentRetrieval)
+    _log(router, 10, RetrievalType.VersionRetrieval)
+    router.train(min_examples=5)
+    assert QueryRouter(log_path=router.log_path, model_path=router.model_path).is_trained
+    monkeypatch.setattr(router_module, "EMBEDDING_VARIANT", "int8")
+    assert not QueryRouter(log_path=router.log_path, model_path=router.model_path).is_trained
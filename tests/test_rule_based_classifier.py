@@ -0,0 +1,61 @@
+import pytest
+
+from retrieval.versionrag.versionrag_retriever_catalog import CatalogSnapshot
+from retrieval.versionrag.versionrag_retriever_db import RetrievalType
+from retrieval.versionrag.versionrag_retriever_rules import RuleBasedClassifier
+
+SNAPSHOT = CatalogSnapshot(
+    categories=[{"name": "Kalender Akademik"}],
+    documentations=[{"name": "Panduan Akademik", "description": "", "category": "Kalender Akademik"}],
+    versions=[
+        {"category": "Kalender Akademik", "documentation": "Panduan Akademik", "version": "2024-2025"},
+        {"category": "Kalender Akademik", "documentation": "Panduan Akademik", "version": "2025-2026"},
+    ],
+)
+
+
+def classify(query):
+    return RuleBasedClassifier().classify(query, SNAPSHOT)
+
+
+@pytest.mark.parametrize("query", [
+    "Kapan UTS?",                                 # no catalog or version cue
+    "Kapan UTS semester genap 2025?",             # a single year spans two academic years
+    "Kapan UTS 2019-2020?",                       # year range not in the catalog
+    "Apa versi terbaru Panduan Akademik?",        # needs the LLM to pick the version
+    "Daftar versi dan perubahan Panduan Akademik",  # both a version list and a change question
+])
+def test_ambiguous_queries_defer_to_the_llm(query):
+    assert classify(query) is None
+
+
+def test_catalog_match_ignores_punctuation_and_case():
+    params = classify("Kapan UTS di (panduan-akademik)?")
+    assert params.retrieval_type == RetrievalType.ContentRetrieval
+    assert params.params["documentation"] == "Panduan Akademik"
+    assert params.params["category"] == "Kalender Akademik"
+
+
+def test_known_year_range_is_a_content_version_filter():
+    params = classify("Kapan UTS 2024-2025?")
+    assert params.retrieval_type == RetrievalType.ContentRetrieval
+    assert params.params["version"] == "2024-2025"
+
+
+def test_version_list_falls_back_to_the_only_category():
+    params = classify("Daftar versi yang tersedia")
+    assert params.retrieval_type == RetrievalType.VersionRetrieval
+    assert params.params == {"category": "Kalender Akademik"}
+
+
+def test_change_question_resolves_the_only_documentation():
+    params = classify("Apa perubahan di 2025-2026?")
+    assert params.retrieval_type == RetrievalType.ChangeRetrieval
+    assert params.params["documentation"] == "Panduan Akademik"
+    assert params.params["version"] == "2025-2026"
+
+
+def test_versi_inside_a_word_is_not_a_cue():
+    # "Universitas" contains "versi"; the query is still a plain content question
+    params = classify("Kapan wisuda Universitas di Panduan Akademik?")
+    assert params.retrieval_type == RetrievalType.ContentRetrieval
@@ -0,0 +1,31 @@
+from util.token_chunker import TokenChunkingStrategy
+
+
+def _words(text):
+    return len(text.split())
+
+
+def test_chunks_stay_within_budget():
+    text = "\n\n".join(" ".join(["kata"] * n) for n in (3, 7, 2, 9, 4, 1, 6, 25))
+    chunks = TokenChunkingStrategy(_words, 10).chunk_markdown(text)
+    assert all(_words(chunk) <= 10 for chunk in chunks)
+    assert sum(_words(chunk) for chunk in chunks) == 57
+
+
+def test_heading_moves_with_its_text():
+    text = "alpha beta gamma\n\n# Jadwal UTS\n\ndelta epsilon zeta eta"
+    chunks = TokenChunkingStrategy(_words, 8).chunk_markdown(text)
+    assert chunks == ["alpha beta gamma", "# Jadwal UTS\n\ndelta epsilon zeta eta"]
+
+
+def test_counts_each_piece_once():
+    calls = []
+
+    def counter(text):
+        calls.append(text)
+        return _words(text)
+
+    text = "\n\n".join(["satu dua"] * 200)
+    TokenChunkingStrategy(counter, 1000).chunk_markdown(text)
+    # one count per block, one for the separator, one exact check per closed chunk
+    assert len(calls) <= 200 + 2 + 1